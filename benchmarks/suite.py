@@ -0,0 +1,269 @@
+"""Benchmark the ORM's hot paths and write the timings out as JSON.
+
+Benchmarks:
+    hydrate       Person._from_db() over element_map rows (client only)
+    hydrate_strict
+                  the same with _strict_hydration, rows are validated (client only)
+    reconcile     People._reconcile() of the rows a save returns (client only)
+    dump_props    Person.dump_props(exclude_none=True) (client only)
+    create        People.create() including reconciling what came back
+    save          People.save() of every vertex after changing one field
+    get_vertex    Person.get_vertex() one id at a time
+    get_vertices  Person.get_vertices() batched
+
+The db benchmarks run against each --backend: "memory" is oh_gee_em.memory's
+in-process graph so no network is involved, "server" is the tinkergraph_dev_server
+(``docker compose up`` in tinkergraph_dev_server/). The difference between the two
+is the server and network's share.
+
+Pass a previous run's JSON as --compare to flag benchmarks that got slower than
+--threshold, the exit code is 1 when any did.
+
+Usage:
+    python benchmarks/suite.py --sizes 1000 10000 100000 --output bench.json
+    python benchmarks/suite.py --backend memory --compare bench.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from collections.abc import Callable
+from datetime import datetime
+from datetime import timezone
+from importlib.metadata import version
+from typing import ClassVar
+from uuid import uuid4
+
+from gremlin_python.process.traversal import T
+from pydantic import Field
+
+from oh_gee_em import BaseVertex
+from oh_gee_em import BaseVertices
+from oh_gee_em import ConnectionManager
+from oh_gee_em import ConnectionSettings
+from oh_gee_em.memory import memory_traversal
+
+
+SERVER_URL = "ws://localhost:8182/gremlin"
+
+
+class Person(BaseVertex):
+    name: str
+    age: int
+    sex: str | None = None
+
+
+class StrictPerson(Person):
+    _strict_hydration: ClassVar[bool] = True
+
+
+class People(BaseVertices):
+    root: set[Person] = Field(default_factory=set)
+
+
+def build_people(size: int) -> People:
+    return People(
+        {Person(id=uuid4(), name="fred", age=22, sex="m") for _ in range(size)}
+    )
+
+
+def build_rows(size: int) -> list[dict]:
+    return [
+        {T.id: uuid4(), T.label: "person", "name": "fred", "age": 22, "sex": "m"}
+        for _ in range(size)
+    ]
+
+
+def server_g():
+    # warmed up before any benchmark runs, connecting isn't part of the timings.
+    return ConnectionManager(
+        ConnectionSettings(url=SERVER_URL, health_check_interval=None)
+    ).g
+
+
+def timed(run: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+# each benchmark takes (g, size) and returns seconds for the timed part only,
+# g is None for the client only ones.
+def bench_hydrate(g, size: int) -> float:
+    rows = build_rows(size)
+    return timed(lambda: [Person._from_db(row) for row in rows])
+
+
+def bench_hydrate_strict(g, size: int) -> float:
+    rows = build_rows(size)
+    return timed(lambda: [StrictPerson._from_db(row) for row in rows])
+
+
+def bench_reconcile(g, size: int) -> float:
+    people = build_people(size)
+    rows = [
+        {T.id: person.id, T.label: person.label, "name": "frederick", "age": 23}
+        for person in people
+    ]
+    return timed(lambda: people._reconcile(rows))
+
+
+def bench_dump_props(g, size: int) -> float:
+    people = list(build_people(size))
+    return timed(lambda: [person.dump_props(exclude_none=True) for person in people])
+
+
+def bench_create(g, size: int) -> float:
+    people = build_people(size)
+    return timed(lambda: people.create(g))
+
+
+def bench_save(g, size: int) -> float:
+    people = build_people(size).create(g)
+    for person in people:
+        person.age = 23
+    return timed(lambda: people.save(g))
+
+
+def bench_get_vertex(g, size: int) -> float:
+    ids = [person.id for person in build_people(size).create(g)]
+    return timed(lambda: [Person.get_vertex(g, id) for id in ids])
+
+
+def bench_get_vertices(g, size: int) -> float:
+    ids = [person.id for person in build_people(size).create(g)]
+    return timed(lambda: Person.get_vertices(g, ids))
+
+
+CLIENT_BENCHMARKS = {
+    "hydrate": bench_hydrate,
+    "hydrate_strict": bench_hydrate_strict,
+    "reconcile": bench_reconcile,
+    "dump_props": bench_dump_props,
+}
+DB_BENCHMARKS = {
+    "create": bench_create,
+    "save": bench_save,
+    "get_vertex": bench_get_vertex,
+    "get_vertices": bench_get_vertices,
+}
+BACKENDS = {"memory": memory_traversal, "server": server_g}
+
+
+def run(name: str, bench, backend: str, g, size: int, repeat: int) -> dict:
+    best = None
+    for _ in range(repeat):
+        if g is not None:
+            g.V().drop().iterate()
+        seconds = bench(g, size)
+        best = seconds if best is None else min(best, seconds)
+    result = {
+        "benchmark": name,
+        "backend": backend,
+        "size": size,
+        "seconds": round(best, 6),
+        "us_per_item": round(best / size * 1e6, 3),
+        "items_per_second": round(size / best, 1) if best else None,
+    }
+    print(
+        f"{name:>14} {backend:>7} {size:>8} {best:>10.4f}s "
+        f"{result['us_per_item']:>10.2f} us/item",
+        file=sys.stderr,
+    )
+    return result
+
+
+def compare(results: list[dict], baseline_path: str, threshold: float) -> list[dict]:
+    """The results that got slower than threshold compared to the baseline run."""
+    with open(baseline_path) as baseline_file:
+        baseline = {
+            (result["benchmark"], result["backend"], result["size"]): result
+            for result in json.load(baseline_file)["results"]
+        }
+    regressions = []
+    for result in results:
+        before = baseline.get((result["benchmark"], result["backend"], result["size"]))
+        if before is None or not before["seconds"]:
+            continue
+        change = result["seconds"] / before["seconds"] - 1
+        result["change"] = round(change, 4)
+        if change > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument(
+        "--backend", choices=list(BACKENDS), nargs="+", default=list(BACKENDS)
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=[*CLIENT_BENCHMARKS, *DB_BENCHMARKS],
+        help="run just these benchmarks",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="keep the best of n")
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    parser.add_argument("--compare", help="a previous run's JSON to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="slowdown counted as regression"
+    )
+    args = parser.parse_args()
+
+    def selected(benchmarks: dict) -> dict:
+        if args.only is None:
+            return benchmarks
+        return {name: bench for name, bench in benchmarks.items() if name in args.only}
+
+    results, skipped = [], []
+    for size in args.sizes:
+        for name, bench in selected(CLIENT_BENCHMARKS).items():
+            results.append(run(name, bench, "client", None, size, args.repeat))
+
+    for backend in args.backend:
+        try:
+            g = BACKENDS[backend]()
+            g.V().limit(1).to_list()
+        except Exception as error:
+            skipped.append({"backend": backend, "reason": repr(error)})
+            print(f"skipping {backend}: {error!r}", file=sys.stderr)
+            continue
+        for size in args.sizes:
+            for name, bench in selected(DB_BENCHMARKS).items():
+                results.append(run(name, bench, backend, g, size, args.repeat))
+        g.V().drop().iterate()
+
+    regressions = []
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "oh_gee_em": version("oh_gee_em"),
+            "gremlinpython": version("gremlinpython"),
+            "pydantic": version("pydantic"),
+            "repeat": args.repeat,
+        },
+        "results": results,
+        "skipped": skipped,
+        "regressions": regressions,
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -165,6 +165,14 @@ def tests(session: Session) -> None:
             session.notify("coverage", posargs=[])
 
 
+@session(name="tests-server", python=python_versions[0])
+def tests_server(session: Session) -> None:
+    """Run the test suite against a gremlin server, see CONTRIBUTING.md."""
+    session.install(".")
+    session.install("pytest", "pygments")
+    session.run("pytest", *session.posargs, env={"OH_GEE_EM_TEST_BACKEND": "server"})
+
+
 @session(python=python_versions[0])
 def coverage(session: Session) -> None:
     """Produce the coverage report."""
@@ -1,5 +1,183 @@
-from pydantic import BaseModel
+from __future__ import annotations
 
+import logging
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+from typing import ClassVar
+from uuid import UUID
 
-class BaseEdge(BaseModel):
-    pass
+from gremlin_python.process.graph_traversal import GraphTraversal
+from gremlin_python.process.graph_traversal import GraphTraversalSource
+from gremlin_python.process.traversal import Direction
+from gremlin_python.process.traversal import T
+from pydantic.functional_validators import AfterValidator
+from pydantic.functional_validators import Annotated
+from pydantic.functional_validators import BeforeValidator
+
+from .BaseElement import BaseElement
+from .instrumentation import count_elements
+from .instrumentation import instrumented
+from .instrumentation import round_trip
+from .utilities import _ato_list
+from .utilities import enum_uuid_to_str
+
+
+if TYPE_CHECKING:
+    from .BaseEdges import BaseEdges
+
+
+logger = logging.getLogger(__name__)  # pragma: no cover
+
+
+def _endpoint_id(vertex: dict) -> str:
+    """The id out of the vertex map an edge element_map has for each end."""
+    return str(vertex[T.id])
+
+
+def _vertex_id(value):
+    """Let edge endpoints be given as the vertex itself or just its id."""
+    if isinstance(value, BaseElement):
+        return value.id
+    return value
+
+
+EndpointId = Annotated[
+    str | int | UUID,
+    BeforeValidator(_vertex_id),
+    AfterValidator(enum_uuid_to_str),
+]
+
+
+class BaseEdge(BaseElement):
+    out_v: EndpointId
+    in_v: EndpointId
+    # an edge can't be moved between vertices by a merge, only re-created.
+    _structural_fields: ClassVar[tuple[str, ...]] = ("id", "label", "out_v", "in_v")
+    _enum_fields: ClassVar[dict] = {
+        **BaseElement._enum_fields,
+        Direction.OUT: ("out_v", _endpoint_id),
+        Direction.IN: ("in_v", _endpoint_id),
+    }
+
+    @classmethod
+    def _source(cls, g: GraphTraversalSource, *ids) -> GraphTraversal:
+        return g.E(*ids)
+
+    @classmethod
+    def _merge(cls, query, merge_map: dict) -> GraphTraversal:
+        return query.merge_e(merge_map)
+
+    @classmethod
+    def _collection(cls) -> type[BaseEdges]:
+        from .BaseEdges import BaseEdges
+
+        return BaseEdges
+
+    def _merge_map(self) -> dict:
+        # mergeE() needs the label and both endpoints to create the edge.
+        return {
+            **self.tinker_id_label(),
+            Direction.OUT: self.out_v,
+            Direction.IN: self.in_v,
+        }
+
+    def _create_props(self) -> dict:
+        # the label is already part of the merge map.
+        return self.dump_props(add_label=False, exclude_none=True)
+
+    @classmethod
+    @instrumented
+    def get_edge(
+        cls, g, id: str | int, fields: Iterable[str] | None = None
+    ) -> BaseEdge:
+        """Get an edge from the database from the given "id".
+
+        Args:
+            g (GraphTraversalSource): The GraphTraversalSource used to get the edge.
+            id (str | int): The T.id or id of the edge in the graph.
+            fields (Iterable[str], optional): Only load these properties, the
+                rest are fetched when one of them is first accessed. Until then
+                dumping the edge raises, see `BaseVertex.get_vertex()`.
+
+        Returns:
+            BaseEdge: A created instance of the class that called this method, inside
+                a Session the instance already loaded for id if there is one.
+        """
+        return cls._get_one(g, id, fields)
+
+    @classmethod
+    @instrumented
+    async def aget_edge(
+        cls, g, id: str | int, fields: Iterable[str] | None = None
+    ) -> BaseEdge:
+        """Awaitable `get_edge()`."""
+        return await cls._aget_one(g, id, fields)
+
+    @classmethod
+    @instrumented
+    def get_edges(
+        cls,
+        g,
+        ids: Iterable[str | int],
+        batch_size: int = 500,
+        collection=None,
+        fields: Iterable[str] | None = None,
+    ) -> BaseEdges:
+        """Get the edges at the given ids, batch_size ids per round trip.
+
+        Args:
+            g (GraphTraversalSource): The GraphTraversalSource used to get the edges.
+            ids (Iterable[str | int]): The T.id's of the edges in the graph.
+            batch_size (int, optional): ids fetched per round trip. Defaults to 500.
+            collection (type[BaseEdges], optional): The collection class to return.
+                Defaults to BaseEdges.
+            fields (Iterable[str], optional): Only load these properties, the
+                rest are fetched for the whole batch when one of them is first
+                accessed.
+
+        Returns:
+            BaseEdges: the edges found in the order the ids were given,
+                `missing_ids` lists the ids that weren't in the db.
+        """
+        if collection is None:
+            from .BaseEdges import BaseEdges as collection
+        return cls._get_many(g, ids, batch_size, collection, fields)
+
+    @classmethod
+    @instrumented
+    async def aget_edges(
+        cls,
+        g,
+        ids: Iterable[str | int],
+        batch_size: int = 500,
+        collection=None,
+        fields: Iterable[str] | None = None,
+    ) -> BaseEdges:
+        """Awaitable `get_edges()`."""
+        if collection is None:
+            from .BaseEdges import BaseEdges as collection
+        return await cls._aget_many(g, ids, batch_size, collection, fields)
+
+    @classmethod
+    @instrumented
+    def delete_edge(cls, g, BaseEdge) -> None:
+        """pass a BaseEdge to this classmethod to delete it from the db."""
+        if BaseEdge._defer("delete"):
+            return
+        query = g.E(BaseEdge.id).drop()
+        with round_trip(query):
+            query.iterate()
+        count_elements(1)
+        BaseEdge._forget()
+
+    @classmethod
+    @instrumented
+    async def adelete_edge(cls, g, BaseEdge) -> None:
+        """Awaitable `delete_edge()`."""
+        if BaseEdge._defer("delete"):
+            return
+        query = g.E(BaseEdge.id).drop()
+        with round_trip(query):
+            await _ato_list(query)
+        count_elements(1)
+        BaseEdge._forget()
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import logging
+from typing import ClassVar
+
+from pydantic import Field
+
+from .BaseEdge import BaseEdge
+from .BaseElements import BaseElements
+
+
+logger = logging.getLogger(__name__)  # pragma: no cover
+
+
+class BaseEdges(BaseElements):
+    root: set[BaseEdge] = Field(default_factory=set)
+    _element_type: ClassVar[type[BaseEdge]] = BaseEdge
@@ -0,0 +1,1089 @@
+from __future__ import annotations
+
+import logging
+from abc import ABC
+from abc import abstractmethod
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from copy import deepcopy
+from functools import partial
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import ClassVar
+from typing import NamedTuple
+from uuid import UUID
+from uuid import uuid4
+
+from gremlin_python.process.graph_traversal import GraphTraversal
+from gremlin_python.process.graph_traversal import GraphTraversalSource
+from gremlin_python.process.graph_traversal import __
+from gremlin_python.process.traversal import Merge
+from gremlin_python.process.traversal import P
+from gremlin_python.process.traversal import T
+from pydantic import BaseModel
+from pydantic import Field
+from pydantic import PrivateAttr
+from pydantic import computed_field
+from pydantic.functional_validators import AfterValidator
+from pydantic.functional_validators import Annotated
+from pydantic_core import PydanticUndefined
+
+from .instrumentation import count_elements
+from .instrumentation import instrumented
+from .instrumentation import operation
+from .instrumentation import phase
+from .instrumentation import round_trip
+from .query import Query
+from .retry import RetryPolicy
+from .session import current_session
+from .utilities import _anext
+from .utilities import _ato_list
+from .utilities import _compile_hydrator
+from .utilities import _is_nullable
+from .utilities import _is_plain
+from .utilities import _is_primitive
+from .utilities import chunker
+from .utilities import enum_uuid_to_str
+
+
+logger = logging.getLogger(__name__)  # pragma: no cover
+
+# defaults that are safe to share between instances without copying.
+_IMMUTABLE_DEFAULTS = (type(None), bool, int, float, str, bytes, tuple, frozenset)
+
+
+class _Unloaded:
+    """What repr() shows for a field a projected read left out."""
+
+    def __repr__(self) -> str:
+        return "<unloaded>"
+
+
+_UNLOADED = _Unloaded()
+
+
+class _Hydrator(NamedTuple):
+    hydrate: Callable[[dict], dict]
+    # field -> default shared by every instance / called for a fresh default.
+    defaults: dict[str, Any]
+    factories: dict[str, Callable[[], Any]]
+    # the same for private attributes.
+    private_defaults: dict[str, Any]
+    private_factories: dict[str, Callable[[], Any]]
+
+
+def _split_defaults(attributes: dict) -> tuple[dict, dict]:
+    """Split FieldInfo/ModelPrivateAttr's defaults into shareable ones and factories."""
+    defaults, factories = {}, {}
+    for name, attribute in attributes.items():
+        if attribute.default_factory is not None:
+            factories[name] = attribute.default_factory
+        elif isinstance(attribute.default, _IMMUTABLE_DEFAULTS):
+            defaults[name] = attribute.default
+        elif attribute.default is not PydanticUndefined:
+            factories[name] = partial(deepcopy, attribute.default)
+    return defaults, factories
+
+
+class _SerializationPlan(NamedTuple):
+    label: str
+    # the fields stored as properties, in declaration order.
+    properties: tuple[str, ...]
+    # the properties that can be None, only they need checking by exclude_none.
+    nullable: frozenset[str]
+    # every property is a type model_dump() passes through as is, so they can be
+    # read straight off the instance, see `BaseElement.dump_props()`.
+    plain: bool
+    # every property is a primitive the db returns as is and nothing validates
+    # them, so db rows can skip validation, see `BaseElement._validates_rows()`.
+    trusted: bool
+
+
+# element class -> its compiled hydrator, see `BaseElement._hydrator()`.
+_hydrators: dict[type, _Hydrator] = {}
+# element class -> its serialization plan, see `BaseElement._serialization_plan()`.
+_plans: dict[type, _SerializationPlan] = {}
+# the dump_props()/model_dump() options the serialization plan handles itself.
+_PLANNED_OPTIONS = frozenset({"exclude_none", "include"})
+
+
+class _Projection:
+    """The properties a read asked for and the elements it loaded without the rest.
+
+    The elements share it so the first access to a field that wasn't loaded fetches
+    the missing fields for all of them, batch_size ids per round trip, instead of
+    one round trip per element.
+    """
+
+    __slots__ = ("g", "keys", "unloaded", "batch_size", "elements")
+
+    def __init__(
+        self, g, keys: tuple[str, ...], unloaded: frozenset[str], batch_size: int
+    ):
+        self.g = g
+        self.keys = keys
+        self.unloaded = unloaded
+        self.batch_size = batch_size
+        self.elements: list[BaseElement] = []
+
+    def _pending(self, element: BaseElement) -> list[BaseElement]:
+        # taken in one go, so elements are only ever fetched by the first access.
+        elements, self.elements = self.elements, []
+        pending = {id(element): element}
+        for other in elements:
+            if other.__pydantic_private__["_unloaded"]:
+                pending.setdefault(id(other), other)
+        return list(pending.values())
+
+    def _query(self, elements: list[BaseElement]) -> GraphTraversal:
+        keys = set()
+        for element in elements:
+            keys.update(element.__pydantic_private__["_unloaded"])
+        cls = type(elements[0])
+        return cls._source(self.g, [element.id for element in elements]).element_map(
+            *sorted(keys)
+        )
+
+    @staticmethod
+    def _fill(elements: list[BaseElement], element_maps: list[dict]) -> None:
+        with phase("hydrate"):
+            by_id = {
+                str(element_map[T.id]): element_map for element_map in element_maps
+            }
+            for element in elements:
+                element._fill_unloaded(by_id.get(str(element.id)))
+        count_elements(len(element_maps))
+
+    def load(self, element: BaseElement) -> None:
+        """Fetch what's missing for element and the others loaded with it."""
+        for chunk in chunker(self._pending(element), self.batch_size):
+            chunk = list(chunk)
+            query = self._query(chunk)
+            with round_trip(query):
+                element_maps = query.to_list()
+            self._fill(chunk, element_maps)
+
+    async def aload(self, element: BaseElement) -> None:
+        """Awaitable `load()`."""
+        for chunk in chunker(self._pending(element), self.batch_size):
+            chunk = list(chunk)
+            query = self._query(chunk)
+            with round_trip(query):
+                element_maps = await _ato_list(query)
+            self._fill(chunk, element_maps)
+
+
+class BaseElement(BaseModel, ABC):
+    """What vertices and edges have in common, see BaseVertex and BaseEdge."""
+
+    id: Annotated[str | int | T | UUID, AfterValidator(enum_uuid_to_str)] = Field(
+        default_factory=uuid4,
+        validate_default=True,
+    )
+    # fields that identify the element in the graph rather than being properties,
+    # they're never dumped as properties or sent by save().
+    _structural_fields: ClassVar[tuple[str, ...]] = ("id", "label")
+    # element_map enum keys -> (field, convert) for the hydrator, see `_hydrate()`.
+    _enum_fields: ClassVar[dict] = {T.id: ("id", str)}
+    # validate what the db returns like any other input instead of trusting it,
+    # classes with a property that isn't a primitive always do.
+    _strict_hydration: ClassVar[bool] = False
+    # fields changed locally since this element was last created/saved/loaded.
+    _dirty: set[str] = PrivateAttr(default_factory=set)
+    # fields a read with fields=[...] didn't load and what loads them on access.
+    _unloaded: frozenset[str] = PrivateAttr(default=frozenset())
+    _projection: _Projection | None = PrivateAttr(default=None)
+
+    def model_post_init(self, __context) -> None:
+        # nothing has come from the db yet so everything passed in is unsaved.
+        self._dirty = set(self.model_fields_set) - set(self._structural_fields)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __setattr__(self, name, value) -> None:
+        super().__setattr__(name, value)
+        # the id (and edge endpoints) are the merge key, they can't be changed by a save.
+        if name not in self._structural_fields and name in self.__class__.model_fields:
+            self._dirty.add(name)
+            private = self.__pydantic_private__
+            if name in private["_unloaded"]:
+                # set locally, loading it later mustn't overwrite it.
+                private["_unloaded"] = private["_unloaded"] - {name}
+
+    if not TYPE_CHECKING:
+
+        def __getattr__(self, name: str) -> Any:
+            # only reached for names missing from __dict__, which is where the
+            # fields a projected read left out are.
+            try:
+                unloaded = object.__getattribute__(self, "__pydantic_private__")[
+                    "_unloaded"
+                ]
+            except (AttributeError, KeyError, TypeError):
+                unloaded = frozenset()
+            if name in unloaded:
+                self.load_unloaded()
+                if name in self.__dict__:
+                    return self.__dict__[name]
+            return super().__getattr__(name)
+
+    @property
+    def dirty_fields(self) -> frozenset[str]:
+        """The fields changed locally that the next save() will send."""
+        return frozenset(self._dirty)
+
+    @property
+    def unloaded_fields(self) -> frozenset[str]:
+        """The fields a read with fields=[...] left out and that haven't loaded yet."""
+        return self.__pydantic_private__["_unloaded"]
+
+    def _refuse_unloaded(self, include, exclude) -> None:
+        """Raise for a dump that would leave out fields that aren't loaded."""
+        unloaded = self.__pydantic_private__["_unloaded"]
+        if include is not None:
+            unloaded = unloaded.intersection(include)
+        if exclude is not None:
+            unloaded = unloaded.difference(exclude)
+        if unloaded:
+            # the dump would pass for the whole element with them missing.
+            raise ValueError(
+                f"{self!r} has unloaded fields {sorted(unloaded)}, "
+                f"load_unloaded() it first or exclude them"
+            )
+
+    def model_dump(self, *, include=None, exclude=None, **kwargs) -> dict[str, Any]:
+        """`BaseModel.model_dump()`, raising for fields a projected read left out.
+
+        Raises:
+            ValueError: fields it would dump aren't loaded, see `unloaded_fields`.
+        """
+        self._refuse_unloaded(include, exclude)
+        return super().model_dump(include=include, exclude=exclude, **kwargs)
+
+    def model_dump_json(self, *, include=None, exclude=None, **kwargs) -> str:
+        """`BaseModel.model_dump_json()`, raising like `model_dump()`."""
+        self._refuse_unloaded(include, exclude)
+        return super().model_dump_json(include=include, exclude=exclude, **kwargs)
+
+    def __repr_args__(self):
+        yield from super().__repr_args__()
+        private = self.__pydantic_private__ or {}
+        for name in sorted(private.get("_unloaded", ())):
+            yield name, _UNLOADED
+
+    @instrumented
+    def load_unloaded(self) -> BaseElement:
+        """Fetch the fields the read left out, for every element it loaded.
+
+        Accessing one of them does this on its own, in async code await
+        `aload_unloaded()` first instead so the access doesn't block.
+        """
+        projection = self.__pydantic_private__["_projection"]
+        if projection is not None and self.__pydantic_private__["_unloaded"]:
+            projection.load(self)
+        return self
+
+    @instrumented
+    async def aload_unloaded(self) -> BaseElement:
+        """Awaitable `load_unloaded()`."""
+        projection = self.__pydantic_private__["_projection"]
+        if projection is not None and self.__pydantic_private__["_unloaded"]:
+            await projection.aload(self)
+        return self
+
+    def _fill_unloaded(self, element_map: dict | None) -> None:
+        """Set the unloaded fields from element_map, defaults for what's not in it."""
+        cls = type(self)
+        private = self.__pydantic_private__
+        hydrator = cls._hydrator()
+        loaded = {} if element_map is None else hydrator.hydrate(element_map)
+        fields = {name: loaded[name] for name in private["_unloaded"] if name in loaded}
+        for name in private["_unloaded"].difference(fields):
+            if name in hydrator.defaults:
+                self.__dict__[name] = hydrator.defaults[name]
+            elif name in hydrator.factories:
+                self.__dict__[name] = hydrator.factories[name]()
+        if cls._validates_rows():
+            for field, value in fields.items():
+                self.__pydantic_validator__.validate_assignment(self, field, value)
+        else:
+            self.__dict__.update(fields)
+            self.__pydantic_fields_set__.update(fields)
+        private["_unloaded"] = frozenset()
+        private["_projection"] = None
+
+    @classmethod
+    def _projection_for(cls, g, fields, batch_size: int) -> _Projection | None:
+        """What a read with fields=[...] asks for, None when that's everything.
+
+        Raises:
+            ValueError: fields names something that isn't a property of the class,
+                or no property at all.
+        """
+        if fields is None:
+            return None
+        fields = set(fields)
+        properties = cls._serialization_plan().properties
+        unknown = fields.difference(properties, cls._structural_fields)
+        if unknown:
+            raise ValueError(f"{cls.__name__} has no properties {sorted(unknown)}")
+        keys = tuple(name for name in properties if name in fields)
+        if not keys:
+            # element_map() without keys would return every property.
+            raise ValueError("fields has to name at least one property")
+        unloaded = frozenset(properties).difference(keys)
+        if not unloaded:
+            return None
+        return _Projection(g, keys, unloaded, batch_size)
+
+    @staticmethod
+    def _element_map(query: GraphTraversal, projection: _Projection | None):
+        """Add the element_map() of a read to query, just the projected keys."""
+        if projection is None:
+            return query.element_map()
+        return query.element_map(*projection.keys)
+
+    @classmethod
+    @abstractmethod
+    def _source(cls, g: GraphTraversalSource, *ids) -> GraphTraversal:
+        """Start a traversal at the given id(s), g.V() for vertices g.E() for edges."""
+
+    @classmethod
+    @abstractmethod
+    def _merge(cls, query, merge_map: dict) -> GraphTraversal:
+        """Add a mergeV()/mergeE() on merge_map to the query."""
+
+    @classmethod
+    @abstractmethod
+    def _collection(cls) -> type:
+        """The collection class reads return by default, BaseVertices/BaseEdges."""
+
+    @classmethod
+    def query(cls, g: GraphTraversalSource) -> Query:
+        """Start a query for the elements with this class's label.
+
+        Example:
+            >>> Person.query(g).where(age__gt=30).order_by("age").all()  # doctest: +SKIP
+
+        Returns:
+            Query: matches every element with the label until narrowed down.
+        """
+        return Query(cls, g)
+
+    @classmethod
+    def _cached(cls, id) -> BaseElement | None:
+        """The instance the current session already loaded for id, if any."""
+        session = current_session()
+        if session is None:
+            return None
+        return session.get(cls, id)
+
+    @classmethod
+    def _hydrator(cls) -> _Hydrator:
+        """This class's compiled hydrator and defaults, built once per class."""
+        hydrator = _hydrators.get(cls)
+        if hydrator is None:
+            properties = set(cls.model_fields) - set(cls._structural_fields)
+            hydrator = _hydrators[cls] = _Hydrator(
+                _compile_hydrator(properties, cls._enum_fields),
+                *_split_defaults(cls.model_fields),
+                *_split_defaults(cls.__private_attributes__),
+            )
+        return hydrator
+
+    @classmethod
+    def _hydrate(cls, element_map: dict) -> dict:
+        """Turn an element_map into this class's fields with its compiled hydrator.
+
+        The element_map it's given isn't modified.
+        """
+        return cls._hydrator().hydrate(element_map)
+
+    @classmethod
+    def _construct(cls, element_map: dict) -> BaseElement:
+        """`model_construct()` cut down to what a trusted db row needs.
+
+        No validation, no `model_post_init()` and nothing is marked dirty.
+        """
+        hydrator = cls._hydrator()
+        fields = hydrator.hydrate(element_map)
+        values = {**hydrator.defaults, **fields}
+        for name, factory in hydrator.factories.items():
+            if name not in values:
+                values[name] = factory()
+        private = dict(hydrator.private_defaults)
+        for name, factory in hydrator.private_factories.items():
+            private[name] = factory()
+
+        element = cls.__new__(cls)
+        object.__setattr__(element, "__dict__", values)
+        object.__setattr__(element, "__pydantic_fields_set__", set(fields))
+        object.__setattr__(element, "__pydantic_extra__", None)
+        object.__setattr__(element, "__pydantic_private__", private)
+        return element
+
+    @classmethod
+    def _construct_projected(
+        cls, element_map: dict, projection: _Projection
+    ) -> BaseElement:
+        """`_construct()` an element_map a read with fields=[...] returned."""
+        element = cls._construct(element_map)
+        for name in projection.unloaded:
+            # left out of __dict__ so accessing it goes through __getattr__.
+            element.__dict__.pop(name, None)
+        if cls._validates_rows():
+            for field, value in cls._hydrate(element_map).items():
+                cls.__pydantic_validator__.validate_assignment(element, field, value)
+        private = element.__pydantic_private__
+        private["_unloaded"] = projection.unloaded
+        private["_projection"] = projection
+        projection.elements.append(element)
+        return element
+
+    @classmethod
+    def _from_db(
+        cls, element_map: dict, projection: _Projection | None = None
+    ) -> BaseElement:
+        """Build an instance from an element_map the db returned.
+
+        Rows from the db are trusted and built with `_construct()`, skipping
+        validation, when every property is a primitive, see `_validates_rows()`.
+        Inside a Session the instance already loaded for that id is returned instead,
+        untouched so any unsaved changes on it are kept.
+        With a projection the fields it left out are loaded on first access.
+        """
+        session = current_session()
+        if session is not None:
+            element = session.get(cls, element_map.get(T.id))
+            if element is not None:
+                return element
+
+        if projection is not None:
+            element = cls._construct_projected(element_map, projection)
+        elif cls._validates_rows():
+            element = cls.model_validate(cls._hydrate(element_map))
+            element._dirty.clear()
+        else:
+            element = cls._construct(element_map)
+        if session is not None:
+            session.add(element)
+        return element
+
+    def _load(self, element_map: dict) -> BaseElement:
+        """Update this instance with an element_map the db returned."""
+        cls = type(self)
+        fields = cls._hydrate(element_map)
+        if cls._validates_rows():
+            for field, value in fields.items():
+                self.__pydantic_validator__.validate_assignment(self, field, value)
+        else:
+            # straight into the model, there's nothing to validate or track.
+            self.__dict__.update(fields)
+            self.__pydantic_fields_set__.update(fields)
+        # skip pydantic's __getattr__ for the private attribute, this runs per row.
+        private = self.__pydantic_private__
+        private["_dirty"].clear()
+        if private["_unloaded"]:
+            private["_unloaded"] = private["_unloaded"].difference(fields)
+        session = current_session()
+        if session is not None:
+            # what the db gave back is now this instance, make it the one for the id.
+            session.add(self)
+        return self
+
+    @classmethod
+    def _pending_ids(cls, ids: Iterable, found: dict) -> list:
+        """Unique ids in the order given, less those the session already holds."""
+        pending = []
+        for id in dict.fromkeys(ids):
+            cached = cls._cached(id)
+            if cached is not None:
+                found[str(id)] = cached
+            else:
+                pending.append(id)
+        return pending
+
+    @classmethod
+    def _collect(cls, ids: Iterable, found: dict, collection: type) -> Any:
+        """Put what was found into collection in the order asked for, noting misses."""
+        elements = collection()
+        for id in dict.fromkeys(ids):
+            element = found.get(str(id))
+            if element is None:
+                elements._missing_ids.append(id)
+            else:
+                elements.add(element)
+        return elements
+
+    @classmethod
+    def _get_one(cls, g, id, fields=None) -> BaseElement | None:
+        """The element at id, from the session when it already holds it."""
+        cached = cls._cached(id)
+        if cached is not None:
+            return cached
+
+        projection = cls._projection_for(g, fields, 1)
+        query = cls._element_map(cls._source(g, id), projection)
+        with round_trip(query):
+            element_map = next(query, None)
+        return cls._from_element_map(element_map, projection)
+
+    @classmethod
+    async def _aget_one(cls, g, id, fields=None) -> BaseElement | None:
+        """Awaitable `_get_one()`."""
+        cached = cls._cached(id)
+        if cached is not None:
+            return cached
+
+        projection = cls._projection_for(g, fields, 1)
+        query = cls._element_map(cls._source(g, id), projection)
+        with round_trip(query):
+            element_map = await _anext(query)
+        return cls._from_element_map(element_map, projection)
+
+    @classmethod
+    def _from_element_map(
+        cls, element_map: dict | None, projection: _Projection | None = None
+    ) -> BaseElement | None:
+        if element_map is None:
+            return None
+        count_elements(1)
+        with phase("hydrate"):
+            return cls._from_db(element_map, projection)
+
+    @classmethod
+    def _found(
+        cls,
+        element_maps: list[dict],
+        found: dict,
+        projection: _Projection | None = None,
+    ) -> None:
+        """Build what a fetch by ids returned into found, by id."""
+        with phase("hydrate"):
+            for element_map in element_maps:
+                element = cls._from_db(element_map, projection)
+                found[str(element.id)] = element
+        count_elements(len(element_maps))
+
+    @classmethod
+    def _get_many(
+        cls, g, ids: Iterable, batch_size: int, collection: type, fields=None
+    ) -> Any:
+        ids = list(ids)
+        found = {}
+        projection = cls._projection_for(g, fields, batch_size)
+        for id_chunk in chunker(cls._pending_ids(ids, found), batch_size):
+            query = cls._element_map(cls._source(g, list(id_chunk)), projection)
+            with round_trip(query):
+                element_maps = query.to_list()
+            cls._found(element_maps, found, projection)
+        return cls._collect(ids, found, collection)
+
+    @classmethod
+    async def _aget_many(
+        cls, g, ids: Iterable, batch_size: int, collection: type, fields=None
+    ) -> Any:
+        ids = list(ids)
+        found = {}
+        projection = cls._projection_for(g, fields, batch_size)
+        for id_chunk in chunker(cls._pending_ids(ids, found), batch_size):
+            query = cls._element_map(cls._source(g, list(id_chunk)), projection)
+            with round_trip(query):
+                element_maps = await _ato_list(query)
+            cls._found(element_maps, found, projection)
+        return cls._collect(ids, found, collection)
+
+    def _forget(self) -> None:
+        """Take this instance out of the current session after it was deleted."""
+        session = current_session()
+        if session is not None:
+            session.discard(self)
+
+    def tinker_id(self):
+        if self.id:
+            return {T.id: self.id}
+        return {}
+
+    def tinker_id_label(self):
+        if self.id:
+            return {T.id: self.id, T.label: self._serialization_plan().label}
+        return {}
+
+    def _payload_bytes(self) -> int:
+        """Rough size of this element once serialized, for sizing chunks by bytes."""
+        return 16 + sum(
+            len(name) + len(str(value))
+            for name, value in self.__dict__.items()
+            if value is not None
+        )
+
+    def _merge_map(self) -> dict:
+        """The map mergeV()/mergeE() searches on for this element."""
+        return self.tinker_id()
+
+    def _create_props(self) -> dict:
+        """The properties on_create sets when this element doesn't exist yet."""
+        return self.dump_props(exclude_none=True)
+
+    @classmethod
+    def _serialization_plan(cls) -> _SerializationPlan:
+        """What dump_props() needs to know about this class, built once per class."""
+        plan = _plans.get(cls)
+        if plan is None:
+            structural = set(cls._structural_fields)
+            properties = tuple(
+                name for name in cls.model_fields if name not in structural
+            )
+            decorators = cls.__pydantic_decorators__
+            plan = _plans[cls] = _SerializationPlan(
+                label=cls._class_label(),
+                properties=properties,
+                nullable=frozenset(
+                    name
+                    for name in properties
+                    if _is_nullable(cls.model_fields[name].annotation)
+                ),
+                plain=(
+                    not decorators.field_serializers
+                    and not decorators.model_serializers
+                    and set(cls.model_computed_fields) <= structural
+                    and all(
+                        _is_plain(cls.model_fields[name].annotation)
+                        for name in properties
+                    )
+                ),
+                trusted=(
+                    not decorators.field_validators
+                    and not decorators.model_validators
+                    and all(
+                        _is_primitive(cls.model_fields[name].annotation)
+                        and not cls.model_fields[name].metadata
+                        for name in properties
+                    )
+                ),
+            )
+        return plan
+
+    @classmethod
+    def _validates_rows(cls) -> bool:
+        """Do rows from the db go through validation rather than `_construct()`?
+
+        Only when every property is a str/int/float/bool the db already returns as
+        is can validation be skipped, enums, UUID's, dates and the like need it
+        to get their type. `_strict_hydration` makes every row go through it.
+        """
+        return cls._strict_hydration or not cls._serialization_plan().trusted
+
+    def dump_props(self, add_label=True, exclude=None, **kwargs):
+        plan = self._serialization_plan()
+        if (
+            exclude is None
+            and plan.plain
+            and _PLANNED_OPTIONS.issuperset(kwargs)
+            # model_dump() skips the fields that aren't loaded, this would raise.
+            and not self.__pydantic_private__["_unloaded"]
+        ):
+            # read the values straight off the instance instead of model_dump().
+            values = self.__dict__
+            include = kwargs.get("include")
+            exclude_none = kwargs.get("exclude_none", False)
+            props = {T.label: plan.label} if add_label else {}
+            for name in plan.properties:
+                if include is not None and name not in include:
+                    continue
+                value = values[name]
+                if exclude_none and value is None:
+                    continue
+                props[name] = value
+            return props
+
+        if exclude is None:
+            exclude = self._structural_fields
+        if add_label:
+            return {T.label: plan.label, **self.model_dump(exclude=exclude, **kwargs)}
+        return self.model_dump(exclude=exclude, **kwargs)
+
+    def project(self):
+        projection_dict = {}
+        projection_dict["id"] = self.id
+        projection_dict["label"] = self.label
+
+        return {
+            **projection_dict,
+            **self.model_dump(exclude=set(self._structural_fields)),
+        }
+
+    @classmethod
+    def _class_label(cls) -> str:
+        return cls.__name__.lower()
+
+    @computed_field
+    @property
+    def label(self) -> str:
+        return self._serialization_plan().label
+
+    @label.setter
+    def label(self, value: str) -> None:
+        pass
+
+    @classmethod
+    def _label_query(cls, g, where: dict | None = None) -> GraphTraversal:
+        """Every element with this class's label, optionally filtered by where."""
+        query = cls._source(g).has_label(cls._class_label())
+        for key, value in (where or {}).items():
+            # value can be a plain value or a predicate like P.gt(30)
+            query = query.has(key, value)
+        return query
+
+    @classmethod
+    def _page_query(
+        cls,
+        g,
+        page_size: int,
+        where: dict | None = None,
+        after=None,
+        projection: _Projection | None = None,
+        until=None,
+    ) -> GraphTraversal:
+        query = cls._label_query(g, where)
+        if after is not None:
+            query = query.has(T.id, P.gt(after))
+        if until is not None:
+            query = query.has(T.id, P.lte(until))
+        return cls._element_map(query.order().by(T.id).limit(page_size), projection)
+
+    @classmethod
+    def _from_page(
+        cls, page: list[dict], projection: _Projection | None = None
+    ) -> list[BaseElement]:
+        with phase("hydrate"):
+            elements = [cls._from_db(element_map, projection) for element_map in page]
+        count_elements(len(elements))
+        return elements
+
+    @classmethod
+    def stream(
+        cls,
+        g,
+        page_size: int = 1000,
+        where: dict | None = None,
+        after=None,
+        fields: Iterable[str] | None = None,
+    ) -> Iterator[BaseElement]:
+        """Lazily yield every element with this class's label, one page at a time.
+
+        Pages are read in id order with a cursor on the last id seen, rather than
+        range() offsets, so every page costs the same however deep the scan is and
+        only one page is held in memory at a time.
+
+        Args:
+            g (GraphTraversalSource): The GraphTraversalSource to read from.
+            page_size (int, optional): Elements fetched per round trip.
+                Defaults to 1000.
+            where (dict, optional): Only yield elements whose properties match,
+                values can be plain values or predicates, e.g. {"age": P.gt(30)}.
+            after (optional): Only yield elements with an id after this one,
+                e.g. to resume a scan.
+            fields (Iterable[str], optional): Only load these properties, the rest
+                are fetched for the whole page when one of them is first accessed.
+
+        Yields:
+            BaseElement: A created instance of the class that called this method.
+        """
+        while True:
+            # every page is an operation of its own, a generator can't hold one open.
+            with operation("BaseElement.stream", cls):
+                # a projection per page, loading what it left out loads the page.
+                projection = cls._projection_for(g, fields, page_size)
+                query = cls._page_query(g, page_size, where, after, projection)
+                with round_trip(query):
+                    page = query.to_list()
+                elements = cls._from_page(page, projection)
+            if not page:
+                return
+            # keep the id as the db returned it, the cursor has to compare like
+            # for like with the ids in the graph (e.g. UUID's on tinkergraph).
+            after = page[-1][T.id]
+            yield from elements
+            if len(page) < page_size:
+                return
+
+    @classmethod
+    async def astream(
+        cls,
+        g,
+        page_size: int = 1000,
+        where: dict | None = None,
+        after=None,
+        fields: Iterable[str] | None = None,
+    ) -> AsyncIterator[BaseElement]:
+        """Async iterator version of `stream()`."""
+        while True:
+            with operation("BaseElement.astream", cls):
+                projection = cls._projection_for(g, fields, page_size)
+                query = cls._page_query(g, page_size, where, after, projection)
+                with round_trip(query):
+                    page = await _ato_list(query)
+                elements = cls._from_page(page, projection)
+            if not page:
+                return
+            after = page[-1][T.id]
+            for element in elements:
+                yield element
+            if len(page) < page_size:
+                return
+
+    @classmethod
+    def _forget_all(cls) -> None:
+        # which elements a filtered delete_all() removes isn't known locally,
+        # forget them all, the next load just goes back to the db.
+        session = current_session()
+        if session is not None:
+            session.identity_map.discard_class(cls)
+
+    @classmethod
+    def _delete_batch_query(cls, g, where: dict | None, batch_size: int):
+        query = cls._label_query(g, where)
+        return query.limit(batch_size).side_effect(__.drop()).count()
+
+    @classmethod
+    @instrumented
+    def delete_all(cls, g, where: dict | None = None, batch_size: int = 500) -> int:
+        """Delete every element with this class's label, batch_size per round trip.
+
+        Bounded batches keep any one drop from running into the server's
+        evaluationTimeout or holding the whole label in memory.
+
+        Args:
+            g (GraphTraversalSource): The GraphTraversalSource to delete from.
+            where (dict, optional): Only delete elements whose properties match,
+                values can be plain values or predicates, e.g. {"age": P.gt(30)}.
+            batch_size (int, optional): Elements dropped per round trip.
+                Defaults to 500.
+
+        Raises:
+            RuntimeError: Called in a UnitOfWork, which can't hold it back.
+
+        Returns:
+            int: how many elements were removed.
+        """
+        cls._not_deferred("delete_all")
+        cls._forget_all()
+        removed = 0
+        while True:
+            query = cls._delete_batch_query(g, where, batch_size)
+            with round_trip(query):
+                dropped = next(query, 0)
+            count_elements(dropped)
+            removed += dropped
+            if dropped < batch_size:
+                return removed
+
+    @classmethod
+    @instrumented
+    async def adelete_all(
+        cls, g, where: dict | None = None, batch_size: int = 500
+    ) -> int:
+        """Awaitable `delete_all()`."""
+        cls._not_deferred("adelete_all")
+        cls._forget_all()
+        removed = 0
+        while True:
+            query = cls._delete_batch_query(g, where, batch_size)
+            with round_trip(query):
+                dropped = await _anext(query, 0)
+            count_elements(dropped)
+            removed += dropped
+            if dropped < batch_size:
+                return removed
+
+    def update(self, **update_fields) -> BaseElement:
+        """updates this class, the updated fields are sent on the next save()"""
+        for field, value in update_fields.items():
+            setattr(self, field, value)
+        return self
+
+    def _save_query(self, g) -> GraphTraversal:
+        # on_match doesn't like T.label, skip passing in this context since some graph
+        # providers don't let you update label without re-creating the element.
+        query = self._merge(g, self._merge_map()).option(
+            Merge.on_match,
+            self.dump_props(
+                add_label=False, exclude_none=True, include=set(self._dirty)
+            ),
+        )
+        # can't set None in mergeV, a field set to None drops its property instead.
+        none_keys = [
+            key
+            for key in self._serialization_plan().nullable.intersection(self._dirty)
+            if getattr(self, key) is None
+        ]
+        if none_keys:
+            query = query.side_effect(__.properties(*none_keys).drop())
+        return query.element_map()
+
+    @staticmethod
+    def _first(build: Callable[[], GraphTraversal], retry: RetryPolicy | None):
+        """The first result of the traversal build() makes, retried per the policy."""
+
+        def send():
+            # a traversal can only be sent once, build a new one for every attempt.
+            with phase("serialize"):
+                query = build()
+            with round_trip(query):
+                return next(query, None)
+
+        if retry is None:
+            return send()
+        return retry.call(send)
+
+    @staticmethod
+    async def _afirst(build: Callable[[], GraphTraversal], retry: RetryPolicy | None):
+        """Awaitable `_first()`."""
+
+        async def send():
+            with phase("serialize"):
+                query = build()
+            with round_trip(query):
+                return await _anext(query)
+
+        if retry is None:
+            return await send()
+        return await retry.acall(send)
+
+    def _loaded(self, element_map: dict | None) -> BaseElement | None:
+        """_load() what a write returned, None when it returned nothing."""
+        if not element_map:
+            return None
+        with phase("hydrate"):
+            return self._load(element_map)
+
+    def _defer(self, operation: str) -> bool:
+        """Leave the write to the UnitOfWork entered, if there is one."""
+        session = current_session()
+        return session is not None and session.defer(operation, self)
+
+    @staticmethod
+    def _not_deferred(method: str) -> None:
+        """Raise for a write a UnitOfWork can't hold back, when one is entered."""
+        session = current_session()
+        if session is not None and session.defers():
+            raise RuntimeError(
+                f"{method}() writes on the server straight away, "
+                f"call it outside of the UnitOfWork"
+            )
+
+    @instrumented
+    def save(self, g, retry: RetryPolicy | None = None) -> BaseElement:
+        """save mutations to current class to db, load what db returned.
+
+        Args:
+            g (GraphTraversalSource): The GraphTraversalSource to save to.
+            retry (RetryPolicy, optional): Re-send the save when it conflicts with
+                a concurrent write.
+        """
+        if not self._dirty:
+            # nothing changed since the last create/save/load, skip the round trip.
+            return self
+        if self._defer("save"):
+            return self
+
+        count_elements(1, self._payload_bytes)
+        element = self._first(partial(self._save_query, g), retry)
+        # multiple people could change these values at the same time,
+        # so update the model with what source of truth gave back.
+        return self._loaded(element)
+
+    @instrumented
+    async def asave(self, g, retry: RetryPolicy | None = None) -> BaseElement:
+        """Awaitable `save()`."""
+        if not self._dirty:
+            return self
+        if self._defer("save"):
+            return self
+
+        count_elements(1, self._payload_bytes)
+        element = await self._afirst(partial(self._save_query, g), retry)
+        return self._loaded(element)
+
+    def _create_query(self, g) -> GraphTraversal:
+        return (
+            self._merge(g, self._merge_map())
+            .option(Merge.on_create, self._create_props())
+            .element_map()
+        )
+
+    @instrumented
+    def create(self, g, retry: RetryPolicy | None = None) -> BaseElement:
+        """create this class in the db if it doesn't exist."""
+        if self._defer("create"):
+            return self
+        count_elements(1, self._payload_bytes)
+        element = self._first(partial(self._create_query, g), retry)
+        # None when nothing came back, raise here instead? creation had to have failed.
+        return self._loaded(element)
+
+    @instrumented
+    async def acreate(self, g, retry: RetryPolicy | None = None) -> BaseElement:
+        """Awaitable `create()`."""
+        if self._defer("create"):
+            return self
+        count_elements(1, self._payload_bytes)
+        element = await self._afirst(partial(self._create_query, g), retry)
+        return self._loaded(element)
+
+    def _delete_query(self, g) -> GraphTraversal:
+        return self._source(g, self.id).drop()
+
+    @instrumented
+    def delete(self, g, retry: RetryPolicy | None = None) -> None:
+        """delete this class from the db."""
+        if self._defer("delete"):
+            return
+        count_elements(1)
+        self._first(partial(self._delete_query, g), retry)
+        self._forget()
+
+    @instrumented
+    async def adelete(self, g, retry: RetryPolicy | None = None) -> None:
+        """Awaitable `delete()`."""
+        if self._defer("delete"):
+            return
+        count_elements(1)
+        await self._afirst(partial(self._delete_query, g), retry)
+        self._forget()
+
+    def _defer_drop(self, property) -> bool:
+        # saving a property as None drops it, which a UnitOfWork can hold back.
+        session = current_session()
+        if session is None or not session.defers():
+            return False
+        setattr(self, property, None)
+        return self._defer("save")
+
+    @instrumented
+    def drop(self, g, property) -> BaseElement:
+        if self._defer_drop(property):
+            return self
+        query = self._source(g, self.id).properties(property).drop()
+        with round_trip(query):
+            value = next(query, None)
+        setattr(self, property, value)
+        # the drop already happened in the db, there's nothing left to save.
+        self._dirty.discard(property)
+        return self
+
+    @instrumented
+    async def adrop(self, g, property) -> BaseElement:
+        """Awaitable `drop()`."""
+        if self._defer_drop(property):
+            return self
+        query = self._source(g, self.id).properties(property).drop()
+        with round_trip(query):
+            value = await _anext(query)
+        setattr(self, property, value)
+        self._dirty.discard(property)
+        return self
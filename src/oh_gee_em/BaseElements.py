@@ -0,0 +1,700 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from contextvars import copy_context
+from functools import partial
+from itertools import islice
+from typing import Any
+from typing import ClassVar
+from uuid import UUID
+
+from gremlin_python.process.graph_traversal import GraphTraversal
+from gremlin_python.process.graph_traversal import GraphTraversalSource
+from gremlin_python.process.graph_traversal import __
+from gremlin_python.process.traversal import Cardinality
+from gremlin_python.process.traversal import Merge
+from gremlin_python.process.traversal import P
+from gremlin_python.process.traversal import T
+from pydantic import Field
+from pydantic import PrivateAttr
+from pydantic import RootModel
+
+from .BaseElement import BaseElement
+from .batching import AdaptiveBatcher
+from .batching import SplitChunkError
+from .exceptions import BulkOperationError
+from .exceptions import ChunkFailure
+from .instrumentation import count_elements
+from .instrumentation import instrumented
+from .instrumentation import phase
+from .instrumentation import round_trip
+from .retry import RetryPolicy
+from .session import current_session
+from .utilities import _anext
+from .utilities import _ato_list
+from .utilities import chunker
+
+
+logger = logging.getLogger(__name__)  # pragma: no cover
+
+
+def _send(run: Callable, g: GraphTraversalSource, element_chunk: tuple) -> list:
+    return [run(g, element_chunk)]
+
+
+async def _asend(run: Callable, g: GraphTraversalSource, element_chunk: tuple) -> list:
+    return [await run(g, element_chunk)]
+
+
+def _failure(
+    index: int,
+    element_chunk: tuple[BaseElement],
+    error: Exception,
+    on_result: Callable[[Any], None],
+) -> ChunkFailure:
+    if isinstance(error, SplitChunkError):
+        # the pieces of a split chunk that went through were written, handle them
+        # and only report the elements that weren't.
+        for result in error.results:
+            on_result(result)
+        element_chunk, error = error.chunk, error.error
+    return ChunkFailure(
+        chunk=index, ids=[element.id for element in element_chunk], error=error
+    )
+
+
+class BaseElements(RootModel):
+    """What BaseVertices and BaseEdges have in common, a bulk collection of elements."""
+
+    root: set[BaseElement] = Field(default_factory=set)
+    # the kind of element held, decides g.V()/g.E() and mergeV()/mergeE().
+    _element_type: ClassVar[type[BaseElement]] = BaseElement
+    _batch_size: int = 500
+    # "inject" sends a chunk as one parameter list and gets every element_map back
+    # in the same response, "chain" chains a merge per element then re-fetches.
+    _bulk_mode: str = "inject"
+    # how many chunks create()/save() keep in flight at once, 1 sends them in order.
+    _max_concurrency: int = 1
+    # ids a get_vertices()/get_edges() asked for that weren't in the db.
+    _missing_ids: list[str | int] = PrivateAttr(default_factory=list)
+    # id -> element, kept in insertion order so iteration/chunking is stable and
+    # reconciling db results is a dict lookup instead of a scan of root.
+    _index: dict[str, BaseElement] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context) -> None:
+        self._index = {str(element.id): element for element in self.root}
+
+    def __iter__(self):
+        return iter(self._index.values())
+
+    def __getitem__(self, id: str | int | UUID) -> BaseElement:
+        """Get an element in this collection by its id."""
+        return self._index[str(id)]
+
+    def __contains__(self, item: BaseElement | str | int | UUID) -> bool:
+        if isinstance(item, BaseElement):
+            item = item.id
+        return str(item) in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def missing_ids(self) -> list[str | int]:
+        """The ids get_vertices()/get_edges() asked for that weren't in the db."""
+        return list(self._missing_ids)
+
+    def get(self, id: str | int | UUID, default: BaseElement | None = None):
+        """Get an element in this collection by its id, or default if it isn't here."""
+        return self._index.get(str(id), default)
+
+    def add(self, element: BaseElement) -> BaseElements:
+        """Add an element to this collection, replacing any element with the same id."""
+        stale_element = self._index.pop(str(element.id), None)
+        if stale_element is not None:
+            self.root.discard(stale_element)
+        self.root.add(element)
+        self._index[str(element.id)] = element
+        return self
+
+    def _reconcile(self, results: list[dict]) -> None:
+        """Update the elements in this collection with the element_map's the db returned.
+
+        Args:
+            results (list[dict]): element_map results, one per element.
+        """
+        with phase("hydrate"):
+            for item in results:
+                stale_element = self._index.get(str(item.get(T.id)))
+                if stale_element is not None:
+                    stale_element._load(item)
+
+    def _fetch_chunk(
+        self, g: GraphTraversalSource, element_chunk: tuple[BaseElement]
+    ) -> list[dict]:
+        """this is a shim to handle fetching the records that were merge updated.
+        Grabs the element_map's for a given chunk so they can be reconciled into the
+        records in the chunk with their latest info based on db results.
+
+        Args:
+            g (GraphTraversalSource): Source this running on/against
+            element_chunk (tuple[BaseElement]): Chunk of elements this is running on.
+
+        Returns:
+            list[dict]: the element_map of each element in the chunk.
+        """
+        query = self._fetch_query(g, element_chunk)
+        with round_trip(query):
+            return query.to_list()
+
+    def _fetch_query(
+        self, g: GraphTraversalSource, element_chunk: tuple[BaseElement]
+    ) -> GraphTraversal:
+        element_ids = [element.id for element in element_chunk]
+        return self._element_type._source(g, element_ids).element_map()
+
+    def _bulk_merge_query(
+        self,
+        query: GraphTraversalSource,
+        element: BaseElement,
+        option: Merge,
+        add_label: bool | None = True,
+        **kwargs,
+    ) -> GraphTraversalSource:
+        """Build a merge query for batching multiple merges in one trip/transaction.
+
+        Args:
+            query (GraphTraversalSource): the source this query runs on/against
+            element (BaseElement): the BaseElement to use when configuring this merge
+            option (Merge): the merge option usually on_create or on_match.
+            add_label (bool, optional): Include the label in the dump?
+                on_match will scream if it gets a label but you generally want a label.
+                Defaults to True.
+            **kwargs (dict, optional): these opts are passed through to `dump_props()` which calls `model_dump()` under the hood
+
+        Returns:
+            GraphTraversalSource: with an additional mergeV()/mergeE() added to it.
+        """
+        return self._element_type._merge(query, element._merge_map()).option(
+            option, element.dump_props(exclude_none=True, add_label=add_label, **kwargs)
+        )
+
+    def _create_traversal(
+        self, g: GraphTraversalSource, element_chunk: tuple[BaseElement]
+    ) -> GraphTraversal:
+        """Build the traversal that creates a chunk of elements.
+
+        In "inject" mode the chunk is sent as one injected list of merge maps, so the
+        bytecode is the same size for any chunk and every merged element_map comes
+        back in the same response. "chain" mode chains a mergeV()/mergeE() per element.
+
+        Args:
+            g (GraphTraversalSource): Source this running on/against
+            element_chunk (tuple[BaseElement]): Chunk of elements to create.
+
+        Returns:
+            GraphTraversal: the unexecuted traversal, see `_write_chunk()`.
+        """
+        if self._bulk_mode == "chain":
+            # use a loop to build the bulk insert
+            query = g
+            for element in element_chunk:
+                query = self._element_type._merge(query, element._merge_map()).option(
+                    Merge.on_create, element._create_props()
+                )
+            return query
+
+        rows = [
+            {
+                "match": element._merge_map(),
+                "create": element._create_props(),
+            }
+            for element in element_chunk
+        ]
+        return (
+            self._element_type._merge(g.inject(rows).unfold(), __.select("match"))
+            .option(Merge.on_create, __.select("create"))
+            .element_map()
+        )
+
+    def _save_traversal(
+        self, g: GraphTraversalSource, element_chunk: tuple[BaseElement]
+    ) -> GraphTraversal:
+        """Build the traversal that saves the dirty fields of a chunk of elements.
+
+        Args:
+            g (GraphTraversalSource): Source this running on/against
+            element_chunk (tuple[BaseElement]): Chunk of dirty elements to save.
+
+        Returns:
+            GraphTraversal: the unexecuted traversal, see `_write_chunk()`.
+        """
+        if self._bulk_mode == "chain":
+            # use a loop to build the bulk insert
+            query = g
+            for element in element_chunk:
+                dirty_fields = element.dirty_fields
+                query = self._bulk_merge_query(
+                    query=query,
+                    element=element,
+                    option=Merge.on_match,
+                    add_label=False,
+                    include=set(dirty_fields),
+                )
+
+                # can't set None in mergeV so check and do it manually here...
+                for key in dirty_fields:
+                    if getattr(element, key) is None:
+                        query.property(Cardinality.single, key, None)
+            return query
+
+        rows = []
+        for element in element_chunk:
+            # read-only use of the dirty set, no need to copy it per element.
+            dirty_fields = element._dirty
+            nullable = element._serialization_plan().nullable
+            rows.append(
+                {
+                    "match": element._merge_map(),
+                    "update": element.dump_props(
+                        add_label=False, exclude_none=True, include=dirty_fields
+                    ),
+                    # only a field that can hold None can need dropping.
+                    "drop": [
+                        key
+                        for key in nullable.intersection(dirty_fields)
+                        if getattr(element, key) is None
+                    ],
+                }
+            )
+        query = self._element_type._merge(
+            g.inject(rows).unfold().as_("row"), __.select("match")
+        ).option(Merge.on_match, __.select("update"))
+        if any(row["drop"] for row in rows):
+            # can't set None in mergeV so drop those properties off the merged element.
+            query = query.side_effect(
+                __.properties()
+                .where(
+                    __.key()
+                    .as_("key")
+                    .select("row")
+                    .select("drop")
+                    .unfold()
+                    .where(P.eq("key"))
+                )
+                .drop()
+            )
+        return query.element_map()
+
+    def _write_chunk(
+        self,
+        g: GraphTraversalSource,
+        element_chunk: tuple[BaseElement],
+        build: Callable[[GraphTraversalSource, tuple[BaseElement]], GraphTraversal],
+    ) -> list[dict]:
+        """Run a chunk's write traversal and return the element_map's the db returned.
+
+        Only talks to the db, reconciling is left to the caller so this is safe to
+        run from worker threads.
+
+        Args:
+            g (GraphTraversalSource): Source this running on/against
+            element_chunk (tuple[BaseElement]): Chunk of elements the query writes.
+            build (Callable): `_create_traversal()` or `_save_traversal()`
+
+        Returns:
+            list[dict]: the element_map of each element in the chunk.
+        """
+        with phase("serialize"):
+            query = build(g, element_chunk)
+        if self._bulk_mode == "chain":
+            # ideally this is just an element_map().to_list() to get all the chunk created items back,
+            # the way the graph traversals work though, that call will only have one item when the traversal
+            # is collapsed. So just do an iterate() and re-fetch an fix the weirdness in _fetch_chunk.
+            with round_trip(query):
+                query.iterate()
+            return self._fetch_chunk(g, element_chunk)
+
+        with round_trip(query):
+            return query.to_list()
+
+    async def _awrite_chunk(
+        self,
+        g: GraphTraversalSource,
+        element_chunk: tuple[BaseElement],
+        build: Callable[[GraphTraversalSource, tuple[BaseElement]], GraphTraversal],
+    ) -> list[dict]:
+        """Awaitable `_write_chunk()`."""
+        with phase("serialize"):
+            query = build(g, element_chunk)
+        if self._bulk_mode == "chain":
+            with round_trip(query):
+                await _ato_list(query)
+            query = self._fetch_query(g, element_chunk)
+
+        with round_trip(query):
+            return await _ato_list(query)
+
+    def _delete_query(
+        self, g: GraphTraversalSource, element_chunk: tuple[BaseElement]
+    ) -> GraphTraversal:
+        element_ids = [element.id for element in element_chunk]
+        # count what was actually there to drop so callers know what was removed.
+        return self._element_type._source(g, element_ids).side_effect(__.drop()).count()
+
+    def _delete_chunk(
+        self, g: GraphTraversalSource, element_chunk: tuple[BaseElement]
+    ) -> int:
+        query = self._delete_query(g, element_chunk)
+        with round_trip(query):
+            return next(query, 0)
+
+    async def _adelete_chunk(
+        self, g: GraphTraversalSource, element_chunk: tuple[BaseElement]
+    ) -> int:
+        query = self._delete_query(g, element_chunk)
+        with round_trip(query):
+            return await _anext(query, 0)
+
+    def _chunks(
+        self, elements: Iterable[BaseElement], batcher: AdaptiveBatcher | None
+    ) -> Iterator[tuple[BaseElement]]:
+        if batcher is None:
+            chunks = chunker(elements, self._batch_size)
+        else:
+            chunks = batcher.chunks(elements, BaseElement._payload_bytes)
+        for element_chunk in chunks:
+            # counted as it's cut, a chunk the batcher splits or a retry re-sends
+            # is still the same elements.
+            count_elements(
+                len(element_chunk),
+                lambda: sum(map(BaseElement._payload_bytes, element_chunk)),
+            )
+            yield element_chunk
+
+    def _dispatch(
+        self,
+        g: GraphTraversalSource,
+        operation: str,
+        run: Callable[[GraphTraversalSource, tuple[BaseElement]], Any],
+        elements: Iterable[BaseElement],
+        on_result: Callable[[Any], None],
+        max_concurrency: int | None = None,
+        batcher: AdaptiveBatcher | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> None:
+        """Send elements to the db chunk by chunk and handle what the db gives back.
+
+        With a max_concurrency above 1 chunks are sent from a thread pool with at
+        most that many in flight. Results are always handled on the calling thread.
+        Every chunk is attempted, failures are collected and raised together once
+        the rest of the chunks are done.
+
+        Args:
+            g (GraphTraversalSource): Source this running on/against
+            operation (str): Name of the operation, used in errors.
+            run (Callable): Sends one chunk, e.g. `_write_chunk()`.
+            elements (Iterable[BaseElement]): The elements to send.
+            on_result (Callable): Called with what `run` returned for each chunk,
+                e.g. `_reconcile()`.
+            max_concurrency (int, optional): Chunks allowed in flight at once.
+                Defaults to `_max_concurrency`.
+            batcher (AdaptiveBatcher, optional): Sizes the chunks and splits ones
+                too big for the server, instead of a fixed `_batch_size`.
+            retry (RetryPolicy, optional): Re-sends a chunk that conflicted with a
+                concurrent write, on its own.
+
+        Raises:
+            BulkOperationError: when any chunk failed, after the rest finished.
+        """
+        if max_concurrency is None:
+            max_concurrency = self._max_concurrency
+        failures = []
+        chunks = enumerate(self._chunks(elements, batcher))
+        if retry is not None:
+            run = partial(retry.call, run)
+        if batcher is None:
+            send = partial(_send, run)
+        else:
+            # a chunk the batcher split comes back as a result per piece.
+            send = partial(batcher.run, run)
+
+        if max_concurrency <= 1:
+            for index, element_chunk in chunks:
+                try:
+                    results = send(g, element_chunk)
+                except Exception as error:
+                    failures.append(_failure(index, element_chunk, error, on_result))
+                    continue
+                for result in results:
+                    on_result(result)
+        else:
+            with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+                in_flight = {}
+                while True:
+                    # keep the pool full without building every chunk up front.
+                    for index, element_chunk in islice(
+                        chunks, max_concurrency - len(in_flight)
+                    ):
+                        # in the caller's context, so the chunk counts towards
+                        # the operation that's running.
+                        future = pool.submit(copy_context().run, send, g, element_chunk)
+                        in_flight[future] = (index, element_chunk)
+                    if not in_flight:
+                        break
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index, element_chunk = in_flight.pop(future)
+                        if future.exception() is not None:
+                            failures.append(
+                                _failure(
+                                    index, element_chunk, future.exception(), on_result
+                                )
+                            )
+                            continue
+                        for result in future.result():
+                            on_result(result)
+
+        if failures:
+            raise BulkOperationError(operation, failures)
+
+    async def _adispatch(
+        self,
+        g: GraphTraversalSource,
+        operation: str,
+        run: Callable[[GraphTraversalSource, tuple[BaseElement]], Awaitable],
+        elements: Iterable[BaseElement],
+        on_result: Callable[[Any], None],
+        max_concurrency: int | None = None,
+        batcher: AdaptiveBatcher | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> None:
+        """Awaitable `_dispatch()`, chunks in flight are tasks on the running loop.
+
+        Raises:
+            BulkOperationError: when any chunk failed, after the rest finished.
+        """
+        if max_concurrency is None:
+            max_concurrency = self._max_concurrency
+        failures = []
+        chunks = enumerate(self._chunks(elements, batcher))
+        if retry is not None:
+            run = partial(retry.acall, run)
+        if batcher is None:
+            send = partial(_asend, run)
+        else:
+            send = partial(batcher.arun, run)
+
+        in_flight = {}
+        while True:
+            for index, element_chunk in islice(
+                chunks, max(max_concurrency, 1) - len(in_flight)
+            ):
+                task = asyncio.ensure_future(send(g, element_chunk))
+                in_flight[task] = (index, element_chunk)
+            if not in_flight:
+                break
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, element_chunk = in_flight.pop(task)
+                if task.exception() is not None:
+                    failures.append(
+                        _failure(index, element_chunk, task.exception(), on_result)
+                    )
+                    continue
+                for result in task.result():
+                    on_result(result)
+
+        if failures:
+            raise BulkOperationError(operation, failures)
+
+    @instrumented
+    def save(
+        self,
+        g,
+        max_concurrency: int | None = None,
+        batcher: AdaptiveBatcher | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> BaseElements:
+        """save the changed fields of every dirty element, load what the db returned."""
+        # only elements with local changes need to go to the db.
+        dirty_elements = [element for element in self if element.dirty_fields]
+        if self._defer("save", dirty_elements):
+            return self
+        self._dispatch(
+            g,
+            "save",
+            partial(self._write_chunk, build=self._save_traversal),
+            dirty_elements,
+            self._reconcile,
+            max_concurrency,
+            batcher,
+            retry,
+        )
+        return self
+
+    @instrumented
+    def create(
+        self,
+        g,
+        max_concurrency: int | None = None,
+        batcher: AdaptiveBatcher | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> BaseElements:
+        """create this class in the db if it doesn't exist."""
+        if self._defer("create", self):
+            return self
+        self._dispatch(
+            g,
+            "create",
+            partial(self._write_chunk, build=self._create_traversal),
+            self,
+            self._reconcile,
+            max_concurrency,
+            batcher,
+            retry,
+        )
+        return self
+
+    @instrumented
+    def delete(
+        self,
+        g,
+        max_concurrency: int | None = None,
+        batcher: AdaptiveBatcher | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> int:
+        """delete every element in this collection from the db, `_batch_size` at a time.
+
+        Args:
+            g (GraphTraversalSource): Source this running on/against
+            max_concurrency (int, optional): Chunks allowed in flight at once.
+                Defaults to `_max_concurrency`.
+            batcher (AdaptiveBatcher, optional): Pick chunk sizes adaptively instead
+                of `_batch_size`, see AdaptiveBatcher.
+            retry (RetryPolicy, optional): Re-send chunks that conflict with a
+                concurrent write, see RetryPolicy.
+
+        Returns:
+            int: how many elements were removed from the db, 0 when a UnitOfWork
+                deletes them later.
+        """
+        if self._defer("delete", self):
+            return 0
+        removed = []
+        try:
+            self._dispatch(
+                g,
+                "delete",
+                self._delete_chunk,
+                self,
+                removed.append,
+                max_concurrency,
+                batcher,
+                retry,
+            )
+        finally:
+            # forgetting one that a failed chunk didn't delete only costs a reload.
+            self._forget()
+        return sum(removed)
+
+    @instrumented
+    async def asave(
+        self,
+        g,
+        max_concurrency: int | None = None,
+        batcher: AdaptiveBatcher | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> BaseElements:
+        """Awaitable `save()`."""
+        dirty_elements = [element for element in self if element.dirty_fields]
+        if self._defer("save", dirty_elements):
+            return self
+        await self._adispatch(
+            g,
+            "save",
+            partial(self._awrite_chunk, build=self._save_traversal),
+            dirty_elements,
+            self._reconcile,
+            max_concurrency,
+            batcher,
+            retry,
+        )
+        return self
+
+    @instrumented
+    async def acreate(
+        self,
+        g,
+        max_concurrency: int | None = None,
+        batcher: AdaptiveBatcher | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> BaseElements:
+        """Awaitable `create()`."""
+        if self._defer("create", self):
+            return self
+        await self._adispatch(
+            g,
+            "create",
+            partial(self._awrite_chunk, build=self._create_traversal),
+            self,
+            self._reconcile,
+            max_concurrency,
+            batcher,
+            retry,
+        )
+        return self
+
+    @instrumented
+    async def adelete(
+        self,
+        g,
+        max_concurrency: int | None = None,
+        batcher: AdaptiveBatcher | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> int:
+        """Awaitable `delete()`."""
+        if self._defer("delete", self):
+            return 0
+        removed = []
+        try:
+            await self._adispatch(
+                g,
+                "delete",
+                self._adelete_chunk,
+                self,
+                removed.append,
+                max_concurrency,
+                batcher,
+                retry,
+            )
+        finally:
+            self._forget()
+        return sum(removed)
+
+    @staticmethod
+    def _defer(operation: str, elements: Iterable[BaseElement]) -> bool:
+        """Leave the writes to the UnitOfWork entered, if there is one."""
+        session = current_session()
+        if session is None:
+            return False
+        elements = list(elements)
+        # an empty collection has nothing to write either way.
+        return not elements or all(
+            session.defer(operation, element) for element in elements
+        )
+
+    def _forget(self) -> None:
+        """Take every element in this collection out of the current session."""
+        for element in self:
+            element._forget()
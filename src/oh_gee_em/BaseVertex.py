@@ -1,99 +1,216 @@
 from __future__ import annotations
 
 import logging
-from uuid import UUID
-from uuid import uuid4
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
 
+from gremlin_python.process.graph_traversal import GraphTraversal
+from gremlin_python.process.graph_traversal import GraphTraversalSource
 from gremlin_python.process.traversal import Merge
 from gremlin_python.process.traversal import T
-from pydantic import BaseModel
-from pydantic import Field
-from pydantic import computed_field
-from pydantic.functional_validators import AfterValidator
-from pydantic.functional_validators import Annotated
+from pydantic import ConfigDict
+from pydantic import PrivateAttr
 
-from .utilities import _ftv
-from .utilities import enum_uuid_to_str
+from .BaseElement import BaseElement
+from .instrumentation import count_elements
+from .instrumentation import instrumented
+from .instrumentation import round_trip
+from .relationships import Relationship
+from .session import current_session
+from .utilities import _anext
+from .utilities import _ato_list
 
 
-logger = logging.getLogger(__name__)  # pragma: no cover
-
+if TYPE_CHECKING:
+    from .BaseVertices import BaseVertices
 
-class BaseVertex(BaseModel):
-    id: Annotated[str | int | T | UUID, AfterValidator(enum_uuid_to_str)] = Field(
-        default=uuid4(),
-    )
 
-    def __hash__(self):
-        return hash(self.id)
+logger = logging.getLogger(__name__)  # pragma: no cover
 
-    def tinker_id(self):
-        if self.id:
-            return {T.id: self.id}
-        return {}
 
-    def tinker_id_label(self):
-        if self.id:
-            return {T.id: self.id, T.label: self.label}
-        return {}
+class BaseVertex(BaseElement):
+    # relationships are declared as plain class attributes, not fields.
+    model_config = ConfigDict(ignored_types=(Relationship,))
 
-    def dump_props(self, add_label=True, exclude=("id", "label"), **kwargs):
-        if add_label:
-            return {T.label: self.label, **self.model_dump(exclude=exclude, **kwargs)}
-        return self.model_dump(exclude=exclude, **kwargs)
+    # relationship name -> the neighbors last loaded for it.
+    _related: dict[str, BaseVertices] | None = PrivateAttr(default=None)
 
-    def project(self):
-        projection_dict = {}
-        projection_dict["id"] = self.id
-        projection_dict["label"] = self.label
+    @classmethod
+    def _source(cls, g: GraphTraversalSource, *ids) -> GraphTraversal:
+        return g.V(*ids)
 
-        return {**projection_dict, **self.model_dump(exclude=["id", "label"])}
+    @classmethod
+    def _merge(cls, query, merge_map: dict) -> GraphTraversal:
+        return query.merge_v(merge_map)
 
-    @computed_field
-    @property
-    def label(self) -> str:
-        return self.__class__.__name__.lower()
+    @classmethod
+    def _collection(cls) -> type[BaseVertices]:
+        from .BaseVertices import BaseVertices
 
-    @label.setter
-    def label(self, value: str) -> None:
-        pass
+        return BaseVertices
 
     @classmethod
-    def get_vertex(cls, g, id: str | int) -> BaseVertex:
+    @instrumented
+    def get_vertex(
+        cls, g, id: str | int, fields: Iterable[str] | None = None
+    ) -> BaseVertex:
         """Get a vertex from the database from the given "id".
 
         Args:
             g (GraphTraversalSource): The GraphTraversalSource used to get the vertex.
             id (str | int): The T.id or id of the vertex in the graph.
+            fields (Iterable[str], optional): Only load these properties, the
+                rest are fetched when one of them is first accessed. Until then
+                `model_dump()`/`model_dump_json()` of the vertex raise rather than
+                give a partial row, and its repr shows them as <unloaded>.
 
         Returns:
-            BaseVertex: A created instance of the class that called this method.
+            BaseVertex: A created instance of the class that called this method, inside
+                a Session the instance already loaded for id if there is one.
         """
-        vertex = next(g.V(id).element_map(), None)
-        if vertex is None:
-            return None
+        return cls._get_one(g, id, fields)
+
+    @classmethod
+    @instrumented
+    async def aget_vertex(
+        cls, g, id: str | int, fields: Iterable[str] | None = None
+    ) -> BaseVertex:
+        """Awaitable `get_vertex()`."""
+        return await cls._aget_one(g, id, fields)
+
+    @classmethod
+    @instrumented
+    def get_vertices(
+        cls,
+        g,
+        ids: Iterable[str | int],
+        batch_size: int = 500,
+        collection=None,
+        fields: Iterable[str] | None = None,
+    ) -> BaseVertices:
+        """Get the vertices at the given ids, batch_size ids per round trip.
 
-        vertex = _ftv(vertex)
-        return cls(**vertex)
+        Args:
+            g (GraphTraversalSource): The GraphTraversalSource used to get the vertices.
+            ids (Iterable[str | int]): The T.id's of the vertices in the graph.
+            batch_size (int, optional): ids fetched per round trip. Defaults to 500.
+            collection (type[BaseVertices], optional): The collection class to return,
+                e.g. People. Defaults to BaseVertices.
+            fields (Iterable[str], optional): Only load these properties, the
+                rest are fetched for the whole batch when one of them is first
+                accessed.
+
+        Returns:
+            BaseVertices: the vertices found in the order the ids were given,
+                `missing_ids` lists the ids that weren't in the db.
+        """
+        if collection is None:
+            from .BaseVertices import BaseVertices as collection
+        return cls._get_many(g, ids, batch_size, collection, fields)
 
     @classmethod
+    @instrumented
+    async def aget_vertices(
+        cls,
+        g,
+        ids: Iterable[str | int],
+        batch_size: int = 500,
+        collection=None,
+        fields: Iterable[str] | None = None,
+    ) -> BaseVertices:
+        """Awaitable `get_vertices()`."""
+        if collection is None:
+            from .BaseVertices import BaseVertices as collection
+        return await cls._aget_many(g, ids, batch_size, collection, fields)
+
+    @classmethod
+    def _relationship(cls, name: str) -> Relationship:
+        relationship = getattr(cls, name, None)
+        if not isinstance(relationship, Relationship):
+            raise ValueError(f"{cls.__name__} has no relationship {name!r}")
+        return relationship
+
+    def related(
+        self, g, name: str, fields: Iterable[str] | None = None
+    ) -> BaseVertices:
+        """Load this vertex's neighbors for a relationship, see `Relationship`.
+
+        To load them for many vertices use the collection's `load_related()`.
+
+        Args:
+            g (GraphTraversalSource): The GraphTraversalSource to read from.
+            name (str): The name of the relationship attribute, e.g. "friends".
+            fields (Iterable[str], optional): Only load these properties of the
+                neighbors, the rest are fetched when one of them is first accessed.
+
+        Returns:
+            BaseVertices: the neighbors, also what reading the relationship
+                attribute returns from now on.
+        """
+        relationship = self._relationship(name)
+        relationship.load(g, [self], fields=fields)
+        return relationship.__get__(self)
+
+    async def arelated(
+        self, g, name: str, fields: Iterable[str] | None = None
+    ) -> BaseVertices:
+        """Awaitable `related()`.
+
+        Concurrent calls for the same relationship are sent as one traversal.
+        """
+        return await self._relationship(name).acoalesced(g, self, fields)
+
+    @classmethod
+    def _create_vertex_query(cls, g, id: str | int, props: dict) -> GraphTraversal:
+        if not id:
+            # mergeV({}) would match every vertex there is, let the db pick the id.
+            query = g.add_v()
+            for key, value in props.items():
+                query = query.property(key, value)
+            return query.element_map()
+
+        return g.merge_v({T.id: id}).option(Merge.on_create, props).element_map()
+
+    @classmethod
+    def _deferred_create(cls, id, kwargs: dict) -> BaseVertex | None:
+        """The vertex create_vertex() left to a UnitOfWork, None outside of one."""
+        session = current_session()
+        if session is None or not session.defers():
+            return None
+        # without an id the vertex gets the model's default one, not the db's.
+        vertex = cls(**kwargs) if id is None else cls(id=id, **kwargs)
+        vertex._defer("create")
+        return vertex
+
+    @classmethod
+    @instrumented
     def create_vertex(cls, g, *args, id: str | int = None, **kwargs) -> BaseVertex:
         """Create the vertex at id based on this class."""
-        id_map = {}
-        if id:
-            id_map = {T.id: id}
-
-        vertex = next(
-            g.merge_v(id_map).option(Merge.on_create, kwargs).element_map(), None
-        )
-        if not vertex:
-            # raise here instead? creation had to have failed.
-            return None
+        deferred = cls._deferred_create(id, kwargs)
+        if deferred is not None:
+            return deferred
+        query = cls._create_vertex_query(g, id, kwargs)
+        with round_trip(query):
+            vertex = next(query, None)
+        # None when nothing came back, raise here instead? creation had to have failed.
+        return cls._from_element_map(vertex)
 
-        vertex = _ftv(vertex)
-        return cls(**vertex)
+    @classmethod
+    @instrumented
+    async def acreate_vertex(
+        cls, g, *args, id: str | int = None, **kwargs
+    ) -> BaseVertex:
+        """Awaitable `create_vertex()`."""
+        deferred = cls._deferred_create(id, kwargs)
+        if deferred is not None:
+            return deferred
+        query = cls._create_vertex_query(g, id, kwargs)
+        with round_trip(query):
+            vertex = await _anext(query)
+        return cls._from_element_map(vertex)
 
     @classmethod
+    @instrumented
     def get_or_create_vertex(
         cls, g, *args, id: str | int = None, **kwargs
     ) -> BaseVertex:
@@ -101,58 +218,33 @@ class BaseVertex(BaseModel):
         return cls.create_vertex(g, *args, id=id, **kwargs)
 
     @classmethod
+    @instrumented
+    async def aget_or_create_vertex(
+        cls, g, *args, id: str | int = None, **kwargs
+    ) -> BaseVertex:
+        """Awaitable `get_or_create_vertex()`."""
+        return await cls.acreate_vertex(g, *args, id=id, **kwargs)
+
+    @classmethod
+    @instrumented
     def delete_vertex(cls, g, BaseVertex) -> None:
         """pass a BaseVertex to this classmethod to delete it from the db."""
-        g.V(BaseVertex.id).drop().iterate()
-
-    def update(self, **update_fields) -> BaseVertex:
-        """updates this class"""
-        for field, value in update_fields.items():
-            setattr(self, field, value)
-        return self
-
-    def save(self, g) -> BaseVertex:
-        """save mutations to current class to db, load what db returned."""
-        # on_match doesn't like T.label, skip passing in this context since some graph
-        # providers don't let you update label without re-creating the vertex.
-        vertex = next(
-            g.merge_v(self.tinker_id())
-            .option(Merge.on_match, self.dump_props(add_label=False, exclude_none=True))
-            .element_map(),
-            None,
-        )
-        if not vertex:
-            return None
-
-        # remove the enum keys cause they break python classes
-        vertex = _ftv(vertex)
-
-        # multiple people could change these values at the same time,
-        # so update the model with what source of truth gave back.
-        self.update(**vertex)
-
-        return self
-
-    def create(self, g) -> BaseVertex:
-        """create this class in the db if it doesn't exist."""
-        vertex = next(
-            g.merge_v(self.tinker_id())
-            .option(Merge.on_create, self.dump_props(exclude_none=True))
-            .element_map(),
-            None,
-        )
-        if not vertex:
-            # raise here instead? creation had to have failed.
-            return None
+        if BaseVertex._defer("delete"):
+            return
+        query = g.V(BaseVertex.id).drop()
+        with round_trip(query):
+            query.iterate()
+        count_elements(1)
+        BaseVertex._forget()
 
-        vertex = _ftv(vertex)
-        self.update(**vertex)
-        return self
-
-    def delete(self, g) -> None:
-        """delete this class from the db."""
-        g.V(self.id).drop().iterate()
-
-    def drop(self, g, property) -> BaseVertex:
-        setattr(self, property, next(g.V(self.id).properties(property).drop(), None))
-        return self
+    @classmethod
+    @instrumented
+    async def adelete_vertex(cls, g, BaseVertex) -> None:
+        """Awaitable `delete_vertex()`."""
+        if BaseVertex._defer("delete"):
+            return
+        query = g.V(BaseVertex.id).drop()
+        with round_trip(query):
+            await _ato_list(query)
+        count_elements(1)
+        BaseVertex._forget()
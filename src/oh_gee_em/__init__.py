@@ -2,12 +2,44 @@
 # from .localname import *
 # from .localname2 import SomeClass
 from .BaseEdge import BaseEdge
+from .BaseEdges import BaseEdges
 from .BaseVertex import BaseVertex
 from .BaseVertices import BaseVertices
+from .batching import AdaptiveBatcher
+from .bulk_load import BulkLoadWriter
+from .connection import ConnectionManager
+from .connection import ConnectionSettings
+from .exceptions import BulkOperationError
+from .exceptions import RelationshipNotLoadedError
+from .instrumentation import MetricsRecorder
+from .instrumentation import ProfileSampler
+from .memory import MemoryConnection
+from .memory import memory_traversal
+from .query import Query
+from .relationships import Relationship
+from .retry import RetryPolicy
+from .session import Session
+from .session import UnitOfWork
 
 
 __all__ = [
     BaseVertex,
     BaseVertices,
     BaseEdge,
+    BaseEdges,
+    BulkOperationError,
+    Session,
+    UnitOfWork,
+    AdaptiveBatcher,
+    BulkLoadWriter,
+    RetryPolicy,
+    MemoryConnection,
+    memory_traversal,
+    MetricsRecorder,
+    ProfileSampler,
+    ConnectionManager,
+    ConnectionSettings,
+    Query,
+    Relationship,
+    RelationshipNotLoadedError,
 ]
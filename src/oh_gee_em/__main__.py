@@ -1,12 +1,233 @@
 """Command-line interface."""
+import json
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextlib import nullcontext
+from dataclasses import replace
+
 import click
+from gremlin_python.process.graph_traversal import GraphTraversalSource
+
+from .connection import ConnectionManager
+from .connection import ConnectionSettings
+from .exceptions import BulkOperationError
+from .transfer import FORMATS
+from .transfer import Checkpoint
+from .transfer import TransferProgress
+from .transfer import export_elements
+from .transfer import export_split
+from .transfer import format_of
+from .transfer import import_rows
+from .transfer import load_model
+from .transfer import read_rows
+
+
+@contextmanager
+def _connect(url: str | None) -> Iterator[GraphTraversalSource]:
+    """A g for the OH_GEE_EM_* settings, url in place of OH_GEE_EM_URL if given."""
+    settings = ConnectionSettings.from_env()
+    if url:
+        settings = replace(settings, url=url)
+    with ConnectionManager(settings) as manager:
+        yield manager.g
+
+
+def _reporter(every: float):
+    """Echo progress to stderr at most once per every seconds."""
+    last = 0.0
+
+    def report(progress: TransferProgress) -> None:
+        nonlocal last
+        now = time.monotonic()
+        if now - last >= every:
+            last = now
+            click.echo(str(progress), err=True)
+
+    return report
+
+
+def _as_id(g: GraphTraversalSource, model, value: str | None):
+    """value from the command line as the type model's ids have in the graph."""
+    if value is None:
+        return None
+    sample = next(model._label_query(g).id_().limit(1), None)
+    if sample is None or isinstance(sample, str):
+        return value
+    try:
+        # e.g. int on a tinkergraph generating ids, UUID where the ids are UUIDs.
+        return type(sample)(value)
+    except ValueError:
+        raise click.BadParameter(
+            f"{value!r} isn't a {type(sample).__name__} like the graph's ids",
+            param_hint="'--after'",
+        ) from None
 
 
-@click.command()  # pragma: no cover
+def _model(context, parameter, path: str):
+    try:
+        return load_model(path)
+    except ValueError as error:
+        raise click.BadParameter(str(error)) from None
+
+
+@click.group()  # pragma: no cover
 @click.version_option()  # pragma: no cover
 def main() -> None:
     """Oh_Gee_Em."""
 
 
+@main.command("import")
+@click.argument("model", callback=_model)
+@click.argument("source", type=click.File("r", encoding="utf-8"), default="-")
+@click.option(
+    "--format",
+    "format_",
+    type=click.Choice(FORMATS),
+    help="Input format, from SOURCE's extension by default (jsonl for stdin).",
+)
+@click.option("--batch-size", default=500, show_default=True, help="Rows per request.")
+@click.option(
+    "--concurrency", default=1, show_default=True, help="Requests in flight at once."
+)
+@click.option("--skip", default=0, help="Rows to skip at the start of SOURCE.")
+@click.option(
+    "--checkpoint",
+    type=click.Path(dir_okay=False),
+    help="File recording the rows done, a rerun resumes after them.",
+)
+@click.option(
+    "--rejects",
+    type=click.File("a", encoding="utf-8"),
+    help="Append rows that don't validate here as JSONL.",
+)
+@click.option("--url", help="Gremlin server url, overrides OH_GEE_EM_URL.")
+@click.option(
+    "--report-every", default=1.0, show_default=True, help="Seconds between reports."
+)
+def import_(
+    model,
+    source,
+    format_,
+    batch_size,
+    concurrency,
+    skip,
+    checkpoint,
+    rejects,
+    url,
+    report_every,
+) -> None:
+    """Create a MODEL (package.module:Class) for each row of a CSV/JSONL SOURCE.
+
+    Rows are streamed, validated and created a batch at a time, so memory doesn't
+    grow with SOURCE. Rows that don't validate are counted and skipped.
+    """
+    format_ = format_ or format_of(source.name)
+
+    def reject(number: int, row: dict, error) -> None:
+        if rejects is not None:
+            record = {"row": number, "error": str(error), "data": row}
+            rejects.write(json.dumps(record, default=str) + "\n")
+
+    report = _reporter(report_every)
+    with _connect(url) as g:
+        try:
+            progress = import_rows(
+                g,
+                model,
+                read_rows(source, format_),
+                batch_size=batch_size,
+                max_concurrency=concurrency,
+                skip=skip,
+                checkpoint=None if checkpoint is None else Checkpoint(checkpoint),
+                on_error=reject,
+                on_progress=report,
+            )
+        except BulkOperationError as error:
+            raise click.ClickException(str(error)) from None
+    click.echo(str(progress), err=True)
+
+
+@main.command("export")
+@click.argument("model", callback=_model)
+@click.argument("output", type=click.Path(dir_okay=False, allow_dash=True), default="-")
+@click.option(
+    "--format",
+    "format_",
+    type=click.Choice(FORMATS),
+    help="Output format, from OUTPUT's extension by default (jsonl for stdout).",
+)
+@click.option(
+    "--page-size", default=1000, show_default=True, help="Elements per request."
+)
+@click.option(
+    "--after",
+    help="Only export elements with an id after this one, converted to the type "
+    "of the graph's ids (e.g. int).",
+)
+@click.option(
+    "--workers",
+    default=1,
+    show_default=True,
+    help="Split the ids between workers, each writing OUTPUT.<n>.<extension>.",
+)
+@click.option(
+    "--checkpoint",
+    type=click.Path(dir_okay=False),
+    help="File recording how far the export got, a rerun resumes from there.",
+)
+@click.option("--url", help="Gremlin server url, overrides OH_GEE_EM_URL.")
+@click.option(
+    "--report-every", default=1.0, show_default=True, help="Seconds between reports."
+)
+def export(
+    model, output, format_, page_size, after, workers, checkpoint, url, report_every
+) -> None:
+    """Write every MODEL (package.module:Class) in the graph to a CSV/JSONL OUTPUT.
+
+    Elements are read a page at a time in id order and written as they come, so
+    memory doesn't grow with the label.
+    """
+    format_ = format_ or format_of(output)
+    if output == "-" and (workers > 1 or checkpoint):
+        raise click.UsageError("--workers and --checkpoint need an OUTPUT file")
+    checkpoint = None if checkpoint is None else Checkpoint(checkpoint)
+    report = _reporter(report_every)
+    with _connect(url) as g:
+        after = _as_id(g, model, after)
+        if workers > 1:
+            paths = export_split(
+                g,
+                model,
+                output,
+                workers,
+                format_,
+                page_size,
+                after,
+                checkpoint=checkpoint,
+                on_progress=report,
+            )
+            click.echo("\n".join(paths))
+            return
+        if output == "-":
+            opened = nullcontext(click.get_text_stream("stdout"))
+        else:
+            resume = checkpoint is not None and checkpoint.load()
+            mode = "r+" if resume else "w"
+            opened = open(output, mode, encoding="utf-8", newline="")
+        with opened as stream:
+            progress = export_elements(
+                g,
+                model,
+                stream,
+                format_,
+                page_size,
+                after,
+                checkpoint=checkpoint,
+                on_progress=report,
+            )
+    click.echo(str(progress), err=True)
+
+
 if __name__ == "__main__":
     main(prog_name="oh_gee_em")  # pragma: no cover
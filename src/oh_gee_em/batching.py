@@ -0,0 +1,243 @@
+"""adaptive chunk sizing for the bulk create()/save()/delete() of a collection."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from typing import Any
+
+
+logger = logging.getLogger(__name__)  # pragma: no cover
+
+# lowercased bits of the messages servers/drivers give when a request was too big
+# to take or took too long to run, both of which a smaller chunk can get around.
+SPLITTABLE_MARKERS = (
+    "max frame length",
+    "maxcontentlength",
+    "content length",
+    "too large",
+    "timeout",
+    "timed out",
+    "timelimitexceeded",
+    "evaluation exceeded",
+)
+# GremlinServerError status codes for the same, 598 is SERVER_TIMEOUT.
+SPLITTABLE_STATUS_CODES = frozenset({413, 598})
+
+
+def is_splittable(error: Exception) -> bool:
+    """Would sending the same elements in smaller chunks get around this error?"""
+    # asyncio's TimeoutError is only the builtin one from python 3.11 on.
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return True
+    if getattr(error, "status_code", None) in SPLITTABLE_STATUS_CODES:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in SPLITTABLE_MARKERS)
+
+
+class SplitChunkError(Exception):
+    """Raised when pieces of a chunk the batcher split still failed.
+
+    Args:
+        results (list): What run returned for the pieces that went through, they
+            were written and need handling like any other result.
+        chunk (tuple): The elements of the pieces that failed.
+        error (Exception): The first error a failed piece raised.
+    """
+
+    def __init__(self, results: list, chunk: tuple, error: Exception):
+        super().__init__(f"{len(chunk)} element(s) of a split chunk failed: {error!r}")
+        self.results = results
+        self.chunk = chunk
+        self.error = error
+
+
+class _Split:
+    """What the pieces of a split chunk came back with."""
+
+    def __init__(self):
+        self._results: list = []
+        self._failed: list = []
+        self._error: Exception | None = None
+
+    def done(self, results: list) -> None:
+        self._results.extend(results)
+
+    def failed(self, piece: tuple, error: Exception) -> None:
+        if isinstance(error, SplitChunkError):
+            self._results.extend(error.results)
+            piece, error = error.chunk, error.error
+        self._failed.extend(piece)
+        self._error = self._error or error
+
+    def results(self) -> list:
+        if self._failed:
+            raise SplitChunkError(self._results, tuple(self._failed), self._error)
+        return self._results
+
+
+class AdaptiveBatcher:
+    """Picks chunk sizes for bulk writes from payload size and observed latency.
+
+    Chunks are cut at `size` elements or `max_bytes` of estimated payload, whichever
+    comes first. After every chunk `size` is scaled towards what would take
+    `target_latency` seconds, at most halving/doubling per chunk. A chunk that
+    fails with a size or timeout error (see `is_splittable()`) is cut in half and
+    both halves are retried, and `size` is capped below the failed chunk from then
+    on, so the batcher settles on a size the server can sustain.
+
+    One batcher can be passed to many calls, what it learned carries over.
+
+    Args:
+        size (int, optional): The chunk size to start from. Defaults to 500.
+        min_size (int, optional): Never go below this. Defaults to 1.
+        max_size (int, optional): Never go above this. Defaults to 5000.
+        max_bytes (int, optional): Estimated payload bytes allowed in one chunk.
+            Defaults to 1_000_000.
+        target_latency (float, optional): Seconds one chunk should take.
+            Defaults to 1.0.
+
+    Example:
+        >>> batcher = AdaptiveBatcher(max_bytes=64_000)  # doctest: +SKIP
+        >>> people.create(g, batcher=batcher)  # doctest: +SKIP
+        >>> batcher.report()  # doctest: +SKIP
+        {'chunks': 12, 'splits': 1, 'size': 420, 'min': 250, 'max': 500, ...}
+    """
+
+    def __init__(
+        self,
+        size: int = 500,
+        min_size: int = 1,
+        max_size: int = 5000,
+        max_bytes: int = 1_000_000,
+        target_latency: float = 1.0,
+    ):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.target_latency = target_latency
+        self.size = max(min_size, min(size, max_size))
+        # the sizes of the chunks that went through, in the order they finished.
+        self.sizes: list[int] = []
+        self.splits = 0
+        self._lock = threading.Lock()
+
+    def chunks(
+        self, elements: Iterable, estimate: Callable[[Any], int]
+    ) -> Iterator[tuple]:
+        """Cut elements into chunks, `size` is read as each chunk is cut.
+
+        Args:
+            elements (Iterable): The elements to chunk.
+            estimate (Callable): element -> its estimated payload bytes.
+
+        Yields:
+            tuple: the next chunk of elements.
+        """
+        chunk, chunk_bytes = [], 0
+        for element in elements:
+            element_bytes = estimate(element)
+            if chunk and (
+                len(chunk) >= self.size or chunk_bytes + element_bytes > self.max_bytes
+            ):
+                yield tuple(chunk)
+                chunk, chunk_bytes = [], 0
+            chunk.append(element)
+            chunk_bytes += element_bytes
+        if chunk:
+            yield tuple(chunk)
+
+    def record(self, chunk_size: int, seconds: float) -> None:
+        """Learn from a chunk of chunk_size that went through in seconds."""
+        with self._lock:
+            self.sizes.append(chunk_size)
+            # per element cost, so short chunks (the tail, or ones max_bytes cut)
+            # say as much about the right size as full ones.
+            per_element = max(seconds, 1e-6) / chunk_size
+            size = self.target_latency / per_element
+            size = max(self.size / 2, min(size, self.size * 2))
+            self.size = max(self.min_size, min(int(size), self.max_size))
+
+    def shrink(self, chunk_size: int) -> None:
+        """Cap future chunks below a chunk_size the server couldn't take."""
+        with self._lock:
+            self.splits += 1
+            self.max_size = max(self.min_size, min(self.max_size, chunk_size // 2))
+            self.size = min(self.size, self.max_size)
+
+    def _split(self, chunk: tuple, error: Exception) -> tuple[tuple, tuple]:
+        if len(chunk) <= self.min_size or not is_splittable(error):
+            raise error
+        logger.debug("splitting a chunk of %s after %r", len(chunk), error)
+        self.shrink(len(chunk))
+        half = len(chunk) // 2
+        return chunk[:half], chunk[half:]
+
+    def run(self, run: Callable, g, chunk: tuple) -> list:
+        """Send a chunk with run(g, chunk), splitting and retrying when it's too big.
+
+        Every piece of a split chunk is sent even after one fails.
+
+        Returns:
+            list: what run returned for the chunk, or for each piece it was cut into.
+
+        Raises:
+            SplitChunkError: pieces of a split chunk failed, with the results of
+                the ones that didn't.
+            Exception: the error when it isn't a size/timeout one, or a single
+                element still fails.
+        """
+        start = time.perf_counter()
+        try:
+            result = run(g, chunk)
+        except Exception as error:
+            pieces = self._split(chunk, error)
+        else:
+            self.record(len(chunk), time.perf_counter() - start)
+            return [result]
+        split = _Split()
+        for piece in pieces:
+            try:
+                split.done(self.run(run, g, piece))
+            except Exception as error:
+                split.failed(piece, error)
+        return split.results()
+
+    async def arun(self, run: Callable[..., Awaitable], g, chunk: tuple) -> list:
+        """Awaitable `run()`."""
+        start = time.perf_counter()
+        try:
+            result = await run(g, chunk)
+        except Exception as error:
+            pieces = self._split(chunk, error)
+        else:
+            self.record(len(chunk), time.perf_counter() - start)
+            return [result]
+        split = _Split()
+        for piece in pieces:
+            try:
+                split.done(await self.arun(run, g, piece))
+            except Exception as error:
+                split.failed(piece, error)
+        return split.results()
+
+    def report(self) -> dict:
+        """The chunk sizes picked so far, for tuning the server or `_batch_size`."""
+        with self._lock:
+            sizes = list(self.sizes)
+        return {
+            "chunks": len(sizes),
+            "splits": self.splits,
+            "size": self.size,
+            "max_size": self.max_size,
+            "min": min(sizes, default=None),
+            "max": max(sizes, default=None),
+            "mean": sum(sizes) / len(sizes) if sizes else None,
+            "sizes": sizes,
+        }
@@ -0,0 +1,254 @@
+"""write elements as the Gremlin CSV files Neptune's bulk loader takes.
+
+For a first load of millions of elements the db's own loader is far quicker than
+any amount of mergeV()/mergeE() requests. `BulkLoadWriter` turns elements, or a
+stream of them, into the loader's CSV format on local disk, one set of files per
+class with the property types in the header taken from the model's fields::
+
+    ~id,~label,name:String(single),age:Long(single),tags:String[]
+    ~id,~from,~to,~label,since:Long
+
+The files are then uploaded (e.g. to S3) and loaded with the loader, the library
+takes over for the writes after that.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import logging
+import os
+from collections.abc import Iterable
+from datetime import date
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from types import UnionType
+from typing import TYPE_CHECKING
+from typing import Annotated
+from typing import Any
+from typing import Literal
+from typing import TextIO
+from typing import Union
+from typing import get_args
+from typing import get_origin
+from uuid import UUID
+
+from .BaseEdge import BaseEdge
+
+
+if TYPE_CHECKING:
+    from .BaseElement import BaseElement
+
+
+logger = logging.getLogger(__name__)  # pragma: no cover
+
+# python type -> the loader's type, bool before int since a bool is an int too.
+_TYPES: tuple[tuple[type, str], ...] = (
+    (bool, "Bool"),
+    (int, "Long"),
+    (float, "Double"),
+    (Decimal, "Double"),
+    (datetime, "Date"),
+    (date, "Date"),
+    (str, "String"),
+    (UUID, "String"),
+)
+_MULTIPLE = (list, set, frozenset, tuple)
+
+
+def _loader_type(annotation: Any) -> tuple[str, bool]:
+    """The loader type a field annotation is stored as and whether it's an array.
+
+    Optional's and Annotated are looked through, a Literal takes its values' type
+    and anything the loader has no type for (nested models, dicts, mixed unions)
+    is written as a JSON String.
+    """
+    origin = get_origin(annotation)
+    if origin is Annotated:
+        return _loader_type(get_args(annotation)[0])
+    if origin in (Union, UnionType):
+        types = {
+            _loader_type(arg) for arg in get_args(annotation) if arg is not type(None)
+        }
+        return types.pop() if len(types) == 1 else ("String", False)
+    if origin is Literal:
+        return _loader_type(Union[tuple(type(value) for value in get_args(annotation))])
+    if origin in _MULTIPLE or annotation in _MULTIPLE:
+        args = [arg for arg in get_args(annotation) if arg is not Ellipsis]
+        loader_type = _loader_type(args[0])[0] if len(args) == 1 else "String"
+        return loader_type, True
+    if isinstance(annotation, type):
+        if issubclass(annotation, Enum):
+            values = {type(member.value) for member in annotation}
+            return _loader_type(values.pop() if len(values) == 1 else str)
+        for python_type, loader_type in _TYPES:
+            if issubclass(annotation, python_type):
+                return loader_type, False
+    return "String", False
+
+
+def _cell(value: Any, multiple: bool) -> str:
+    """A property value as the loader reads it, "" for no property."""
+    if value is None:
+        return ""
+    if multiple:
+        # array values are ;-separated, a ; inside one is escaped.
+        return ";".join(_cell(item, False).replace(";", "\\;") for item in value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+class _ClassFiles:
+    """The files of one class, a header and then rows until a file's full."""
+
+    def __init__(self, model: type[BaseElement], directory: str, name: str):
+        self.model = model
+        self.directory = directory
+        self.name = name
+        self.edge = issubclass(model, BaseEdge)
+        self.properties = model._serialization_plan().properties
+        self.types = {
+            name: _loader_type(model.model_fields[name].annotation)
+            for name in self.properties
+        }
+        if self.edge:
+            multiple = [name for name, (_, many) in self.types.items() if many]
+            if multiple:
+                raise ValueError(
+                    f"{model.__name__} edges can't have multi-valued properties "
+                    f"in a bulk load, {multiple}"
+                )
+        self.header = self._row(
+            ["~id", "~from", "~to", "~label"] if self.edge else ["~id", "~label"],
+            [self._column(name) for name in self.properties],
+        )
+        self.shard = -1
+        self.file: TextIO | None = None
+        self.size = 0
+        self.rows = 0
+
+    def _column(self, name: str) -> str:
+        loader_type, multiple = self.types[name]
+        if multiple:
+            return f"{name}:{loader_type}[]"
+        if self.edge:
+            return f"{name}:{loader_type}"
+        # the library saves vertex properties with single cardinality.
+        return f"{name}:{loader_type}(single)"
+
+    @staticmethod
+    def _row(*parts: list[str]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerow(
+            [cell for part in parts for cell in part]
+        )
+        return buffer.getvalue()
+
+    def row(self, element: BaseElement) -> str:
+        if element.unloaded_fields:
+            # they'd be written as missing and never loaded.
+            raise ValueError(
+                f"{element!r} has unloaded fields {sorted(element.unloaded_fields)}, "
+                f"load_unloaded() it first"
+            )
+        values = element.model_dump(mode="json", include=set(self.properties))
+        cells = [
+            _cell(values.get(name), self.types[name][1]) for name in self.properties
+        ]
+        label = element._serialization_plan().label
+        if self.edge:
+            ends = [str(element.id), str(element.out_v), str(element.in_v), label]
+            return self._row(ends, cells)
+        return self._row([str(element.id), label], cells)
+
+    def open(self) -> str:
+        self.close()
+        self.shard += 1
+        kind = "edges" if self.edge else "vertices"
+        path = os.path.join(self.directory, f"{kind}-{self.name}-{self.shard:05d}.csv")
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.file.write(self.header)
+        self.size = len(self.header.encode())
+        self.rows = 0
+        return path
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class BulkLoadWriter:
+    """Writes elements to Gremlin bulk load CSV files, a set of files per class.
+
+    Files are named vertices-<label>-00000.csv / edges-<label>-00000.csv, a new
+    file is started before one would grow past max_bytes. Rows are written as
+    elements come so a stream of any length is written in constant memory.
+
+    Args:
+        directory (str | os.PathLike): Where the files go, created if it isn't
+            there.
+        max_bytes (int, optional): Size a file is kept under, a single row bigger
+            than that gets a file to itself. Defaults to 128 MiB.
+
+    Example:
+        >>> with BulkLoadWriter("load/") as writer:  # doctest: +SKIP
+        ...     writer.write_all(Person(name=name, age=30) for name in names)
+        >>> writer.paths  # doctest: +SKIP
+        ['load/vertices-person-00000.csv']
+    """
+
+    def __init__(self, directory: str | os.PathLike, max_bytes: int = 128 * 2**20):
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.paths: list[str] = []
+        self._files: dict[type, _ClassFiles] = {}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __enter__(self) -> BulkLoadWriter:
+        return self
+
+    def __exit__(self, error_type, error, traceback) -> None:
+        self.close()
+
+    def _files_for(self, model: type[BaseElement]) -> _ClassFiles:
+        files = self._files.get(model)
+        if files is None:
+            name = model._class_label()
+            if any(other.name == name for other in self._files.values()):
+                # another class with the same label, its header can differ.
+                name = f"{name}-{model.__name__}"
+            files = self._files[model] = _ClassFiles(model, self.directory, name)
+        return files
+
+    def write(self, element: BaseElement) -> None:
+        """Add a row for element to its class's current file."""
+        files = self._files_for(type(element))
+        row = files.row(element)
+        size = len(row.encode())
+        if files.file is None or (files.rows and files.size + size > self.max_bytes):
+            self.paths.append(files.open())
+        files.file.write(row)
+        files.size += size
+        files.rows += 1
+
+    def write_all(self, elements: Iterable[BaseElement]) -> int:
+        """Add a row for every element, e.g. a collection or a generator.
+
+        Returns:
+            int: how many rows were written.
+        """
+        count = 0
+        for element in elements:
+            self.write(element)
+            count += 1
+        return count
+
+    def close(self) -> None:
+        """Close the files being written, more writes start new ones."""
+        for files in self._files.values():
+            files.close()
@@ -0,0 +1,420 @@
+"""one shared, warmed up connection pool per process instead of one per caller.
+
+    manager = ConnectionManager(ConnectionSettings(url="ws://db:8182/gremlin"))
+    g = manager.g  # connects and warms the pool up the first time
+
+`manager.g` stays usable across reconnects: it talks to the db through a
+`ManagedConnection` that always uses the manager's current driver connection.
+A connection that's found broken, by a request failing with a connection error
+or by the background health check, is replaced before the next request.
+
+`graph()` keeps one manager per process, for settings read from the environment
+by default (see `ConnectionSettings.from_env()`). Call `warm_up()` from a worker's
+start hook (gunicorn's post_fork, celery's worker_process_init, ...) so the
+worker's first request doesn't pay for opening connections.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+from collections.abc import Callable
+from collections.abc import Mapping
+from concurrent.futures import Future
+from dataclasses import dataclass
+from dataclasses import field
+
+from gremlin_python.driver import serializer
+from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
+from gremlin_python.driver.remote_connection import RemoteConnection
+from gremlin_python.driver.remote_connection import RemoteTraversal
+from gremlin_python.process.anonymous_traversal import traversal
+from gremlin_python.process.graph_traversal import GraphTraversalSource
+from gremlin_python.process.traversal import Bytecode
+
+
+try:
+    from aiohttp import ClientError
+except ImportError:  # pragma: no cover
+    ClientError = OSError
+
+
+logger = logging.getLogger(__name__)  # pragma: no cover
+
+SERIALIZERS: dict[str, Callable[[], object]] = {
+    "graphbinary": serializer.GraphBinarySerializersV1,
+    "graphson": serializer.GraphSONSerializersV3d0,
+}
+
+
+def is_connection_error(error: Exception) -> bool:
+    """Did this request fail because the connection to the db broke?"""
+    if isinstance(error, (OSError, ClientError)):
+        return True
+    # gremlinpython's transports raise RuntimeError for a closed websocket.
+    return isinstance(error, RuntimeError) and "closed" in str(error).lower()
+
+
+@dataclass(frozen=True)
+class ConnectionSettings:
+    """How to connect to the db and how big a pool to keep.
+
+    Args:
+        url (str, optional): The gremlin server's url.
+            Defaults to "ws://localhost:8182/gremlin".
+        traversal_source (str, optional): The server side traversal source.
+            Defaults to "g".
+        pool_size (int, optional): Connections kept open. A connection carries one
+            request at a time in gremlinpython, so this is also how many requests
+            can be in flight at once. Defaults to 8.
+        max_workers (int, optional): Threads sending and reading requests, submits
+            past this many queue up client side. Defaults to pool_size.
+        serializer (str, optional): "graphbinary" or "graphson".
+            Defaults to "graphbinary".
+        username (str, optional): For servers that need authentication.
+        password (str, optional): For servers that need authentication.
+        headers (dict, optional): Extra headers sent when connecting.
+        warm_up (bool, optional): Open every pooled connection and send a request
+            when connecting, rather than on the first requests. Defaults to True.
+        health_check_interval (float, optional): Seconds between background
+            checks of the connection, None for no checks. Defaults to 30.0.
+        health_check_timeout (float, optional): Seconds a check waits for the db.
+            Defaults to 5.0.
+        transport_kwargs (dict, optional): Passed on to the transport, e.g.
+            {"max_content_length": ...} or {"ssl": ...}.
+
+    Raises:
+        ValueError: serializer isn't one of `SERIALIZERS`.
+    """
+
+    url: str = "ws://localhost:8182/gremlin"
+    traversal_source: str = "g"
+    pool_size: int = 8
+    max_workers: int | None = None
+    serializer: str = "graphbinary"
+    username: str = ""
+    password: str = field(default="", repr=False)
+    headers: Mapping[str, str] | None = field(default=None, hash=False)
+    warm_up: bool = True
+    health_check_interval: float | None = 30.0
+    health_check_timeout: float = 5.0
+    transport_kwargs: Mapping | None = field(default=None, hash=False)
+
+    def __post_init__(self):
+        if self.serializer not in SERIALIZERS:
+            raise ValueError(
+                f"serializer must be one of {sorted(SERIALIZERS)}, "
+                f"not {self.serializer!r}"
+            )
+
+    @classmethod
+    def from_env(
+        cls, environ: Mapping[str, str] | None = None, prefix: str = "OH_GEE_EM_"
+    ) -> ConnectionSettings:
+        """Settings from environment variables, the defaults for those not set.
+
+        Reads {prefix}URL, TRAVERSAL_SOURCE, POOL_SIZE, MAX_WORKERS, SERIALIZER,
+        USERNAME, PASSWORD, WARM_UP and HEALTH_CHECK_INTERVAL ("" or "none"
+        turns the checks off).
+        """
+        environ = os.environ if environ is None else environ
+        settings = {}
+        converters = {
+            "url": str,
+            "traversal_source": str,
+            "pool_size": int,
+            "max_workers": int,
+            "serializer": str.lower,
+            "username": str,
+            "password": str,
+            "warm_up": lambda value: value.lower() not in ("0", "false", "no"),
+            "health_check_interval": lambda value: (
+                None if value.lower() in ("", "none") else float(value)
+            ),
+        }
+        for name, convert in converters.items():
+            value = environ.get(prefix + name.upper())
+            if value is not None:
+                settings[name] = convert(value)
+        return cls(**settings)
+
+
+def driver_connection(settings: ConnectionSettings) -> DriverRemoteConnection:
+    """Open a gremlinpython DriverRemoteConnection as the settings say."""
+    return DriverRemoteConnection(
+        settings.url,
+        settings.traversal_source,
+        pool_size=settings.pool_size,
+        max_workers=settings.max_workers,
+        username=settings.username,
+        password=settings.password,
+        message_serializer=SERIALIZERS[settings.serializer](),
+        headers=dict(settings.headers) if settings.headers else None,
+        **(settings.transport_kwargs or {}),
+    )
+
+
+def _ping_bytecode() -> Bytecode:
+    bytecode = Bytecode()
+    bytecode.add_step("inject", 0)
+    return bytecode
+
+
+def _open_pool(connection: RemoteConnection, size: int) -> None:
+    """Send size trivial requests at once so each takes its own pooled connection
+    and every one of them is connected now, not on its first real request.
+    """
+    futures = [connection.submit_async(_ping_bytecode()) for _ in range(size)]
+    for future in futures:
+        list(future.result().traversers)
+
+
+class ManagedConnection(RemoteConnection):
+    """The RemoteConnection a manager's g uses, always its current connection."""
+
+    def __init__(self, manager: ConnectionManager):
+        super().__init__(manager.settings.url, manager.settings.traversal_source)
+        self._manager = manager
+
+    def submit(self, bytecode: Bytecode) -> RemoteTraversal:
+        connection = self._manager._current()
+        try:
+            return connection.submit(bytecode)
+        except Exception as error:
+            self._manager._failed(connection, error)
+            raise
+
+    def submit_async(self, bytecode: Bytecode) -> Future:
+        connection = self._manager._current()
+        try:
+            future = connection.submit_async(bytecode)
+        except Exception as error:
+            self._manager._failed(connection, error)
+            raise
+
+        def check(done: Future) -> None:
+            error = done.exception()
+            if error is not None:
+                self._manager._failed(connection, error)
+
+        future.add_done_callback(check)
+        return future
+
+    def is_closed(self) -> bool:
+        return self._manager.closed
+
+    def close(self) -> None:
+        self._manager.close()
+
+    # g.tx() opens its session from the connection it finds on g.
+    def create_session(self) -> RemoteConnection:
+        return self._manager._current().create_session()
+
+    def remove_session(self, session: RemoteConnection) -> None:
+        try:
+            self._manager._current().remove_session(session)
+        except (AttributeError, ValueError):
+            # opened before a reconnect, the new connection doesn't know it.
+            session.close()
+
+    def commit(self):
+        return self._manager._current().commit()
+
+    def rollback(self):
+        return self._manager._current().rollback()
+
+
+class ConnectionManager:
+    """Owns a pooled connection to the db, keeps it healthy and hands out g.
+
+    Args:
+        settings (ConnectionSettings, optional): Defaults to ConnectionSettings().
+        connect (Callable, optional): settings -> a new RemoteConnection.
+            Defaults to `driver_connection()`.
+
+    Example:
+        >>> manager = ConnectionManager(ConnectionSettings(pool_size=16))  # doctest: +SKIP
+        >>> Person.get_vertex(manager.g, id)  # doctest: +SKIP
+        >>> manager.close()  # doctest: +SKIP
+    """
+
+    def __init__(
+        self,
+        settings: ConnectionSettings | None = None,
+        connect: Callable[[ConnectionSettings], RemoteConnection] | None = None,
+    ):
+        self.settings = settings or ConnectionSettings()
+        self._connect = connect or driver_connection
+        self._connection: RemoteConnection | None = None
+        # a connection a request found broken, replaced before the next request.
+        self._broken: RemoteConnection | None = None
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._health_check: threading.Thread | None = None
+        self.closed = False
+        self.reconnects = 0
+        self._g = traversal().with_remote(ManagedConnection(self))
+
+    def __enter__(self) -> ConnectionManager:
+        return self.connect()
+
+    def __exit__(self, error_type, error, traceback) -> None:
+        self.close()
+
+    @property
+    def g(self) -> GraphTraversalSource:
+        """A g using the managed connection, connecting the first time."""
+        self._current()
+        return self._g
+
+    def _open(self) -> RemoteConnection:
+        connection = self._connect(self.settings)
+        if self.settings.warm_up:
+            try:
+                _open_pool(connection, self.settings.pool_size)
+            except Exception:
+                connection.close()
+                raise
+        return connection
+
+    def connect(self) -> ConnectionManager:
+        """Open the connection, and warm it up, if it isn't open yet."""
+        self._current()
+        return self
+
+    def _current(self) -> RemoteConnection:
+        connection = self._connection
+        if connection is not None and connection is not self._broken:
+            return connection
+        with self._lock:
+            if self.closed:
+                raise RuntimeError("the ConnectionManager was closed")
+            if self._connection is None:
+                self._connection = self._open()
+                self._start_health_check()
+            elif self._connection is self._broken:
+                self._replace()
+            return self._connection
+
+    def _replace(self) -> None:
+        with self._lock:
+            old, self._connection = self._connection, self._open()
+            self._broken = None
+            self.reconnects += 1
+        logger.info("reconnected to %s", self.settings.url)
+        if old is not None:
+            try:
+                old.close()
+            except Exception:
+                logger.debug("closing the old connection failed", exc_info=True)
+
+    def _failed(self, connection: RemoteConnection, error: Exception) -> None:
+        # just noted, this can run on the driver's own threads where closing it
+        # would deadlock, the next request or health check reconnects.
+        if is_connection_error(error) and connection is self._connection:
+            logger.warning("connection to %s broke: %r", self.settings.url, error)
+            self._broken = connection
+
+    def reconnect(self) -> None:
+        """Replace the connection with a new one now."""
+        if self.closed:
+            raise RuntimeError("the ConnectionManager was closed")
+        self._replace()
+
+    def ping(self, timeout: float | None = None) -> bool:
+        """Does the db answer a trivial request within timeout seconds?"""
+        timeout = self.settings.health_check_timeout if timeout is None else timeout
+        try:
+            connection = self._current()
+            future = connection.submit_async(_ping_bytecode())
+            list(future.result(timeout=timeout).traversers)
+        except Exception as error:
+            logger.debug("ping of %s failed: %r", self.settings.url, error)
+            return False
+        return True
+
+    def _start_health_check(self) -> None:
+        interval = self.settings.health_check_interval
+        if interval is None or self._health_check is not None:
+            return
+        self._health_check = threading.Thread(
+            target=self._check_health,
+            args=(interval,),
+            name="oh_gee_em-health-check",
+            daemon=True,
+        )
+        self._health_check.start()
+
+    def _check_health(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            if self._broken is None and self.ping():
+                continue
+            try:
+                self._replace()
+            except Exception:
+                logger.warning("reconnecting to %s failed", self.settings.url)
+                self._broken = self._connection
+
+    def close(self) -> None:
+        """Stop the health check and close the connection."""
+        with self._lock:
+            self.closed = True
+            self._stop.set()
+            connection, self._connection = self._connection, None
+        if connection is not None:
+            connection.close()
+
+
+# settings -> this process's manager for them, see `graph()`.
+_managers: dict[ConnectionSettings, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def manager(settings: ConnectionSettings | None = None) -> ConnectionManager:
+    """This process's ConnectionManager for settings, made the first time.
+
+    Args:
+        settings (ConnectionSettings, optional): Defaults to
+            `ConnectionSettings.from_env()`.
+    """
+    settings = ConnectionSettings.from_env() if settings is None else settings
+    with _managers_lock:
+        found = _managers.get(settings)
+        if found is None or found.closed:
+            found = _managers[settings] = ConnectionManager(settings)
+        return found
+
+
+def graph(settings: ConnectionSettings | None = None) -> GraphTraversalSource:
+    """This process's g for settings, connected and warmed up the first time."""
+    return manager(settings).g
+
+
+def warm_up(settings: ConnectionSettings | None = None) -> ConnectionManager:
+    """Connect this process's manager for settings now instead of on first use."""
+    return manager(settings).connect()
+
+
+def close_all() -> None:
+    """Close every manager `manager()`/`graph()` made in this process."""
+    with _managers_lock:
+        managers = list(_managers.values())
+        _managers.clear()
+    for each in managers:
+        try:
+            each.close()
+        except Exception:
+            logger.debug("closing %r failed", each, exc_info=True)
+
+
+def _forget_managers() -> None:
+    # a forked child shares the parent's sockets, it has to open its own.
+    global _managers_lock
+    _managers.clear()
+    _managers_lock = threading.Lock()
+
+
+atexit.register(close_all)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_managers)
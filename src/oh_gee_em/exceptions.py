@@ -0,0 +1,46 @@
+"""exceptions raised by the oh_gee_em models and collections."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from dataclasses import field
+
+
+@dataclass
+class ChunkFailure:
+    """A chunk of a bulk operation that failed.
+
+    Args:
+        chunk (int): The index of the chunk in the order chunks were sent.
+        ids (list[str | int]): The ids of the elements the chunk held.
+        error (Exception): What the chunk raised.
+    """
+
+    chunk: int
+    ids: list[str | int] = field(default_factory=list)
+    error: Exception | None = None
+
+
+class BulkOperationError(Exception):
+    """Raised after a bulk operation when one or more of its chunks failed.
+
+    Every chunk is still attempted and the successful ones are reconciled into the
+    collection, `failures` says which chunks didn't make it and what they held.
+    """
+
+    def __init__(self, operation: str, failures: list[ChunkFailure]):
+        self.operation = operation
+        self.failures = sorted(failures, key=lambda failure: failure.chunk)
+        chunks = ", ".join(str(failure.chunk) for failure in self.failures)
+        super().__init__(
+            f"{operation} failed for {len(self.failures)} chunk(s): [{chunks}], "
+            f"first error: {self.failures[0].error!r}"
+        )
+
+    @property
+    def failed_ids(self) -> list[str | int]:
+        """The ids of every element in a failed chunk, in chunk order."""
+        return [id for failure in self.failures for id in failure.ids]
+
+
+class RelationshipNotLoadedError(Exception):
+    """Raised reading a relationship of a vertex it hasn't been loaded for."""
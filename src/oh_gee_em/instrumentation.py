@@ -0,0 +1,394 @@
+"""hooks for seeing what each library operation cost, no-ops until one is added.
+
+Every public operation (`BaseVertices.save()`, `BaseVertex.get_vertex()`, ...)
+reports an `OperationEvent` to the listeners added with `add_listener()`: how
+many elements it handled, how many round trips it took, roughly how many bytes
+it sent and how its time split between building traversals ("serialize"),
+waiting on the db ("network") and loading results into models ("hydrate").
+An operation called by another one counts towards the outer operation.
+
+`MetricsRecorder` is a ready made listener that keeps the events and summarizes
+them, `ProfileSampler` records the db's own `.profile()` of a sample of the
+traversals operations send.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from contextlib import nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from functools import wraps
+from typing import Any
+
+from gremlin_python.driver.remote_connection import RemoteStrategy
+from gremlin_python.process.graph_traversal import GraphTraversal
+from gremlin_python.process.traversal import Bytecode
+
+
+logger = logging.getLogger(__name__)  # pragma: no cover
+
+_listeners: list[Callable[[OperationEvent], None]] = []
+_profiler: ProfileSampler | None = None
+_current: ContextVar[_Operation | None] = ContextVar(
+    "oh_gee_em_operation", default=None
+)
+_NOOP = nullcontext()
+# steps that change the graph, a traversal holding one isn't re-run to profile it
+# unless the ProfileSampler is told that's fine.
+_WRITE_STEPS = frozenset({"mergeV", "mergeE", "addV", "addE", "property", "drop"})
+
+
+@dataclass
+class OperationEvent:
+    """What one library operation did and where its time went.
+
+    Args:
+        operation (str): The method, e.g. "BaseElements.save".
+        label (str): The label of the class it ran for.
+        elements (int): Elements sent to or loaded from the db.
+        requests (int): Round trips to the db, retries included.
+        payload_bytes (int): Estimated size of the elements sent.
+        seconds (float): Wall time of the whole operation.
+        phases (dict[str, float]): Seconds spent per phase, "serialize",
+            "network" and "hydrate". Chunks sent concurrently each count in full,
+            so phases can add up to more than `seconds`.
+        error (Exception, optional): What the operation raised, if it did.
+    """
+
+    operation: str
+    label: str
+    elements: int = 0
+    requests: int = 0
+    payload_bytes: int = 0
+    seconds: float = 0.0
+    phases: dict[str, float] = field(default_factory=dict)
+    error: Exception | None = None
+
+
+def add_listener(listener: Callable[[OperationEvent], None]) -> None:
+    """Call listener with the `OperationEvent` of every operation from now on.
+
+    Listeners are called on the thread that ran the operation, a listener that
+    raises is logged and otherwise ignored.
+    """
+    _listeners.append(listener)
+
+
+def remove_listener(listener: Callable[[OperationEvent], None]) -> None:
+    """Stop calling a listener added with `add_listener()`."""
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def set_profiler(profiler: ProfileSampler | None) -> None:
+    """Profile a sample of the traversals operations send, None stops it."""
+    global _profiler
+    _profiler = profiler
+
+
+def _label(target) -> str:
+    # an element class or instance, or a collection of them.
+    if hasattr(target, "_element_type"):
+        # the elements held say more than the collection, e.g. People -> person.
+        first = next(iter(target), None)
+        target = target._element_type if first is None else first
+    return target._class_label()
+
+
+class _Operation:
+    """Accumulates one operation's event while it runs, possibly on many threads."""
+
+    __slots__ = ("event", "_lock", "_token", "_start")
+
+    def __init__(self, operation: str, label: str):
+        self.event = OperationEvent(operation, label)
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> _Operation:
+        self._token = _current.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, error_type, error, traceback) -> None:
+        self.event.seconds = time.perf_counter() - self._start
+        self.event.error = error
+        _current.reset(self._token)
+        for listener in list(_listeners):
+            try:
+                listener(self.event)
+            except Exception:
+                logger.exception("instrumentation listener %r failed", listener)
+
+    def add(self, phase: str | None = None, seconds: float = 0.0, **counts) -> None:
+        with self._lock:
+            if phase is not None:
+                phases = self.event.phases
+                phases[phase] = phases.get(phase, 0.0) + seconds
+            for name, count in counts.items():
+                setattr(self.event, name, getattr(self.event, name) + count)
+
+
+class _Phase:
+    __slots__ = ("_operation", "_name", "_start")
+
+    def __init__(self, operation: _Operation, name: str):
+        self._operation = operation
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, error_type, error, traceback) -> None:
+        self._operation.add(self._name, time.perf_counter() - self._start)
+
+
+class _Request(_Phase):
+    __slots__ = ("_query", "_sampled")
+
+    def __init__(self, operation: _Operation, query: GraphTraversal):
+        super().__init__(operation, "network")
+        self._query = query
+        self._sampled = None
+        if _profiler is not None and _profiler.wants(query.bytecode):
+            # copied before running, running a traversal can add steps to it.
+            self._sampled = Bytecode(query.bytecode)
+
+    def __exit__(self, error_type, error, traceback) -> None:
+        super().__exit__(error_type, error, traceback)
+        self._operation.add(requests=1)
+        if self._sampled is not None and error is None and _profiler is not None:
+            _profiler.profile(self._query, self._sampled, self._operation.event)
+
+
+def phase(name: str):
+    """Time a block as a phase of the running operation, a no-op outside of one."""
+    operation = _current.get()
+    return _NOOP if operation is None else _Phase(operation, name)
+
+
+def round_trip(query: GraphTraversal):
+    """Time a block that sends query to the db as a round trip of the operation."""
+    operation = _current.get()
+    return _NOOP if operation is None else _Request(operation, query)
+
+
+def count_elements(elements: int = 0, payload: Callable[[], int] | None = None) -> None:
+    """Add to the running operation's element count and payload size.
+
+    payload is only called when an operation is being recorded, so estimating the
+    size costs nothing otherwise.
+    """
+    operation = _current.get()
+    if operation is not None:
+        operation.add(
+            elements=elements, payload_bytes=payload() if payload is not None else 0
+        )
+
+
+def _recording() -> bool:
+    return bool(_listeners) or _profiler is not None
+
+
+def instrumented(fn: Callable) -> Callable:
+    """Report every call of an element/collection method as an operation.
+
+    Goes under @classmethod. Calls made while another operation runs are part of
+    that one and aren't reported on their own.
+    """
+    name = fn.__qualname__
+    if asyncio.iscoroutinefunction(fn):
+
+        @wraps(fn)
+        async def arecorded(target, *args, **kwargs):
+            if not _recording() or _current.get() is not None:
+                return await fn(target, *args, **kwargs)
+            with _Operation(name, _label(target)):
+                return await fn(target, *args, **kwargs)
+
+        return arecorded
+
+    @wraps(fn)
+    def recorded(target, *args, **kwargs):
+        if not _recording() or _current.get() is not None:
+            return fn(target, *args, **kwargs)
+        with _Operation(name, _label(target)):
+            return fn(target, *args, **kwargs)
+
+    return recorded
+
+
+def operation(name: str, target):
+    """Record a block as an operation, for what can't use @instrumented."""
+    if not _recording() or _current.get() is not None:
+        return _NOOP
+    return _Operation(name, _label(target))
+
+
+def recorded(name: str, target) -> _Operation:
+    """Record a block as an operation whether or not anything is listening.
+
+    For callers that read the totals themselves off the returned operation's
+    `event`, the listeners still get it as usual.
+    """
+    return _Operation(name, _label(target))
+
+
+def _percentile(values: list[float], percent: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class MetricsRecorder:
+    """A listener that keeps the latest events and summarizes them.
+
+    Use it as a context manager to listen for just the operations in the block.
+
+    Args:
+        maxlen (int, optional): Events kept, the oldest are dropped first.
+            Defaults to 10_000.
+
+    Example:
+        >>> with MetricsRecorder() as recorder:  # doctest: +SKIP
+        ...     people.save(g)
+        >>> recorder.summary()["BaseElements.save", "person"]  # doctest: +SKIP
+        {'calls': 1, 'requests': 4, 'elements': 2000, 'p99': 0.41, ...}
+    """
+
+    def __init__(self, maxlen: int = 10_000):
+        self.events: deque[OperationEvent] = deque(maxlen=maxlen)
+
+    def __call__(self, event: OperationEvent) -> None:
+        self.events.append(event)
+
+    def __enter__(self) -> MetricsRecorder:
+        add_listener(self)
+        return self
+
+    def __exit__(self, error_type, error, traceback) -> None:
+        remove_listener(self)
+
+    def summary(self) -> dict[tuple[str, str], dict]:
+        """Totals and latency percentiles per (operation, label)."""
+        grouped: dict[tuple[str, str], list[OperationEvent]] = {}
+        for event in list(self.events):
+            grouped.setdefault((event.operation, event.label), []).append(event)
+        summary = {}
+        for key, events in grouped.items():
+            seconds = [event.seconds for event in events]
+            phases: dict[str, float] = {}
+            for event in events:
+                for name, phase_seconds in event.phases.items():
+                    phases[name] = phases.get(name, 0.0) + phase_seconds
+            summary[key] = {
+                "calls": len(events),
+                "errors": sum(event.error is not None for event in events),
+                "requests": sum(event.requests for event in events),
+                "elements": sum(event.elements for event in events),
+                "payload_bytes": sum(event.payload_bytes for event in events),
+                "seconds": sum(seconds),
+                "p50": _percentile(seconds, 50),
+                "p99": _percentile(seconds, 99),
+                "max": max(seconds),
+                "phases": phases,
+            }
+        return summary
+
+
+@dataclass
+class TraversalProfile:
+    """The db's `.profile()` of a traversal an operation sent.
+
+    Args:
+        operation (str): The operation that sent it.
+        label (str): The label of the class it ran for.
+        traversal (str): The traversal's bytecode.
+        metrics (Any): What `.profile()` returned, the db's TraversalMetrics.
+    """
+
+    operation: str
+    label: str
+    traversal: str
+    metrics: Any
+
+
+class ProfileSampler:
+    """Re-sends a sample of the traversals operations run with `.profile()` added.
+
+    A profiled traversal runs a second time, in the background so the operation
+    doesn't wait on it, and the db's metrics end up in `profiles`. Traversals
+    that write are left alone unless include_writes, the library's merges are
+    safe to repeat but it doubles their load on the db.
+
+    Args:
+        rate (float, optional): Fraction of traversals to profile. Defaults to 0.01.
+        include_writes (bool, optional): Profile writes too. Defaults to False.
+        maxlen (int, optional): Profiles kept, the oldest are dropped first.
+            Defaults to 1000.
+
+    Example:
+        >>> sampler = ProfileSampler(rate=0.05)  # doctest: +SKIP
+        >>> set_profiler(sampler)  # doctest: +SKIP
+        >>> Person.get_vertices(g, ids)  # doctest: +SKIP
+        >>> sampler.profiles[0].metrics  # doctest: +SKIP
+    """
+
+    def __init__(
+        self, rate: float = 0.01, include_writes: bool = False, maxlen: int = 1000
+    ):
+        self.rate = rate
+        self.include_writes = include_writes
+        self.profiles: deque[TraversalProfile] = deque(maxlen=maxlen)
+
+    def wants(self, bytecode: Bytecode) -> bool:
+        """Should the traversal with this bytecode be profiled?"""
+        if random.random() >= self.rate:
+            return False
+        return self.include_writes or not _writes(bytecode)
+
+    def profile(
+        self, query: GraphTraversal, bytecode: Bytecode, event: OperationEvent
+    ) -> None:
+        connection = _remote_connection(query)
+        if connection is None:
+            return
+        bytecode.add_step("profile")
+        try:
+            future = connection.submit_async(bytecode)
+        except Exception:
+            logger.debug("couldn't profile %s", bytecode, exc_info=True)
+            return
+        future.add_done_callback(
+            lambda done: self._record(done, event.operation, event.label, bytecode)
+        )
+
+    def _record(self, done, operation: str, label: str, bytecode: Bytecode) -> None:
+        try:
+            metrics = next(done.result().traversers).object
+        except Exception:
+            logger.debug("couldn't profile %s", bytecode, exc_info=True)
+            return
+        self.profiles.append(TraversalProfile(operation, label, str(bytecode), metrics))
+
+
+def _writes(bytecode: Bytecode) -> bool:
+    return any(
+        name in _WRITE_STEPS
+        or any(isinstance(arg, Bytecode) and _writes(arg) for arg in args)
+        for name, *args in bytecode.step_instructions
+    )
+
+
+def _remote_connection(query: GraphTraversal):
+    for strategy in query.traversal_strategies.traversal_strategies:
+        if isinstance(strategy, RemoteStrategy):
+            return strategy.remote_connection
+    return None
@@ -0,0 +1,986 @@
+"""an in-process graph that runs traversals without a gremlin server.
+
+`memory_traversal()` gives a `g` that can be passed anywhere a remote one is, the
+bytecode is interpreted against python dicts instead of being sent over the
+network. It runs the steps this library emits (V()/E(), mergeV()/mergeE() with
+their options, elementMap(), properties(), property(), drop(), has()/hasLabel(),
+order(), limit(), count(), ...), the common navigation steps and profile(),
+anything else raises NotImplementedError rather than quietly giving a different
+answer than a server would.
+
+It is meant for tests, local profiling and benchmarks, not as a database:
+there's no persistence and no transactions, every traversal runs under one lock.
+"""
+from __future__ import annotations
+
+import itertools
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from collections.abc import Iterable
+from concurrent.futures import Future
+from functools import partial
+from typing import Any
+from uuid import UUID
+from uuid import uuid4
+
+from gremlin_python.driver.remote_connection import RemoteConnection
+from gremlin_python.driver.remote_connection import RemoteTraversal
+from gremlin_python.process.anonymous_traversal import traversal
+from gremlin_python.process.graph_traversal import GraphTraversalSource
+from gremlin_python.process.traversal import Binding
+from gremlin_python.process.traversal import Bytecode
+from gremlin_python.process.traversal import Cardinality
+from gremlin_python.process.traversal import Direction
+from gremlin_python.process.traversal import Merge
+from gremlin_python.process.traversal import Order
+from gremlin_python.process.traversal import P
+from gremlin_python.process.traversal import Pop
+from gremlin_python.process.traversal import T
+from gremlin_python.process.traversal import Traverser
+from gremlin_python.structure import graph as structure
+
+
+_MISSING = object()
+# what a root traversal starts from, source steps like V() run once off it.
+_START = object()
+# values that need no converting, checked first as they're most of them.
+_PLAIN = frozenset({str, int, float, bool, type(None)})
+
+
+def _key(id) -> Any:
+    """ids are indexed as given, except UUID's which match their str."""
+    if isinstance(id, structure.Element):
+        id = id.id
+    return str(id) if isinstance(id, UUID) else id
+
+
+class _Element:
+    __slots__ = ("id", "label", "properties")
+
+    def __init__(self, id, label: str, properties: dict):
+        self.id = id
+        self.label = label
+        self.properties = properties
+
+
+class _Vertex(_Element):
+    __slots__ = ("out_edges", "in_edges")
+
+    def __init__(self, id, label: str, properties: dict):
+        super().__init__(id, label, properties)
+        self.out_edges: dict = {}
+        self.in_edges: dict = {}
+
+
+class _Edge(_Element):
+    __slots__ = ("out_v", "in_v")
+
+    def __init__(self, id, label: str, out_v: _Vertex, in_v: _Vertex, props: dict):
+        super().__init__(id, label, props)
+        self.out_v = out_v
+        self.in_v = in_v
+
+
+class _Property:
+    __slots__ = ("element", "key", "value")
+
+    def __init__(self, element: _Element, key: str, value):
+        self.element = element
+        self.key = key
+        self.value = value
+
+
+class MemoryGraph:
+    """The vertices and edges of an in-process graph, indexed by id and by label.
+
+    Several `MemoryConnection`s can share one graph.
+    """
+
+    def __init__(self):
+        self.vertices: dict[Any, _Vertex] = {}
+        self.edges: dict[Any, _Edge] = {}
+        self._labels: dict[type, dict[str, dict]] = {
+            _Vertex: defaultdict(dict),
+            _Edge: defaultdict(dict),
+        }
+
+    def __len__(self) -> int:
+        return len(self.vertices) + len(self.edges)
+
+    def clear(self) -> None:
+        self.vertices.clear()
+        self.edges.clear()
+        for index in self._labels.values():
+            index.clear()
+
+    def with_label(self, kind: type, labels: Iterable[str]) -> list[_Element]:
+        """The vertices or edges with any of labels, from the label index."""
+        index = self._labels[kind]
+        return [
+            element
+            for label in dict.fromkeys(labels)
+            for element in index.get(label, {}).values()
+        ]
+
+    def add_vertex(self, id, label: str, properties: dict) -> _Vertex:
+        id = str(uuid4()) if id is None else _key(id)
+        if id in self.vertices:
+            raise ValueError(f"Vertex with id already exists: {id}")
+        vertex = self.vertices[id] = _Vertex(id, label, properties)
+        self._labels[_Vertex][label][id] = vertex
+        return vertex
+
+    def add_edge(
+        self, id, label: str, out_v: _Vertex, in_v: _Vertex, properties: dict
+    ) -> _Edge:
+        id = str(uuid4()) if id is None else _key(id)
+        if id in self.edges:
+            raise ValueError(f"Edge with id already exists: {id}")
+        edge = self.edges[id] = _Edge(id, label, out_v, in_v, properties)
+        self._labels[_Edge][label][id] = edge
+        out_v.out_edges[id] = edge
+        in_v.in_edges[id] = edge
+        return edge
+
+    def remove(self, element: _Element) -> None:
+        if isinstance(element, _Vertex):
+            for edge in [*element.out_edges.values(), *element.in_edges.values()]:
+                self.remove(edge)
+            store = self.vertices
+        else:
+            element.out_v.out_edges.pop(element.id, None)
+            element.in_v.in_edges.pop(element.id, None)
+            store = self.edges
+        if store.pop(element.id, None) is not None:
+            del self._labels[type(element)][element.label][element.id]
+
+
+class _Traverser:
+    """An object moving through the steps and the step labels it picked up."""
+
+    __slots__ = ("obj", "labels")
+
+    def __init__(self, obj, labels: dict | None = None):
+        self.obj = obj
+        self.labels = {} if labels is None else labels
+
+    def split(self, obj) -> _Traverser:
+        # labels are only ever replaced, never changed in place, so share them.
+        return _Traverser(obj, self.labels)
+
+
+# step name -> fn(run, traversers, args, modulators) -> traversers
+_STEPS: dict[str, Callable] = {}
+# steps that configure the step before them rather than run on their own.
+_MODULATORS = frozenset({"option", "by", "from", "to", "with"})
+# step name -> the modulators it reads, one on any other step would be ignored.
+_MODULATED: dict[str, frozenset[str]] = {
+    "select": frozenset({"by"}),
+    "project": frozenset({"by"}),
+    "order": frozenset({"by"}),
+    "dedup": frozenset({"by"}),
+    "mergeV": frozenset({"option"}),
+    "mergeE": frozenset({"option"}),
+    "addE": frozenset({"from", "to"}),
+}
+
+
+def _step(*names: str) -> Callable:
+    def register(fn: Callable) -> Callable:
+        for name in names:
+            _STEPS[name] = fn
+        return fn
+
+    return register
+
+
+def _unbind(arg):
+    if type(arg) in _PLAIN:
+        return arg
+    if isinstance(arg, Binding):
+        return _unbind(arg.value)
+    if isinstance(arg, dict):
+        return {_unbind(key): _unbind(value) for key, value in arg.items()}
+    if isinstance(arg, (list, tuple)):
+        return [_unbind(item) for item in arg]
+    if isinstance(arg, set):
+        return {_unbind(item) for item in arg}
+    return arg
+
+
+def _compile(bytecode: Bytecode) -> list[tuple[str, list, list]]:
+    """Group each step with the modulators that follow it."""
+    steps = []
+    for name, *args in bytecode.step_instructions:
+        args = [_unbind(arg) for arg in args]
+        if name in _MODULATORS:
+            if not steps:
+                raise NotImplementedError(f"{name}() has no step to modulate")
+            step = steps[-1][0]
+            if name not in _MODULATED.get(step, ()):
+                raise NotImplementedError(
+                    f"the memory graph can't modulate {step}() with {name}()"
+                )
+            steps[-1][2].append((name, args))
+        elif (
+            name == "hasLabel"
+            and steps
+            and steps[-1][0] in ("V", "E")
+            and not steps[-1][1]
+            and all(isinstance(arg, str) for arg in args)
+        ):
+            # g.V().hasLabel(x) reads the label index instead of scanning.
+            steps[-1] = (f"{steps[-1][0]}.hasLabel", args, [])
+        elif name in _STEPS or name == "profile":
+            steps.append((name, args, []))
+        else:
+            raise NotImplementedError(f"the memory graph can't run {name}()")
+    return steps
+
+
+class _Run:
+    """One traversal's execution against a graph."""
+
+    def __init__(self, graph: MemoryGraph):
+        self.graph = graph
+        # a child traversal runs once per traverser, compile it just the once.
+        self._compiled: dict[int, list] = {}
+
+    def __call__(self, bytecode: Bytecode, traversers: list[_Traverser]) -> list:
+        steps = self._compiled.get(id(bytecode))
+        if steps is None:
+            steps = self._compiled[id(bytecode)] = _compile(bytecode)
+        if steps and steps[-1][0] == "profile":
+            return [_Traverser(self._profile(steps[:-1], traversers))]
+        for name, args, modulators in steps:
+            traversers = _STEPS[name](self, traversers, args, modulators)
+        return traversers
+
+    def _profile(self, steps: list, traversers: list[_Traverser]) -> dict:
+        """Run steps timing each one, shaped like a server's TraversalMetrics."""
+        metrics = []
+        start = time.perf_counter()
+        for index, (name, args, modulators) in enumerate(steps):
+            step_start = time.perf_counter()
+            traversers = _STEPS[name](self, traversers, args, modulators)
+            metrics.append(
+                {
+                    "id": f"{index}.0.0()",
+                    "name": name,
+                    "dur": (time.perf_counter() - step_start) * 1000,
+                    "counts": {
+                        "traverserCount": len(traversers),
+                        "elementCount": len(traversers),
+                    },
+                }
+            )
+        return {"dur": (time.perf_counter() - start) * 1000, "metrics": metrics}
+
+    def sub(self, bytecode: Bytecode, traverser: _Traverser) -> list[_Traverser]:
+        """Run a child traversal, e.g. a sideEffect(), on one traverser."""
+        return self(bytecode, [traverser])
+
+    def first(self, arg, traverser: _Traverser, default=None):
+        """The value of a step argument, the first result when it's a traversal."""
+        if isinstance(arg, Bytecode):
+            results = self.sub(arg, traverser)
+            return results[0].obj if results else default
+        return arg
+
+
+# ---------------------------------------------------------------------------- #
+#                                    VALUES                                    #
+# ---------------------------------------------------------------------------- #
+def _value(obj, key, default=_MISSING):
+    if key == T.id:
+        return obj.id if isinstance(obj, _Element) else default
+    if key == T.label:
+        return obj.label if isinstance(obj, _Element) else default
+    if isinstance(obj, _Element):
+        return obj.properties.get(key, default)
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return default
+
+
+def _compare(op: Callable, left, right) -> bool:
+    try:
+        return op(left, right)
+    except TypeError:
+        # None, or values of different types, never compare.
+        return False
+
+
+def _text(value, test: Callable) -> bool:
+    return isinstance(value, str) and test(value)
+
+
+_PREDICATES: dict[str, Callable] = {
+    "eq": lambda value, p: value == p.value,
+    "neq": lambda value, p: value != p.value,
+    "lt": lambda value, p: _compare(lambda a, b: a < b, value, p.value),
+    "lte": lambda value, p: _compare(lambda a, b: a <= b, value, p.value),
+    "gt": lambda value, p: _compare(lambda a, b: a > b, value, p.value),
+    "gte": lambda value, p: _compare(lambda a, b: a >= b, value, p.value),
+    "inside": lambda value, p: _compare(
+        lambda a, b: b[0] < a < b[1], value, (p.value, p.other)
+    ),
+    "outside": lambda value, p: _compare(
+        lambda a, b: a < b[0] or a > b[1], value, (p.value, p.other)
+    ),
+    "between": lambda value, p: _compare(
+        lambda a, b: b[0] <= a < b[1], value, (p.value, p.other)
+    ),
+    "within": lambda value, p: value in p.value,
+    "without": lambda value, p: value not in p.value,
+    "containing": lambda value, p: _text(value, lambda v: p.value in v),
+    "notContaining": lambda value, p: _text(value, lambda v: p.value not in v),
+    "startingWith": lambda value, p: _text(value, lambda v: v.startswith(p.value)),
+    "notStartingWith": lambda value, p: _text(
+        value, lambda v: not v.startswith(p.value)
+    ),
+    "endingWith": lambda value, p: _text(value, lambda v: v.endswith(p.value)),
+    "notEndingWith": lambda value, p: _text(value, lambda v: not v.endswith(p.value)),
+    "regex": lambda value, p: _text(value, lambda v: re.search(p.value, v)),
+    "notRegex": lambda value, p: _text(value, lambda v: not re.search(p.value, v)),
+}
+
+
+def _test(predicate, value, resolve: Callable | None = None) -> bool:
+    """Does value pass the predicate, a P/TextP or a plain value to equal.
+
+    resolve maps the predicate's operands first, where() uses it to turn step
+    labels into the values they labelled.
+    """
+    if not isinstance(predicate, P):
+        return value == predicate
+    if predicate.operator == "and":
+        return _test(predicate.value, value, resolve) and _test(
+            predicate.other, value, resolve
+        )
+    if predicate.operator == "or":
+        return _test(predicate.value, value, resolve) or _test(
+            predicate.other, value, resolve
+        )
+    if predicate.operator == "not":
+        return not _test(predicate.value, value, resolve)
+    test = _PREDICATES.get(predicate.operator)
+    if test is None:
+        raise NotImplementedError(f"the memory graph can't test {predicate}")
+    if resolve is not None:
+        predicate = P(
+            predicate.operator, resolve(predicate.value), resolve(predicate.other)
+        )
+    return bool(test(value, predicate))
+
+
+def _ids(args: list) -> list:
+    """V()/E()/hasId() take ids, lists of ids or elements."""
+    ids = []
+    for arg in args:
+        ids.extend(arg if isinstance(arg, (list, tuple, set)) else [arg])
+    return ids
+
+
+def _hashable(obj):
+    try:
+        hash(obj)
+    except TypeError:
+        return repr(obj)
+    return obj
+
+
+def _by(run: _Run, traverser: _Traverser, args: list):
+    """The value a by() modulator picks out of a traverser."""
+    if not args or isinstance(args[0], Order):
+        return traverser.obj
+    if isinstance(args[0], Bytecode):
+        return run.first(args[0], traverser)
+    return _value(traverser.obj, args[0], None)
+
+
+def _element_map(obj: _Element, keys: list) -> dict:
+    element_map = {T.id: obj.id, T.label: obj.label}
+    if isinstance(obj, _Edge):
+        element_map[Direction.IN] = {T.id: obj.in_v.id, T.label: obj.in_v.label}
+        element_map[Direction.OUT] = {T.id: obj.out_v.id, T.label: obj.out_v.label}
+    for key, value in obj.properties.items():
+        if not keys or key in keys:
+            element_map[key] = value
+    return element_map
+
+
+def _detach(obj):
+    """What a server would send back for obj, graph structure for elements."""
+    if type(obj) in _PLAIN:
+        return obj
+    if isinstance(obj, _Vertex):
+        return structure.Vertex(obj.id, obj.label)
+    if isinstance(obj, _Edge):
+        return structure.Edge(
+            obj.id,
+            structure.Vertex(obj.out_v.id, obj.out_v.label),
+            obj.label,
+            structure.Vertex(obj.in_v.id, obj.in_v.label),
+        )
+    if isinstance(obj, _Property):
+        element = _detach(obj.element)
+        if isinstance(obj.element, _Vertex):
+            return structure.VertexProperty(None, obj.key, obj.value, element)
+        return structure.Property(obj.key, obj.value, element)
+    if isinstance(obj, dict):
+        return {
+            key: value if type(value) in _PLAIN else _detach(value)
+            for key, value in obj.items()
+        }
+    if isinstance(obj, list):
+        return [_detach(item) for item in obj]
+    return obj
+
+
+# ---------------------------------------------------------------------------- #
+#                                     STEPS                                    #
+# ---------------------------------------------------------------------------- #
+def _source(kind: str) -> Callable:
+    def step(run: _Run, traversers: list, args: list, modulators: list) -> list:
+        store = run.graph.vertices if kind == "V" else run.graph.edges
+        if args:
+            found = [store[id] for id in map(_key, _ids(args)) if id in store]
+        else:
+            found = list(store.values())
+        return [t.split(obj) for t in traversers for obj in found]
+
+    return step
+
+
+_STEPS["V"] = _source("V")
+_STEPS["E"] = _source("E")
+
+
+def _labelled(kind: type) -> Callable:
+    def step(run: _Run, traversers: list, args: list, modulators: list) -> list:
+        found = run.graph.with_label(kind, args)
+        return [t.split(obj) for t in traversers for obj in found]
+
+    return step
+
+
+_STEPS["V.hasLabel"] = _labelled(_Vertex)
+_STEPS["E.hasLabel"] = _labelled(_Edge)
+
+
+@_step("inject")
+def _inject(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    kept = [t for t in traversers if t.obj is not _START]
+    return [*kept, *(_Traverser(arg) for arg in args)]
+
+
+@_step("unfold")
+def _unfold(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    unfolded = []
+    for t in traversers:
+        if isinstance(t.obj, dict):
+            unfolded.extend(t.split({key: value}) for key, value in t.obj.items())
+        elif isinstance(t.obj, (list, tuple, set)):
+            unfolded.extend(t.split(item) for item in t.obj)
+        else:
+            unfolded.append(t)
+    return unfolded
+
+
+@_step("fold")
+def _fold(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [_Traverser([t.obj for t in traversers])]
+
+
+@_step("as")
+def _as(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [
+        _Traverser(t.obj, {**t.labels, **dict.fromkeys(args, t.obj)})
+        for t in traversers
+    ]
+
+
+@_step("select")
+def _select(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    if args and isinstance(args[0], Pop):
+        args = args[1:]
+    bys = itertools.cycle([by_args for _, by_args in modulators] or [[]])
+    bys = [next(bys) for _ in args]
+    selected = []
+    for t in traversers:
+        values = {}
+        for key, by_args in zip(args, bys):
+            # a map's key wins over a step label, like on a server.
+            value = _value(t.obj, key) if isinstance(t.obj, dict) else _MISSING
+            if value is _MISSING:
+                value = t.labels.get(key, _MISSING)
+            if value is _MISSING:
+                break
+            values[key] = _by(run, t.split(value), by_args)
+        else:
+            selected.append(t.split(values[args[0]] if len(args) == 1 else values))
+    return selected
+
+
+@_step("project")
+def _project(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    bys = itertools.cycle([by_args for _, by_args in modulators] or [[]])
+    bys = [next(bys) for _ in args]
+    return [
+        t.split({key: _by(run, t, by_args) for key, by_args in zip(args, bys)})
+        for t in traversers
+    ]
+
+
+def _merge(
+    run: _Run, traversers: list, args: list, modulators: list, edges: bool
+) -> list:
+    options = {option: value for _, (option, value) in modulators}
+    merged = []
+    for t in traversers:
+        match = run.first(args[0], t, {}) if args else t.obj
+        match = {
+            key: _key(value) if key == T.id else value for key, value in match.items()
+        }
+        found = _matches(run.graph, match, edges)
+        if not found:
+            create = run.first(options.get(Merge.on_create), t) or {}
+            for key, value in create.items():
+                if key in match and match[key] != value:
+                    raise ValueError(
+                        "option(onCreate) cannot override values from the merge map"
+                    )
+            props = {**match, **create}
+            found = [_create(run, t, props, options, edges)]
+        else:
+            update = run.first(options.get(Merge.on_match), t) or {}
+            if T.id in update or T.label in update:
+                raise ValueError("option(onMatch) cannot change the id or label")
+            for element in found:
+                _set(element, update)
+        merged.extend(t.split(element) for element in found)
+    return merged
+
+
+_STEPS["mergeV"] = partial(_merge, edges=False)
+_STEPS["mergeE"] = partial(_merge, edges=True)
+
+
+def _matches(graph: MemoryGraph, match: dict, edges: bool) -> list[_Element]:
+    store = graph.edges if edges else graph.vertices
+    if T.id in match:
+        candidates = [store[match[T.id]]] if match[T.id] in store else []
+    elif T.label in match:
+        candidates = graph.with_label(_Edge if edges else _Vertex, [match[T.label]])
+    else:
+        candidates = list(store.values())
+    found = []
+    for element in candidates:
+        for key, value in match.items():
+            if key == Direction.OUT:
+                if element.out_v.id != _key(value):
+                    break
+            elif key == Direction.IN:
+                if element.in_v.id != _key(value):
+                    break
+            elif _value(element, key) != value:
+                break
+        else:
+            found.append(element)
+    return found
+
+
+def _create(run: _Run, t: _Traverser, props: dict, options: dict, edges: bool):
+    id = props.pop(T.id, None)
+    label = props.pop(T.label, "edge" if edges else "vertex")
+    if not edges:
+        return run.graph.add_vertex(id, label, _without_none(props))
+
+    ends = []
+    for direction, option in ((Direction.OUT, Merge.out_v), (Direction.IN, Merge.in_v)):
+        end = props.pop(direction, None)
+        if end == option:
+            end = run.first(options.get(option), t)
+        vertex = run.graph.vertices.get(_key(end))
+        if vertex is None:
+            raise ValueError(f"Vertex id for mergeE() could not be found: {end}")
+        ends.append(vertex)
+    return run.graph.add_edge(id, label, *ends, _without_none(props))
+
+
+def _without_none(props: dict) -> dict:
+    return {key: value for key, value in props.items() if value is not None}
+
+
+def _set(element: _Element, props: dict) -> None:
+    for key, value in props.items():
+        if value is None:
+            # like property(k, null), None removes the property.
+            element.properties.pop(key, None)
+        else:
+            element.properties[key] = value
+
+
+@_step("addV")
+def _add_v(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [
+        t.split(
+            run.graph.add_vertex(None, run.first(args[0], t) if args else "vertex", {})
+        )
+        for t in traversers
+    ]
+
+
+@_step("addE")
+def _add_e(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    ends = dict(modulators)
+    added = []
+    for t in traversers:
+        vertices = []
+        for end in ("from", "to"):
+            vertex = t.obj
+            if end in ends:
+                (arg,) = ends[end]
+                vertex = t.labels[arg] if isinstance(arg, str) else run.first(arg, t)
+                if not isinstance(vertex, _Vertex):
+                    vertex = run.graph.vertices[_key(vertex)]
+            vertices.append(vertex)
+        added.append(t.split(run.graph.add_edge(None, args[0], *vertices, {})))
+    return added
+
+
+@_step("property")
+def _property(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    if isinstance(args[0], Cardinality):
+        args = args[1:]
+    key, value = args[0], args[1]
+    for t in traversers:
+        _set(t.obj, {key: run.first(value, t)})
+    return traversers
+
+
+@_step("drop")
+def _drop(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    for t in traversers:
+        if isinstance(t.obj, _Property):
+            t.obj.element.properties.pop(t.obj.key, None)
+        else:
+            run.graph.remove(t.obj)
+    return []
+
+
+@_step("sideEffect")
+def _side_effect(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    for t in traversers:
+        run.sub(args[0], t)
+    return traversers
+
+
+@_step("discard", "none")
+def _discard(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return []
+
+
+@_step("identity")
+def _identity(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return traversers
+
+
+@_step("constant")
+def _constant(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [t.split(args[0]) for t in traversers]
+
+
+@_step("elementMap")
+def _element_map_step(run: _Run, traversers: list, args: list, modulators: list):
+    return [t.split(_element_map(t.obj, args)) for t in traversers]
+
+
+@_step("valueMap")
+def _value_map(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [
+        t.split(
+            {
+                key: [value]
+                for key, value in t.obj.properties.items()
+                if not args or key in args
+            }
+        )
+        for t in traversers
+    ]
+
+
+@_step("properties")
+def _properties(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [
+        t.split(_Property(t.obj, key, value))
+        for t in traversers
+        for key, value in list(t.obj.properties.items())
+        if not args or key in args
+    ]
+
+
+@_step("values")
+def _values(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [
+        t.split(value)
+        for t in traversers
+        for key, value in t.obj.properties.items()
+        if not args or key in args
+    ]
+
+
+@_step("key")
+def _key_step(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [t.split(t.obj.key) for t in traversers]
+
+
+@_step("value")
+def _value_step(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [t.split(t.obj.value) for t in traversers]
+
+
+@_step("id")
+def _id(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [t.split(t.obj.id) for t in traversers]
+
+
+@_step("label")
+def _label(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [t.split(t.obj.label) for t in traversers]
+
+
+@_step("has")
+def _has(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    if len(args) == 3:
+        label, key, predicate = args
+        traversers = [t for t in traversers if t.obj.label == label]
+    elif len(args) == 2:
+        key, predicate = args
+    else:
+        (key,) = args
+        return [t for t in traversers if _value(t.obj, key) is not _MISSING]
+    if key == T.id:
+        predicate = _key(predicate) if not isinstance(predicate, P) else predicate
+    kept = []
+    for t in traversers:
+        value = _value(t.obj, key)
+        if value is not _MISSING and _test(predicate, value):
+            kept.append(t)
+    return kept
+
+
+@_step("hasNot")
+def _has_not(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [t for t in traversers if _value(t.obj, args[0]) is _MISSING]
+
+
+@_step("hasLabel")
+def _has_label(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [
+        t for t in traversers if any(_test(label, t.obj.label) for label in _ids(args))
+    ]
+
+
+@_step("hasId")
+def _has_id(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    ids = [arg if isinstance(arg, P) else _key(arg) for arg in _ids(args)]
+    return [t for t in traversers if any(_test(id, t.obj.id) for id in ids)]
+
+
+@_step("is")
+def _is(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [t for t in traversers if _test(args[0], t.obj)]
+
+
+@_step("where")
+def _where(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    (arg,) = args
+    if isinstance(arg, Bytecode):
+        return [t for t in traversers if run.sub(arg, t)]
+    kept = []
+    for t in traversers:
+        labels = t.labels
+        if _test(arg, t.obj, lambda label: labels.get(label, label)):
+            kept.append(t)
+    return kept
+
+
+@_step("not")
+def _not(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [t for t in traversers if not run.sub(args[0], t)]
+
+
+@_step("coalesce")
+def _coalesce(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    coalesced = []
+    for t in traversers:
+        for arg in args:
+            results = run.sub(arg, t)
+            if results:
+                coalesced.extend(results)
+                break
+    return coalesced
+
+
+@_step("order")
+def _order(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    ordered = list(traversers)
+    # sorts are stable, so sorting by the last by() first gives the by() order.
+    for _, by_args in reversed(modulators or [("by", [])]):
+        order = next((arg for arg in by_args if isinstance(arg, Order)), Order.asc)
+        if order == Order.shuffle:
+            random.shuffle(ordered)
+            continue
+        keys = {id(t): _by(run, t, by_args) for t in ordered}
+        ordered.sort(
+            key=lambda t: (keys[id(t)] is None, keys[id(t)]),
+            reverse=order == Order.desc,
+        )
+    return ordered
+
+
+@_step("limit")
+def _limit(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return traversers[: args[-1]]
+
+
+@_step("range")
+def _range(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    low, high = args[-2:]
+    return traversers[low:] if high == -1 else traversers[low:high]
+
+
+@_step("skip")
+def _skip(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return traversers[args[-1] :]
+
+
+@_step("tail")
+def _tail(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    count = args[-1] if args else 1
+    return traversers[-count:] if count else []
+
+
+@_step("count")
+def _count(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    return [_Traverser(len(traversers))]
+
+
+@_step("dedup")
+def _dedup(run: _Run, traversers: list, args: list, modulators: list) -> list:
+    seen, kept = set(), []
+    for t in traversers:
+        key = _hashable(_by(run, t, modulators[0][1]) if modulators else t.obj)
+        if key not in seen:
+            seen.add(key)
+            kept.append(t)
+    return kept
+
+
+def _reducer(reduce: Callable) -> Callable:
+    def step(run: _Run, traversers: list, args: list, modulators: list) -> list:
+        values = [t.obj for t in traversers if t.obj is not None]
+        return [_Traverser(reduce(values))] if values else []
+
+    return step
+
+
+_STEPS["sum"] = _reducer(sum)
+_STEPS["min"] = _reducer(min)
+_STEPS["max"] = _reducer(max)
+_STEPS["mean"] = _reducer(lambda values: sum(values) / len(values))
+
+
+def _walk(direction: str, edges: bool) -> Callable:
+    def step(run: _Run, traversers: list, args: list, modulators: list) -> list:
+        walked = []
+        for t in traversers:
+            found = []
+            if direction in ("out", "both"):
+                found.extend((edge, edge.in_v) for edge in t.obj.out_edges.values())
+            if direction in ("in", "both"):
+                found.extend((edge, edge.out_v) for edge in t.obj.in_edges.values())
+            walked.extend(
+                t.split(edge if edges else vertex)
+                for edge, vertex in found
+                if not args or edge.label in args
+            )
+        return walked
+
+    return step
+
+
+for _direction in ("out", "in", "both"):
+    _STEPS[_direction] = _walk(_direction, edges=False)
+    _STEPS[f"{_direction}E"] = _walk(_direction, edges=True)
+
+
+def _ends(pick: Callable[[_Traverser], list]) -> Callable:
+    def step(run: _Run, traversers: list, args: list, modulators: list) -> list:
+        return [t.split(vertex) for t in traversers for vertex in pick(t)]
+
+    return step
+
+
+_STEPS["outV"] = _ends(lambda t: [t.obj.out_v])
+_STEPS["inV"] = _ends(lambda t: [t.obj.in_v])
+_STEPS["bothV"] = _ends(lambda t: [t.obj.out_v, t.obj.in_v])
+
+
+# ---------------------------------------------------------------------------- #
+#                                  CONNECTION                                  #
+# ---------------------------------------------------------------------------- #
+class MemoryConnection(RemoteConnection):
+    """A RemoteConnection that runs traversals against a `MemoryGraph`.
+
+    Traversals run one at a time, to completion, when they're submitted, so a
+    traversal never sees another's half done writes.
+
+    Args:
+        graph (MemoryGraph, optional): The graph to run against, share one between
+            connections to have them see the same data. Defaults to a new one.
+    """
+
+    def __init__(self, graph: MemoryGraph | None = None):
+        super().__init__("memory://", "g")
+        self.graph = MemoryGraph() if graph is None else graph
+        self._lock = threading.RLock()
+
+    def submit(self, bytecode: Bytecode) -> RemoteTraversal:
+        with self._lock:
+            results = _Run(self.graph)(bytecode, [_Traverser(_START)])
+            results = [Traverser(_detach(t.obj)) for t in results]
+        return RemoteTraversal(iter(results))
+
+    def submit_async(self, bytecode: Bytecode) -> Future:
+        future = Future()
+        try:
+            future.set_result(self.submit(bytecode))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+    def is_closed(self) -> bool:
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+def memory_traversal(graph: MemoryGraph | None = None) -> GraphTraversalSource:
+    """A `g` backed by an in-process graph instead of a gremlin server.
+
+    Example:
+        >>> g = memory_traversal()
+        >>> g.add_v("person").property("name", "fred").values("name").next()
+        'fred'
+        >>> g.V().has_label("person").count().next()
+        1
+    """
+    return traversal().with_remote(MemoryConnection(graph))
@@ -0,0 +1,345 @@
+"""a query builder for the elements of one class, compiled to parameterized Gremlin.
+
+    Person.query(g).where(age__gt=30, sex="f").order_by("-age").limit(100).all()
+
+sends ``g.V().hasLabel("person").has("age", p0).has("sex", p1)
+.order().by("age", desc).limit(p2).elementMap()`` with p0=P.gt(30), p1="f" and
+p2=100 as bindings. The traversal built for a query's shape (its class, which
+lookups on which fields, ordering, paging, projection) is kept and only the
+bindings change between queries of the same shape, so repeated queries skip
+rebuilding bytecode and the server sees the same traversal every time.
+"""
+from __future__ import annotations
+
+import copy
+import logging
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import NamedTuple
+
+from gremlin_python.process.graph_traversal import GraphTraversal
+from gremlin_python.process.graph_traversal import GraphTraversalSource
+from gremlin_python.process.traversal import Binding
+from gremlin_python.process.traversal import Bytecode
+from gremlin_python.process.traversal import Order
+from gremlin_python.process.traversal import P
+from gremlin_python.process.traversal import T
+from gremlin_python.process.traversal import TextP
+
+from .instrumentation import operation
+from .instrumentation import phase
+from .instrumentation import round_trip
+from .utilities import _anext
+from .utilities import _ato_list
+
+
+if TYPE_CHECKING:
+    from .BaseElement import BaseElement
+    from .BaseElements import BaseElements
+
+
+logger = logging.getLogger(__name__)  # pragma: no cover
+
+# field__lookup -> what the value becomes, the argument of has(field, ...).
+_LOOKUPS: dict[str, Callable[[Any], Any]] = {
+    "eq": lambda value: value,
+    "ne": P.neq,
+    "gt": P.gt,
+    "gte": P.gte,
+    "lt": P.lt,
+    "lte": P.lte,
+    "in": lambda values: P.within(list(values)),
+    "not_in": lambda values: P.without(list(values)),
+    "between": lambda bounds: P.between(*bounds),
+    "inside": lambda bounds: P.inside(*bounds),
+    "outside": lambda bounds: P.outside(*bounds),
+    "contains": TextP.containing,
+    "startswith": TextP.starting_with,
+    "endswith": TextP.ending_with,
+}
+# templates kept before the oldest is dropped, shapes come from code so there are
+# usually a handful.
+_MAX_TEMPLATES = 1024
+
+
+class _Template(NamedTuple):
+    # the step instructions, Binding args are where the values go.
+    steps: tuple[tuple[str, tuple], ...]
+    # binding name -> turns the value given into the bound argument.
+    builders: dict[str, Callable[[Any], Any]]
+
+
+# (class, shape, terminal) -> the template compiled for it, see `Query._template()`.
+_templates: dict[tuple, _Template] = {}
+
+
+class Query:
+    """The elements of one class that match some conditions, built up by chaining.
+
+    Every method returns a new Query so a partly built one can be reused, nothing
+    is sent until `all()`, `first()`, `count()` or `exists()` (or their async
+    versions) is called.
+
+    Args:
+        element_type (type[BaseElement]): The class to query, e.g. Person.
+        g (GraphTraversalSource): The GraphTraversalSource to read from.
+    """
+
+    def __init__(self, element_type: type[BaseElement], g: GraphTraversalSource):
+        self._element_type = element_type
+        self._g = g
+        # (field, lookup, value), value is None for an isnull lookup's.
+        self._conditions: tuple[tuple[str, str, Any], ...] = ()
+        self._order: tuple[tuple[str, bool], ...] = ()
+        self._limit: int | None = None
+        self._offset: int | None = None
+        self._fields: tuple[str, ...] | None = None
+
+    def __repr__(self) -> str:
+        return f"<Query {self._element_type.__name__} {self._shape()}>"
+
+    def _copy(self, **changes) -> Query:
+        query = copy.copy(self)
+        for name, value in changes.items():
+            setattr(query, name, value)
+        return query
+
+    def _key(self, field: str):
+        """The property key for a field, raising if the class doesn't have it."""
+        if field == "id":
+            return T.id
+        if field not in self._element_type._serialization_plan().properties:
+            raise ValueError(f"{self._element_type.__name__} has no property {field!r}")
+        return field
+
+    def where(self, **conditions) -> Query:
+        """Only elements matching every condition.
+
+        Conditions are field=value or field__lookup=value, lookups being eq, ne,
+        gt, gte, lt, lte, in, not_in, between, inside, outside (a (low, high)
+        pair), contains, startswith, endswith and isnull (True or False).
+        A value can also be a predicate, e.g. age=P.gt(30), and field=None is the
+        same as field__isnull=True since None properties aren't stored.
+
+        Raises:
+            ValueError: A field the class doesn't have or a lookup that doesn't
+                exist.
+        """
+        added = []
+        for condition, value in conditions.items():
+            field, _, lookup = condition.partition("__")
+            self._key(field)
+            lookup = lookup or "eq"
+            if lookup == "eq" and value is None:
+                lookup, value = "isnull", True
+            if lookup == "isnull":
+                # a different traversal, not a different binding.
+                lookup, value = ("isnull" if value else "notnull"), None
+            elif lookup not in _LOOKUPS:
+                raise ValueError(f"unknown lookup {lookup!r} in {condition!r}")
+            added.append((field, lookup, value))
+        return self._copy(_conditions=self._conditions + tuple(added))
+
+    def order_by(self, *fields: str) -> Query:
+        """Order by fields in turn, "-age" for descending."""
+        order = []
+        for field in fields:
+            descending = field.startswith("-")
+            field = field.lstrip("-")
+            self._key(field)
+            order.append((field, descending))
+        return self._copy(_order=self._order + tuple(order))
+
+    def limit(self, limit: int) -> Query:
+        """At most limit elements."""
+        return self._copy(_limit=limit)
+
+    def offset(self, offset: int) -> Query:
+        """Skip the first offset elements, use with order_by() for stable pages."""
+        return self._copy(_offset=offset)
+
+    def only(self, *fields: str) -> Query:
+        """Only load these properties, the rest are fetched for every element the
+        query returned when one of them is first accessed.
+        """
+        return self._copy(_fields=fields)
+
+    def _shape(self) -> tuple:
+        """What the traversal depends on, everything but the values."""
+        return (
+            tuple((field, lookup) for field, lookup, _ in self._conditions),
+            self._order,
+            self._limit is not None,
+            self._offset is not None,
+            self._fields,
+        )
+
+    def _values(self) -> list:
+        """The values to bind, in the order `_compile()` numbered them."""
+        values = [value for _, lookup, value in self._conditions if lookup in _LOOKUPS]
+        if self._offset is not None:
+            values.append(self._offset)
+            values.append(-1 if self._limit is None else self._offset + self._limit)
+        elif self._limit is not None:
+            values.append(self._limit)
+        return values
+
+    def _compile(self, terminal: str) -> _Template:
+        """Build the traversal for this query's shape with a Binding per value."""
+        builders = {}
+
+        def bind(build: Callable[[Any], Any] = lambda value: value) -> Binding:
+            key = f"p{len(builders)}"
+            builders[key] = build
+            return Binding(key, None)
+
+        element_type = self._element_type
+        query = element_type._source(self._g).has_label(element_type._class_label())
+        for field, lookup, _ in self._conditions:
+            key = self._key(field)
+            if lookup == "isnull":
+                query = query.has_not(key)
+            elif lookup == "notnull":
+                query = query.has(key)
+            else:
+                query = query.has(key, bind(_LOOKUPS[lookup]))
+        if self._order:
+            query = query.order()
+            for field, descending in self._order:
+                query = query.by(
+                    self._key(field), Order.desc if descending else Order.asc
+                )
+        if self._offset is not None:
+            query = query.range_(bind(), bind())
+        elif self._limit is not None:
+            query = query.limit(bind())
+
+        if terminal == "count":
+            query = query.count()
+        elif terminal == "exists":
+            query = query.limit(1).count()
+        elif self._fields is not None:
+            keys = element_type._projection_for(self._g, self._fields, 1)
+            query = element_type._element_map(query, keys)
+        else:
+            query = query.element_map()
+        steps = tuple(
+            (name, tuple(args)) for name, *args in query.bytecode.step_instructions
+        )
+        return _Template(steps, builders)
+
+    def _template(self, terminal: str) -> _Template:
+        key = (self._element_type, self._shape(), terminal)
+        template = _templates.get(key)
+        if template is None:
+            if len(_templates) >= _MAX_TEMPLATES:
+                _templates.pop(next(iter(_templates)), None)
+            template = _templates[key] = self._compile(terminal)
+        return template
+
+    def traversal(self, terminal: str = "all") -> GraphTraversal:
+        """The traversal the query sends, "all" for its elements' element_maps,
+        "count" or "exists" for those shortcuts'.
+        """
+        with phase("serialize"):
+            template = self._template(terminal)
+            bindings = dict(zip(template.builders, self._values()))
+            bytecode = Bytecode(self._g.bytecode)
+            bytecode.bindings = bindings
+            bytecode.step_instructions = [
+                [
+                    name,
+                    *(
+                        Binding(arg.key, template.builders[arg.key](bindings[arg.key]))
+                        if type(arg) is Binding
+                        else arg
+                        for arg in args
+                    ),
+                ]
+                for name, args in template.steps
+            ]
+        return GraphTraversal(self._g.graph, self._g.traversal_strategies, bytecode)
+
+    def _projection(self):
+        if self._fields is None:
+            return None
+        return self._element_type._projection_for(
+            self._g, self._fields, self._limit or 500
+        )
+
+    def _collect(self, page: list[dict], projection, collection) -> BaseElements:
+        if collection is None:
+            collection = self._element_type._collection()
+        elements = collection()
+        for element in self._element_type._from_page(page, projection):
+            elements.add(element)
+        return elements
+
+    def all(self, collection: type[BaseElements] | None = None) -> BaseElements:
+        """Send the query and load what matched, in order.
+
+        Args:
+            collection (type[BaseElements], optional): The collection class to
+                return, e.g. People. Defaults to BaseVertices/BaseEdges.
+        """
+        with operation("Query.all", self._element_type):
+            projection = self._projection()
+            query = self.traversal()
+            with round_trip(query):
+                page = query.to_list()
+            return self._collect(page, projection, collection)
+
+    async def aall(self, collection: type[BaseElements] | None = None) -> BaseElements:
+        """Awaitable `all()`."""
+        with operation("Query.aall", self._element_type):
+            projection = self._projection()
+            query = self.traversal()
+            with round_trip(query):
+                page = await _ato_list(query)
+            return self._collect(page, projection, collection)
+
+    def __iter__(self) -> Iterator[BaseElement]:
+        return iter(self.all())
+
+    async def __aiter__(self) -> AsyncIterator[BaseElement]:
+        for element in await self.aall():
+            yield element
+
+    def first(self) -> BaseElement | None:
+        """The first element that matched, None if none did."""
+        return next(iter(self.limit(1).all()), None)
+
+    async def afirst(self) -> BaseElement | None:
+        """Awaitable `first()`."""
+        return next(iter(await self.limit(1).aall()), None)
+
+    def count(self) -> int:
+        """How many elements matched, counted by the db."""
+        with operation("Query.count", self._element_type):
+            query = self.traversal("count")
+            with round_trip(query):
+                return next(query, 0)
+
+    async def acount(self) -> int:
+        """Awaitable `count()`."""
+        with operation("Query.acount", self._element_type):
+            query = self.traversal("count")
+            with round_trip(query):
+                return await _anext(query, 0)
+
+    def exists(self) -> bool:
+        """Did anything match, the db stops at the first element that does."""
+        with operation("Query.exists", self._element_type):
+            query = self.traversal("exists")
+            with round_trip(query):
+                return bool(next(query, 0))
+
+    async def aexists(self) -> bool:
+        """Awaitable `exists()`."""
+        with operation("Query.aexists", self._element_type):
+            query = self.traversal("exists")
+            with round_trip(query):
+                return bool(await _anext(query, 0))
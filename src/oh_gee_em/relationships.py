@@ -0,0 +1,280 @@
+"""declarative relationships between vertex classes, loaded a hop at a time.
+
+A `Relationship` on a BaseVertex subclass names the edges to follow and the class
+the vertices at the other end are loaded as::
+
+    class Person(BaseVertex):
+        name: str
+        friends = Relationship("knows", target="Person")
+
+`people.load_related(g, "friends")` loads the friends of every person in the
+collection with one traversal per batch of people, grouped by person, instead of
+a `g.V(id).out("knows")` round trip per person. Afterwards `person.friends` is that
+person's friends, and what load_related() returned is every friend found so the
+next hop can be loaded from it the same way. Concurrent
+`await person.arelated(g, "friends")` calls are coalesced into one traversal.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+from gremlin_python.process.graph_traversal import GraphTraversal
+from gremlin_python.process.graph_traversal import GraphTraversalSource
+from gremlin_python.process.graph_traversal import __
+from gremlin_python.process.traversal import Direction
+from gremlin_python.process.traversal import T
+
+from .exceptions import RelationshipNotLoadedError
+from .instrumentation import count_elements
+from .instrumentation import operation
+from .instrumentation import phase
+from .instrumentation import round_trip
+from .utilities import _ato_list
+from .utilities import chunker
+
+
+if TYPE_CHECKING:
+    from .BaseElement import _Projection
+    from .BaseVertex import BaseVertex
+    from .BaseVertices import BaseVertices
+
+
+logger = logging.getLogger(__name__)  # pragma: no cover
+
+# the keys of a hop's results, one row per source vertex.
+_SOURCE = "source"
+_TARGETS = "targets"
+
+
+class _Batch:
+    """Sources waiting on the next traversal of a relationship, see `acoalesced()`."""
+
+    __slots__ = ("sources", "done", "task")
+
+    def __init__(self, done: asyncio.Future):
+        self.sources: list[BaseVertex] = []
+        self.done = done
+        self.task: asyncio.Task | None = None
+
+
+# (event loop, g, relationship, fields) -> the batch collecting sources until the
+# loop gets round to sending it.
+_batches: dict[tuple, _Batch] = {}
+
+
+def _unique(sources: Iterable[BaseVertex]) -> list[BaseVertex]:
+    return list({str(source.id): source for source in sources}.values())
+
+
+class Relationship:
+    """The vertices at the other end of a vertex's edges with a label.
+
+    Declared as a plain class attribute of a BaseVertex subclass, not a field, it's
+    neither validated nor saved. Read on a vertex it's the neighbors last loaded
+    with `related()`/`load_related()`.
+
+    Args:
+        edge_label (str): The label of the edges to follow.
+        direction (Direction, optional): Follow the edges out of the vertex, into it
+            or both. Defaults to Direction.OUT.
+        target (type[BaseVertex] | str, optional): The class the vertices at the
+            other end are loaded as, or its name in the declaring class's module.
+            Defaults to the declaring class.
+        collection (type[BaseVertices], optional): The collection class neighbors
+            are returned in. Defaults to BaseVertices.
+
+    Raises:
+        ValueError: direction isn't OUT, IN or BOTH.
+    """
+
+    def __init__(
+        self,
+        edge_label: str,
+        direction: Direction = Direction.OUT,
+        target: type[BaseVertex] | str | None = None,
+        collection: type[BaseVertices] | None = None,
+    ):
+        if direction not in (Direction.OUT, Direction.IN, Direction.BOTH):
+            raise ValueError(f"direction must be OUT, IN or BOTH, not {direction}")
+        self.edge_label = edge_label
+        self.direction = direction
+        self._target = target
+        self._collection = collection
+        self.owner: type[BaseVertex] | None = None
+        self.name: str | None = None
+
+    def __set_name__(self, owner: type[BaseVertex], name: str) -> None:
+        self.owner = owner
+        self.name = name
+
+    def __get__(self, instance: BaseVertex | None, owner=None):
+        if instance is None:
+            return self
+        related = instance.__pydantic_private__["_related"]
+        if related is None or self.name not in related:
+            raise RelationshipNotLoadedError(
+                f"{type(instance).__name__}.{self.name} isn't loaded, "
+                f"load it with related() or the collection's load_related() first"
+            )
+        return related[self.name]
+
+    def __repr__(self) -> str:
+        owner = "?" if self.owner is None else self.owner.__name__
+        return f"<Relationship {owner}.{self.name} -{self.edge_label}->>"
+
+    @property
+    def target(self) -> type[BaseVertex]:
+        """The class the vertices at the other end are loaded as."""
+        target = self._target
+        if target is None:
+            return self.owner
+        if isinstance(target, str):
+            module = sys.modules[self.owner.__module__]
+            try:
+                target = self._target = getattr(module, target)
+            except AttributeError:
+                raise NameError(
+                    f"{self!r} targets {target!r}, "
+                    f"which isn't defined in {module.__name__}"
+                ) from None
+        return target
+
+    @property
+    def collection(self) -> type[BaseVertices]:
+        """The collection class neighbors are returned in."""
+        if self._collection is None:
+            from .BaseVertices import BaseVertices
+
+            return BaseVertices
+        return self._collection
+
+    def _neighbors(self) -> GraphTraversal:
+        if self.direction == Direction.OUT:
+            return __.out(self.edge_label)
+        if self.direction == Direction.IN:
+            return __.in_(self.edge_label)
+        return __.both(self.edge_label)
+
+    def _query(
+        self, g: GraphTraversalSource, ids: list, projection: _Projection | None
+    ) -> GraphTraversal:
+        """One row per source that's in the db, its id and its neighbors."""
+        targets = self.target._element_map(self._neighbors(), projection).fold()
+        return g.V(ids).project(_SOURCE, _TARGETS).by(T.id).by(targets)
+
+    def _hydrate(
+        self,
+        sources: list[BaseVertex],
+        rows: list[dict],
+        neighbors: BaseVertices,
+        projection: _Projection | None,
+    ) -> None:
+        """Set every source's neighbors from a hop's rows, adding them to neighbors."""
+        target, collection = self.target, self.collection
+        by_source = {str(row[_SOURCE]): row[_TARGETS] for row in rows}
+        count = 0
+        with phase("hydrate"):
+            for source in sources:
+                related = collection()
+                # a source that isn't in the db anymore has no neighbors either.
+                for element_map in by_source.get(str(source.id), ()):
+                    # each neighbor is built once however many sources it's next to.
+                    element = neighbors.get(element_map[T.id])
+                    if element is None:
+                        element = target._from_db(element_map, projection)
+                        neighbors.add(element)
+                        count += 1
+                    related.add(element)
+                private = source.__pydantic_private__
+                if private["_related"] is None:
+                    private["_related"] = {}
+                private["_related"][self.name] = related
+        count_elements(count)
+
+    def load(
+        self,
+        g: GraphTraversalSource,
+        sources: Iterable[BaseVertex],
+        batch_size: int = 500,
+        fields: Iterable[str] | None = None,
+    ) -> BaseVertices:
+        """Load this relationship for every source, one traversal per batch_size.
+
+        Args:
+            g (GraphTraversalSource): The GraphTraversalSource to read from.
+            sources (Iterable[BaseVertex]): The vertices to load neighbors for.
+            batch_size (int, optional): Sources per traversal. Defaults to 500.
+            fields (Iterable[str], optional): Only load these properties of the
+                neighbors, see `BaseVertex.get_vertices()`.
+
+        Returns:
+            BaseVertices: every neighbor found, each once.
+        """
+        neighbors = self.collection()
+        with operation("Relationship.load", self.owner):
+            projection = self.target._projection_for(g, fields, batch_size)
+            for chunk in chunker(_unique(sources), batch_size):
+                chunk = list(chunk)
+                query = self._query(g, [source.id for source in chunk], projection)
+                with round_trip(query):
+                    rows = query.to_list()
+                self._hydrate(chunk, rows, neighbors, projection)
+        return neighbors
+
+    async def aload(
+        self,
+        g: GraphTraversalSource,
+        sources: Iterable[BaseVertex],
+        batch_size: int = 500,
+        fields: Iterable[str] | None = None,
+    ) -> BaseVertices:
+        """Awaitable `load()`."""
+        neighbors = self.collection()
+        with operation("Relationship.aload", self.owner):
+            projection = self.target._projection_for(g, fields, batch_size)
+            for chunk in chunker(_unique(sources), batch_size):
+                chunk = list(chunk)
+                query = self._query(g, [source.id for source in chunk], projection)
+                with round_trip(query):
+                    rows = await _ato_list(query)
+                self._hydrate(chunk, rows, neighbors, projection)
+        return neighbors
+
+    async def acoalesced(
+        self,
+        g: GraphTraversalSource,
+        source: BaseVertex,
+        fields: Iterable[str] | None = None,
+    ) -> BaseVertices:
+        """Load this relationship for source together with every other source asked
+        for before the event loop gets round to sending the traversal.
+
+        Like a dataloader, `asyncio.gather(*(p.arelated(g, "friends") for p in
+        people))` sends one traversal rather than one per person.
+        """
+        loop = asyncio.get_running_loop()
+        key = (loop, id(g), self, None if fields is None else frozenset(fields))
+        batch = _batches.get(key)
+        if batch is None:
+            batch = _batches[key] = _Batch(loop.create_future())
+            batch.task = loop.create_task(self._dispatch(g, key, batch, fields))
+        batch.sources.append(source)
+        await batch.done
+        return self.__get__(source)
+
+    async def _dispatch(
+        self, g, key: tuple, batch: _Batch, fields: Iterable[str] | None
+    ) -> None:
+        # runs after every coroutine already scheduled has added its source,
+        # anyone asking from here on starts the next batch.
+        del _batches[key]
+        try:
+            await self.aload(g, batch.sources, fields=fields)
+        except Exception as error:
+            batch.done.set_exception(error)
+        else:
+            batch.done.set_result(None)
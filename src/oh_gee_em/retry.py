@@ -0,0 +1,152 @@
+"""retrying writes that lost a race with another writer, with backoff and jitter."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+
+logger = logging.getLogger(__name__)  # pragma: no cover
+
+# lowercased bits of the messages graph dbs give when a write conflicted with a
+# concurrent one and is safe to send again, e.g. Neptune's
+# ConcurrentModificationException.
+CONFLICT_MARKERS = (
+    "concurrentmodificationexception",
+    "concurrent modification",
+    "conflicting concurrent",
+)
+
+
+def is_conflict(error: Exception) -> bool:
+    """Did this write fail because a concurrent write got there first?"""
+    message = str(error).lower()
+    return any(marker in message for marker in CONFLICT_MARKERS)
+
+
+@dataclass
+class RetryStats:
+    """What a RetryPolicy did so far.
+
+    Args:
+        calls (int): Writes sent through the policy.
+        attempts (int): Round trips made for those writes, retries included.
+        retries (int): Round trips that were a retry.
+        conflicts (int): Attempts that failed with a retryable conflict.
+        exhausted (int): Writes that still conflicted after every attempt.
+        waited (float): Seconds spent backing off.
+    """
+
+    calls: int = 0
+    attempts: int = 0
+    retries: int = 0
+    conflicts: int = 0
+    exhausted: int = 0
+    waited: float = 0.0
+
+
+class RetryPolicy:
+    """Re-send a write that conflicted with a concurrent one, backing off in between.
+
+    The n-th retry waits a random time between 0 and `base_delay * 2**n`, capped
+    at `max_delay` ("full jitter"), so writers that conflicted with each other
+    don't retry in lockstep. Only what failed is re-sent: a bulk write retries the
+    one chunk that conflicted, not the whole collection.
+
+    Pass the same policy to every write of a run and read `stats` afterwards.
+
+    Args:
+        attempts (int, optional): Tries per write, the first included.
+            Defaults to 5.
+        base_delay (float, optional): Seconds the first retry backs off for at
+            most. Defaults to 0.05.
+        max_delay (float, optional): The most one back off can be. Defaults to 2.0.
+        retry_on (Callable, optional): error -> should it be retried.
+            Defaults to `is_conflict()`.
+
+    Example:
+        >>> policy = RetryPolicy(attempts=8)  # doctest: +SKIP
+        >>> people.save(g, retry=policy)  # doctest: +SKIP
+        >>> policy.stats  # doctest: +SKIP
+        RetryStats(calls=20, attempts=23, retries=3, conflicts=3, ...)
+    """
+
+    def __init__(
+        self,
+        attempts: int = 5,
+        base_delay: float = 0.05,
+        max_delay: float = 2.0,
+        retry_on: Callable[[Exception], bool] = is_conflict,
+    ):
+        self.attempts = max(attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+        self.stats = RetryStats()
+        self._lock = threading.Lock()
+
+    def delay(self, retry: int) -> float:
+        """Seconds to back off before the given retry, 0 being the first."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**retry))
+
+    def _count(self, **counts) -> None:
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self.stats, name, getattr(self.stats, name) + count)
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        if not self.retry_on(error):
+            return False
+        self._count(conflicts=1)
+        if attempt + 1 >= self.attempts:
+            self._count(exhausted=1)
+            return False
+        return True
+
+    def call(self, send: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call send(*args, **kwargs), retrying it on conflicts.
+
+        send has to build what it sends each time it's called, a traversal can
+        only be submitted once.
+
+        Raises:
+            Exception: what send raised when it isn't a conflict, or still was one
+                after every attempt.
+        """
+        self._count(calls=1)
+        attempt = 0
+        while True:
+            self._count(attempts=1, retries=min(attempt, 1))
+            try:
+                return send(*args, **kwargs)
+            except Exception as error:
+                if not self._should_retry(error, attempt):
+                    raise
+                delay = self.delay(attempt)
+                logger.debug("retrying a conflicted write in %.3fs: %r", delay, error)
+                self._count(waited=delay)
+                time.sleep(delay)
+                attempt += 1
+
+    async def acall(self, send: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        """Awaitable `call()`, backs off without blocking the event loop."""
+        self._count(calls=1)
+        attempt = 0
+        while True:
+            self._count(attempts=1, retries=min(attempt, 1))
+            try:
+                return await send(*args, **kwargs)
+            except Exception as error:
+                if not self._should_retry(error, attempt):
+                    raise
+                delay = self.delay(attempt)
+                logger.debug("retrying a conflicted write in %.3fs: %r", delay, error)
+                self._count(waited=delay)
+                await asyncio.sleep(delay)
+                attempt += 1
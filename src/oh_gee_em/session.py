@@ -0,0 +1,395 @@
+"""session scoped identity map so each (class, id) is loaded into one python object."""
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any
+
+from .exceptions import BulkOperationError
+
+
+logger = logging.getLogger(__name__)  # pragma: no cover
+
+_current_session: ContextVar[Session | None] = ContextVar(
+    "oh_gee_em_session", default=None
+)
+
+
+def current_session() -> Session | None:
+    """The session entered in this thread/task, or None outside of one."""
+    return _current_session.get()
+
+
+class IdentityMap:
+    """(class, id) -> element, evicting the least recently used past maxsize.
+
+    Args:
+        maxsize (int | None, optional): How many elements to hold, None for no
+            bound. Defaults to 10_000.
+    """
+
+    def __init__(self, maxsize: int | None = 10_000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._elements: OrderedDict[tuple[type, str], Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._elements)
+
+    def __contains__(self, element) -> bool:
+        return (element.__class__, str(element.id)) in self._elements
+
+    def get(self, cls: type, id: Any):
+        """Get the element loaded for (cls, id), or None if it isn't held."""
+        key = (cls, str(id))
+        element = self._elements.get(key)
+        if element is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._elements.move_to_end(key)
+        return element
+
+    def add(self, element) -> None:
+        """Hold element as the instance for its (class, id)."""
+        key = (element.__class__, str(element.id))
+        self._elements[key] = element
+        self._elements.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self._elements) > self.maxsize:
+                self._elements.popitem(last=False)
+
+    def discard(self, element) -> None:
+        """Stop holding element, e.g. because it was deleted."""
+        key = (element.__class__, str(element.id))
+        if self._elements.get(key) is element:
+            del self._elements[key]
+
+    def discard_class(self, cls: type) -> None:
+        """Stop holding every element of cls (and its subclasses)."""
+        for key in [key for key in self._elements if issubclass(key[0], cls)]:
+            del self._elements[key]
+
+    def clear(self) -> None:
+        self._elements.clear()
+
+
+class Session:
+    """A unit of work scope holding an identity map of the elements it loaded.
+
+    While a session is entered `get_vertex()`/`get_edge()` return the instance
+    already loaded for that (class, id) instead of going to the db, and every load
+    of an id returns that same instance. create/save put elements in the map and
+    delete takes them out so it stays coherent with what was written.
+
+    An element already in the map isn't overwritten when the same id is read again,
+    so local changes that haven't been saved yet are kept.
+
+    Args:
+        maxsize (int | None, optional): How many elements the identity map holds
+            before evicting the least recently used, None for no bound.
+            Defaults to 10_000.
+
+    Example:
+        >>> with Session(maxsize=1000):  # doctest: +SKIP
+        ...     fred = Person.get_vertex(g, fred_id)
+        ...     assert Person.get_vertex(g, fred_id) is fred
+    """
+
+    def __init__(self, maxsize: int | None = 10_000):
+        self.identity_map = IdentityMap(maxsize)
+        self._tokens = []
+
+    def __enter__(self) -> Session:
+        self._tokens.append(_current_session.set(self))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _current_session.reset(self._tokens.pop())
+
+    async def __aenter__(self) -> Session:
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.__exit__(*exc_info)
+
+    def get(self, cls: type, id: Any):
+        """Get the instance loaded for (cls, id), or None if it isn't held."""
+        return self.identity_map.get(cls, id)
+
+    def add(self, element) -> None:
+        self.identity_map.add(element)
+
+    def discard(self, element) -> None:
+        self.identity_map.discard(element)
+
+    def defers(self) -> bool:
+        """Are writes being held back rather than sent, see UnitOfWork."""
+        return False
+
+    def defer(self, operation: str, element) -> bool:
+        """Take over a write instead of it going to the db now, see UnitOfWork."""
+        return False
+
+
+# the order a flush sends its batches in, (operation, edges?): vertices exist
+# before edges are created between them and edges go before their vertices do.
+# A replaced element is deleted ahead of everything and then created again.
+_FLUSH_ORDER = (
+    ("replace", True),
+    ("replace", False),
+    ("create", False),
+    ("create", True),
+    ("save", False),
+    ("save", True),
+    ("delete", True),
+    ("delete", False),
+)
+
+
+# (earlier, later) write of the same element -> the one write a flush sends for
+# both, None for nothing at all. Other pairs come to the later write.
+_FOLDS = {
+    # still created, with the latest values.
+    ("create", "save"): "create",
+    # never sent, so there's nothing to delete.
+    ("create", "delete"): None,
+    ("delete", "save"): "delete",
+    # the element has to end up with just the new values, see _FLUSH_ORDER.
+    ("delete", "create"): "replace",
+    ("replace", "save"): "replace",
+    ("replace", "create"): "replace",
+}
+
+
+def _unsupported(error: Exception) -> bool:
+    # e.g. TinkerGraph's "Graph does not support transactions".
+    return "support transactions" in str(error).lower()
+
+
+class UnitOfWork(Session):
+    """A Session that holds writes back and sends them together on exit.
+
+    While it's entered `create()`/`save()`/`delete()` of elements and collections,
+    `create_vertex()`, `delete_vertex()`/`delete_edge()` and `drop()` (a save of
+    the property as None) only record what to write. `delete_all()` drops what
+    matches on the server, it can't be held back and raises instead. Leaving the
+    block flushes them with one bulk write per operation and kind of element,
+    inside one `g.tx()` when the db supports transactions, so touching 30 elements
+    costs a few round trips and one commit instead of 30 of each. A later write of
+    an element replaces an earlier one, except a save after a create or delete
+    doesn't change it, a create after a delete replaces the element (it's deleted
+    and created again) and a delete after a create means neither is sent.
+
+    Nothing is sent when the block raises. When a flush fails the transaction is
+    rolled back and the writes stay pending. Without a transaction whatever went
+    through before the failure stays written, and only the rest stays pending.
+
+    Args:
+        g (GraphTraversalSource): Where the writes are sent, whatever g they were
+            called with.
+        transactional (bool | None, optional): True to require a transaction,
+            False to never open one, None to use one when the connection can
+            open one. Defaults to None.
+        maxsize (int | None, optional): See Session.
+
+    Example:
+        >>> with UnitOfWork(g):  # doctest: +SKIP
+        ...     fred.age = 23
+        ...     fred.save(g)
+        ...     Knows(out_v=fred, in_v=ron).create(g)
+        ...     old_friend.delete(g)
+    """
+
+    def __init__(self, g, transactional: bool | None = None, maxsize=10_000):
+        super().__init__(maxsize)
+        self.g = g
+        self.transactional = transactional
+        # (class, id) -> (element, operation), in the order first written.
+        self._pending: dict[tuple[type, str], tuple[Any, str]] = {}
+        self._flushing = False
+        # False once the connection or graph turned out not to do transactions,
+        # later flushes write straight through g rather than opening a session.
+        self._transactions: bool | None = None
+
+    def __exit__(self, error_type, error, traceback) -> None:
+        try:
+            if error_type is None:
+                self.flush()
+            else:
+                self._pending.clear()
+        finally:
+            super().__exit__(error_type, error, traceback)
+
+    async def __aexit__(self, error_type, error, traceback) -> None:
+        try:
+            if error_type is None:
+                await self.aflush()
+            else:
+                self._pending.clear()
+        finally:
+            super().__exit__(error_type, error, traceback)
+
+    @property
+    def pending(self) -> list[tuple[str, Any]]:
+        """(operation, element) of every write the next flush sends."""
+        return [(operation, element) for element, operation in self._pending.values()]
+
+    def defers(self) -> bool:
+        return not self._flushing
+
+    def defer(self, operation: str, element) -> bool:
+        if self._flushing:
+            return False
+        key = (element.__class__, str(element.id))
+        previous = self._pending.get(key, (None, None))[1]
+        operation = _FOLDS.get((previous, operation), operation)
+        if operation is None:
+            del self._pending[key]
+        else:
+            self._pending[key] = (element, operation)
+        # reads in the block see what it wrote.
+        if operation in (None, "delete"):
+            self.discard(element)
+        else:
+            self.add(element)
+        return True
+
+    def _batches(self, pending: dict) -> list[tuple[str, Any]]:
+        """The pending writes as one collection per operation and kind of element."""
+        from .BaseEdges import BaseEdges
+
+        groups: dict[tuple[str, bool], Any] = {}
+        for element, operation in pending.values():
+            collection_type = element._collection()
+            edges = issubclass(collection_type, BaseEdges)
+            # a replace is a delete in its own batch and a create with the rest.
+            keys = [(operation, edges)]
+            if operation == "replace":
+                keys.append(("create", edges))
+            for key in keys:
+                if key not in groups:
+                    groups[key] = collection_type()
+                groups[key].add(element)
+        return [
+            ("delete" if key[0] == "replace" else key[0], groups[key])
+            for key in _FLUSH_ORDER
+            if key in groups
+        ]
+
+    def _begin(self):
+        """A started transaction and the g to write with, (None, g) without one."""
+        if self.transactional is False or self._transactions is False:
+            return None, self.g
+        try:
+            transaction = self.g.tx()
+            return transaction, transaction.begin()
+        except Exception as error:
+            if self.transactional:
+                raise
+            logger.debug("writing without a transaction: %r", error)
+            self._transactions = False
+            return None, self.g
+
+    @staticmethod
+    def _close(transaction) -> None:
+        # commit()/rollback() only give the session's connection back when they
+        # succeed, a failed one would leak it and its thread pool.
+        if transaction.is_open():
+            transaction.close()
+
+    def _commit(self, transaction) -> None:
+        try:
+            transaction.commit()
+        except Exception as error:
+            self._close(transaction)
+            if self.transactional or not _unsupported(error):
+                raise
+            # every write was applied as it was sent, there's nothing to commit.
+            logger.debug("the graph doesn't support transactions: %r", error)
+            self._transactions = False
+        else:
+            self._transactions = True
+
+    def _failed(
+        self, transaction, pending: dict, sent: list, error: BaseException
+    ) -> None:
+        """Put back the writes a failed flush didn't make.
+
+        Args:
+            transaction: The flush's transaction, None when it wrote without one.
+            pending (dict): What the flush set out to write.
+            sent (list): (operation, collection) of the batches sent, the last
+                one is the one that failed.
+            error (BaseException): What the flush raised.
+        """
+        if transaction is not None:
+            try:
+                transaction.rollback()
+            except Exception:
+                logger.debug("rolling back failed", exc_info=True)
+                self._close(transaction)
+        else:
+            # nothing's rolled back, what went through mustn't be sent again.
+            pending = dict(pending)
+            last = len(sent) - 1
+            for index, (operation, collection) in enumerate(sent):
+                failed: set[str] = set()
+                if index == last:
+                    if not isinstance(error, BulkOperationError):
+                        break
+                    # the chunks of the failed batch that did go through.
+                    failed = {str(id) for id in error.failed_ids}
+                for element in collection:
+                    key = (element.__class__, str(element.id))
+                    if key[1] in failed:
+                        continue
+                    if pending[key][1] == "replace" and operation == "delete":
+                        # deleted, still to be created again.
+                        pending[key] = (element, "create")
+                    else:
+                        pending.pop(key)
+        # written since are newer, they win.
+        self._pending = {**pending, **self._pending}
+
+    def flush(self) -> None:
+        """Send the pending writes now rather than on exit."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        self._flushing = True
+        transaction, sent = None, []
+        try:
+            transaction, g = self._begin()
+            for operation, collection in self._batches(pending):
+                sent.append((operation, collection))
+                getattr(collection, operation)(g)
+            if transaction is not None:
+                self._commit(transaction)
+        except BaseException as error:
+            self._failed(transaction, pending, sent, error)
+            raise
+        finally:
+            self._flushing = False
+
+    async def aflush(self) -> None:
+        """Awaitable `flush()`."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        self._flushing = True
+        transaction, sent = None, []
+        try:
+            transaction, g = self._begin()
+            for operation, collection in self._batches(pending):
+                sent.append((operation, collection))
+                await getattr(collection, "a" + operation)(g)
+            if transaction is not None:
+                self._commit(transaction)
+        except BaseException as error:
+            self._failed(transaction, pending, sent, error)
+            raise
+        finally:
+            self._flushing = False
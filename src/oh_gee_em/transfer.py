@@ -0,0 +1,452 @@
+"""streaming bulk transfer between files and the graph, what the CLI runs.
+
+`import_rows()` validates rows into a model class and creates them a window of
+chunks at a time, so memory stays flat however big the file is and a run that
+stopped part way can pick up from the `Checkpoint` of the last window written.
+`export_elements()` goes the other way, writing a page of elements at a time in id
+order and checkpointing the id cursor, `export_split()` splits the ids between
+workers writing a file each.
+"""
+from __future__ import annotations
+
+import csv
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import TextIO
+from uuid import UUID
+from uuid import uuid4
+from uuid import uuid5
+
+from gremlin_python.process.graph_traversal import GraphTraversalSource
+from gremlin_python.process.traversal import P
+from gremlin_python.process.traversal import T
+from pydantic import ValidationError
+
+from .instrumentation import operation
+from .instrumentation import recorded
+from .instrumentation import round_trip
+
+
+if TYPE_CHECKING:
+    from .BaseElement import BaseElement
+
+
+logger = logging.getLogger(__name__)  # pragma: no cover
+
+FORMATS = ("csv", "jsonl")
+
+
+def load_model(path: str) -> type[BaseElement]:
+    """The model class at "package.module:Class" (or "package.module.Class").
+
+    Raises:
+        ValueError: path doesn't name a BaseVertex/BaseEdge subclass.
+    """
+    from .BaseElement import BaseElement
+
+    module_name, _, class_name = path.rpartition(":" if ":" in path else ".")
+    if not module_name:
+        raise ValueError(f"{path!r} isn't a module:Class path")
+    try:
+        model = getattr(importlib.import_module(module_name), class_name)
+    except (ImportError, AttributeError) as error:
+        raise ValueError(f"can't load {path!r}: {error}") from None
+    if not (isinstance(model, type) and issubclass(model, BaseElement)):
+        raise ValueError(f"{path!r} isn't a BaseVertex/BaseEdge subclass")
+    return model
+
+
+def format_of(name: str | None, default: str = "jsonl") -> str:
+    """The format a file name's extension says, default when it doesn't say."""
+    extension = os.path.splitext(name or "")[1].lstrip(".").lower()
+    if extension == "json":
+        return "jsonl"
+    return extension if extension in FORMATS else default
+
+
+def read_rows(file: TextIO, format: str) -> Iterator[dict[str, Any]]:
+    """Rows of a CSV (with a header) or JSONL file as dicts, one at a time.
+
+    Empty CSV cells are left out rather than read as "", so optional fields get
+    their defaults. Blank JSONL lines are skipped.
+    """
+    if format == "csv":
+        for row in csv.DictReader(file):
+            yield {key: value for key, value in row.items() if value != ""}
+    elif format == "jsonl":
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f"format must be one of {FORMATS}, not {format!r}")
+
+
+class Checkpoint:
+    """How far a transfer got, kept in a small JSON file between runs.
+
+    Saved by writing a temporary file and renaming it over the old one, so a run
+    killed mid save leaves the previous checkpoint intact.
+
+    Args:
+        path (str | os.PathLike): The checkpoint file, needn't exist yet.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = os.fspath(path)
+
+    def load(self) -> dict[str, Any]:
+        """What was last saved, {} before the first save."""
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def save(self, **state) -> None:
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        os.replace(temporary, self.path)
+
+
+@dataclass
+class TransferProgress:
+    """Running totals of a transfer.
+
+    Args:
+        rows (int): Rows read so far, resumed ones included.
+        written (int): Elements sent to (or read from) the db this run.
+        errors (int): Rows that failed validation this run.
+        requests (int): Round trips to the db this run.
+        seconds (float): Time since this run started.
+    """
+
+    rows: int = 0
+    written: int = 0
+    errors: int = 0
+    requests: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Elements written per second."""
+        return self.written / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.rows} rows, {self.written} written ({self.rate:,.0f}/s), "
+            f"{self.requests} round trips, {self.errors} errors"
+        )
+
+
+def import_rows(
+    g: GraphTraversalSource,
+    model: type[BaseElement],
+    rows: Iterable[dict[str, Any]],
+    batch_size: int = 500,
+    max_concurrency: int = 1,
+    skip: int = 0,
+    checkpoint: Checkpoint | None = None,
+    on_error: Callable[[int, dict, ValidationError], None] | None = None,
+    on_progress: Callable[[TransferProgress], None] | None = None,
+) -> TransferProgress:
+    """Validate rows into model and create them, a window of chunks at a time.
+
+    Rows are read batch_size * max_concurrency at a time and created with that
+    many chunks in flight, so memory is bound by the window rather than the
+    input. After each window the rows done are saved to checkpoint. Creates are
+    merges on the id, so a window sent again on a resume doesn't duplicate rows
+    with an id column. With a checkpoint, rows without one get an id derived from
+    their row number and a namespace saved in the checkpoint, so they keep the
+    same id on a resume too. Without a checkpoint they get a random one.
+
+    Args:
+        g (GraphTraversalSource): The GraphTraversalSource to create in.
+        model (type[BaseElement]): The class each row is validated as.
+        rows (Iterable[dict]): The rows, e.g. from `read_rows()`.
+        batch_size (int, optional): Elements per traversal. Defaults to 500.
+        max_concurrency (int, optional): Chunks in flight at once. Defaults to 1.
+        skip (int, optional): Rows at the start of rows to skip over, a checkpoint
+            that got further wins. Defaults to 0.
+        checkpoint (Checkpoint, optional): Resume from and record the rows done.
+        on_error (Callable, optional): Called with (row number, row, error) for
+            each row that doesn't validate, they're skipped either way.
+        on_progress (Callable, optional): Called with the totals after each window.
+
+    Raises:
+        BulkOperationError: Chunks of a window couldn't be created, the checkpoint
+            is left at the window before.
+
+    Returns:
+        TransferProgress: the totals at the end.
+    """
+    namespace = None
+    if checkpoint is not None:
+        # the checkpoint holds how far into rows it got, skipped ones included.
+        state = checkpoint.load()
+        skip = max(skip, state.get("rows", 0))
+        namespace = UUID(state.get("id_namespace") or str(uuid4()))
+    progress = TransferProgress(rows=skip)
+    start = time.perf_counter()
+
+    def flush(window) -> None:
+        if window:
+            # counted here rather than by a listener, which would count every
+            # other thread's round trips too.
+            with recorded("transfer.import_rows", model) as sent:
+                window.create(g, max_concurrency=max_concurrency)
+            progress.requests += sent.event.requests
+            progress.written += len(window)
+        if checkpoint is not None:
+            checkpoint.save(rows=progress.rows, id_namespace=str(namespace))
+        progress.seconds = time.perf_counter() - start
+        if on_progress is not None:
+            on_progress(progress)
+
+    def new_window():
+        window = model._collection()()
+        window._batch_size = batch_size
+        return window
+
+    window = new_window()
+    for row in islice(rows, skip, None):
+        progress.rows += 1
+        element = row
+        if namespace is not None and "id" not in row:
+            element = {**row, "id": uuid5(namespace, str(progress.rows))}
+        try:
+            window.add(model.model_validate(element))
+        except ValidationError as error:
+            progress.errors += 1
+            if on_error is not None:
+                on_error(progress.rows, row, error)
+        if len(window) >= batch_size * max_concurrency:
+            flush(window)
+            window = new_window()
+    flush(window)
+    return progress
+
+
+def _dump_id(id: Any) -> Any:
+    # ids go into checkpoints as they came from the db, the cursor has to compare
+    # like for like with the graph's ids (e.g. UUID's on tinkergraph).
+    return {"uuid": str(id)} if isinstance(id, UUID) else id
+
+
+def _load_id(id: Any) -> Any:
+    return UUID(id["uuid"]) if isinstance(id, dict) else id
+
+
+def _row_writer(output: TextIO, format: str, model: type[BaseElement]):
+    """A function writing one element to output as a CSV/JSONL row."""
+    if format == "jsonl":
+
+        def write_jsonl(element: BaseElement) -> None:
+            output.write(element.model_dump_json() + "\n")
+
+        return write_jsonl
+    if format != "csv":
+        raise ValueError(f"format must be one of {FORMATS}, not {format!r}")
+    columns = [*model.model_fields, *model.model_computed_fields]
+    writer = csv.DictWriter(output, fieldnames=columns)
+    if not output.seekable() or output.tell() == 0:
+        writer.writeheader()
+
+    def write_csv(element: BaseElement) -> None:
+        row = element.model_dump(mode="json")
+        writer.writerow(
+            {
+                key: json.dumps(value) if isinstance(value, (list, dict)) else value
+                for key, value in row.items()
+            }
+        )
+
+    return write_csv
+
+
+def export_elements(
+    g: GraphTraversalSource,
+    model: type[BaseElement],
+    output: TextIO,
+    format: str = "jsonl",
+    page_size: int = 1000,
+    after: Any = None,
+    until: Any = None,
+    checkpoint: Checkpoint | None = None,
+    on_progress: Callable[[TransferProgress], None] | None = None,
+) -> TransferProgress:
+    """Write every element with model's label to output, a page at a time.
+
+    Pages are read in id order with a cursor on the last id, as `stream()` does,
+    and written as they come so only one page is held in memory. After each page
+    the cursor and how much of output was written are saved to checkpoint. When
+    resuming, output is cut back to that size first, so rows written after the
+    last save aren't repeated. output has to be seekable to resume.
+
+    Args:
+        g (GraphTraversalSource): The GraphTraversalSource to read from.
+        model (type[BaseElement]): The class to export, e.g. Person.
+        output (TextIO): Where rows are written, opened with newline="" for CSV.
+        format (str, optional): "csv" or "jsonl". Defaults to "jsonl".
+        page_size (int, optional): Elements per round trip. Defaults to 1000.
+        after (optional): Only export elements with an id after this one.
+        until (optional): Only export elements with an id up to this one.
+        checkpoint (Checkpoint, optional): Resume from and record the cursor.
+        on_progress (Callable, optional): Called with the totals after each page.
+
+    Returns:
+        TransferProgress: the totals at the end.
+    """
+    progress = TransferProgress()
+    state = {} if checkpoint is None else checkpoint.load()
+    if state:
+        after = _load_id(state["after"])
+        progress.rows = state["rows"]
+        output.seek(state["bytes"])
+        output.truncate()
+        if state.get("done"):
+            return progress
+    write = _row_writer(output, format, model)
+    start = time.perf_counter()
+
+    def save(**done) -> None:
+        output.flush()
+        if checkpoint is not None:
+            checkpoint.save(
+                after=_dump_id(after), rows=progress.rows, bytes=output.tell(), **done
+            )
+
+    while True:
+        with operation("transfer.export_elements", model):
+            query = model._page_query(g, page_size, after=after, until=until)
+            with round_trip(query):
+                page = query.to_list()
+            elements = model._from_page(page)
+        progress.requests += 1
+        for element in elements:
+            write(element)
+        progress.rows += len(elements)
+        progress.written += len(elements)
+        progress.seconds = time.perf_counter() - start
+        if page:
+            after = page[-1][T.id]
+        if len(page) < page_size:
+            break
+        save()
+        if on_progress is not None:
+            on_progress(progress)
+    save(done=True)
+    if on_progress is not None:
+        on_progress(progress)
+    return progress
+
+
+def split_points(
+    g: GraphTraversalSource, model: type[BaseElement], parts: int, after: Any = None
+) -> list[Any]:
+    """The ids splitting model's elements into parts of about the same size.
+
+    Part i is the ids after point i - 1 up to and including point i, the first
+    part starts at the lowest id (or the first one after after) and the last one
+    runs to the highest. The points are picked from one ordered id query, the db
+    sends back just the ids up to the last point rather than every id of the label.
+    """
+
+    def ids():
+        query = model._label_query(g)
+        return query if after is None else query.has(T.id, P.gt(after))
+
+    count = ids().count().next()
+    indexes = sorted({count * part // parts - 1 for part in range(1, parts)} - {-1})
+    if not indexes:
+        return []
+    points = ids().id_().order().range_(0, indexes[-1] + 1).to_list()
+    return [points[index] for index in indexes]
+
+
+def part_path(path: str, part: int) -> str:
+    """Where part of a split export goes, people.jsonl -> people.1.jsonl."""
+    root, extension = os.path.splitext(path)
+    return f"{root}.{part}{extension}"
+
+
+def export_split(
+    g: GraphTraversalSource,
+    model: type[BaseElement],
+    path: str,
+    workers: int,
+    format: str = "jsonl",
+    page_size: int = 1000,
+    after: Any = None,
+    checkpoint: Checkpoint | None = None,
+    on_progress: Callable[[TransferProgress], None] | None = None,
+) -> list[str]:
+    """`export_elements()` split by id between workers, each writing its own file.
+
+    Only elements with an id after after are exported and split between them.
+    The split points are saved to checkpoint with each worker's cursor beside it
+    (checkpoint.0, ...), so a resumed export splits the ids as the first run did.
+
+    Returns:
+        list[str]: the files written, see `part_path()`.
+    """
+    state = {} if checkpoint is None else checkpoint.load()
+    if "points" in state:
+        points = [_load_id(point) for point in state["points"]]
+    else:
+        points = split_points(g, model, workers, after)
+        if checkpoint is not None:
+            checkpoint.save(points=[_dump_id(point) for point in points])
+    bounds = list(zip([after, *points], [*points, None]))
+    paths = [part_path(path, part) for part in range(len(bounds))]
+    totals = [TransferProgress() for _ in bounds]
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def export(part: int) -> TransferProgress:
+        part_checkpoint = None
+        if checkpoint is not None:
+            part_checkpoint = Checkpoint(f"{checkpoint.path}.{part}")
+        mode = "r+" if part_checkpoint and part_checkpoint.load() else "w"
+        after, until = bounds[part]
+
+        def report(progress: TransferProgress) -> None:
+            with lock:
+                totals[part] = progress
+                if on_progress is not None:
+                    # the workers run side by side, the time is the wall time.
+                    counters = {
+                        name: sum(getattr(total, name) for total in totals)
+                        for name in ("rows", "written", "errors", "requests")
+                    }
+                    seconds = time.perf_counter() - start
+                    on_progress(TransferProgress(**counters, seconds=seconds))
+
+        with open(paths[part], mode, encoding="utf-8", newline="") as output:
+            return export_elements(
+                g,
+                model,
+                output,
+                format,
+                page_size,
+                after,
+                until,
+                part_checkpoint,
+                report,
+            )
+
+    with ThreadPoolExecutor(len(bounds)) as executor:
+        list(executor.map(export, range(len(bounds))))
+    return paths
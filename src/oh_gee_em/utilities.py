@@ -1,4 +1,19 @@
 """utilities for converting between the tinkerpop interface and the pydantic one."""
+import asyncio
+from collections.abc import Callable
+from collections.abc import Iterable
+from datetime import date
+from datetime import datetime
+from datetime import time
+from decimal import Decimal
+from itertools import islice
+from types import UnionType
+from typing import Annotated
+from typing import Any
+from typing import Literal
+from typing import Union
+from typing import get_args
+from typing import get_origin
 from uuid import UUID
 
 from gremlin_python.process.traversal import T
@@ -25,23 +40,123 @@ def enum_uuid_to_str(value: str | UUID | T) -> str | int:
     return value
 
 
-def _ftv(property_map: dict) -> dict:
-    """Takes a dictionary and tweaks to be python class friendly.
+def chunker(it, size):
+    it = iter(it)
+    return iter(lambda: tuple(islice(it, size)), ())
+
+
+# types model_dump() hands back as is in python mode.
+_PLAIN_TYPES = (
+    type(None),
+    str,
+    int,
+    float,
+    bool,
+    bytes,
+    datetime,
+    date,
+    time,
+    UUID,
+    Decimal,
+)
+
+
+def _is_plain(annotation: Any) -> bool:
+    """Is a field annotation one model_dump() would pass through untouched?
+
+    Unions, Optional's, Literal's and Annotated are looked through, anything else
+    (nested models, containers, enums, ...) isn't plain.
+    """
+    origin = get_origin(annotation)
+    if origin is Literal:
+        return True
+    if origin in (Union, UnionType, Annotated):
+        args = get_args(annotation)
+        if origin is Annotated:
+            args = args[:1]
+        return all(_is_plain(arg) for arg in args)
+    return annotation in _PLAIN_TYPES
+
+
+# types a db value already is, a field of one of these needs no coercion.
+_PRIMITIVE_TYPES = (type(None), str, int, float, bool, Any)
+
+
+def _is_primitive(annotation: Any) -> bool:
+    """Can a value from the db go into a field with this annotation unvalidated?
+
+    Unions and Optional's are looked through. Enums, UUID's, dates, Literal's,
+    Annotated (it can carry validators), containers and models all need pydantic
+    to turn what the db returned into the field's type.
+    """
+    origin = get_origin(annotation)
+    if origin in (Union, UnionType):
+        return all(_is_primitive(arg) for arg in get_args(annotation))
+    return annotation in _PRIMITIVE_TYPES
+
+
+def _is_nullable(annotation: Any) -> bool:
+    """Can a field with this annotation hold None?"""
+    if annotation in (None, type(None), Any):
+        return True
+    origin = get_origin(annotation)
+    if origin is Annotated:
+        return _is_nullable(get_args(annotation)[0])
+    if origin in (Union, UnionType):
+        return any(_is_nullable(arg) for arg in get_args(annotation))
+    return False
+
+
+def _compile_hydrator(
+    properties: Iterable[str], enum_fields: dict[Any, tuple[str, Callable]]
+) -> Callable[[dict], dict]:
+    """Build a function turning an element_map straight into model fields.
+
+    Renames the enum keys (e.g. T.id -> id) without touching the element_map, keys
+    that aren't a property of the model (e.g. T.label) are skipped.
 
     Args:
-        property_map (dict): The dictionary to tweak,
-            generally from a value_map or element_map step.
+        properties (Iterable[str]): The model fields stored as properties.
+        enum_fields (dict): element_map enum key -> (field, convert), e.g.
+            {T.id: ("id", str)}.
+
+    Returns:
+        Callable[[dict], dict]: element_map -> fields.
+    """
+    # loop over the property names rather than the element_map's keys, hashing the
+    # T/Direction enum keys an element_map has is slow.
+    properties = tuple(properties)
+    enum_fields = tuple(enum_fields.items())
+
+    def hydrate(element_map: dict) -> dict:
+        fields = {key: element_map[key] for key in properties if key in element_map}
+        for key, (field, convert) in enum_fields:
+            value = element_map.get(key)
+            if value is not None:
+                fields[field] = convert(value)
+        return fields
 
-    Raises:
-        Exception: Raised when you pass None into this since you can't pop None.
+    return hydrate
+
+
+async def _ato_list(traversal) -> list:
+    """Await all the results of a traversal.
+
+    Built on `Traversal.promise()` which sends the traversal with the remote
+    connection's `submit_async()`, the event loop just waits on the returned future.
+
+    Args:
+        traversal (Traversal): The traversal to send.
 
     Returns:
-        dict: The modified property_map which is able to be used in a class
-            via ** kwargs.
+        list: Every result of the traversal, like `to_list()`.
     """
-    if property_map is None:
-        raise Exception("'None' is not of type 'dict'")
+    return await asyncio.wrap_future(traversal.promise(lambda t: t.to_list()))
+
 
-    property_map[T.id.name] = str(property_map.pop(T.id, None))
-    property_map[T.label.name] = property_map.pop(T.label, None)
-    return property_map
+async def _anext(traversal, default=None):
+    """Await the first result of a traversal, or default if there wasn't one."""
+    results = await _ato_list(traversal)
+    if not results:
+        return default
+    return results[0]
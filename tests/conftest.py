@@ -1,15 +1,36 @@
+import os
+import threading
+from concurrent.futures import Future
+
 import pytest
-from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
+from gremlin_python.driver.remote_connection import RemoteConnection
+from gremlin_python.driver.remote_connection import RemoteTraversal
 from gremlin_python.process.anonymous_traversal import traversal
 from gremlin_python.process.graph_traversal import GraphTraversalSource
+from gremlin_python.process.traversal import T
+from gremlin_python.process.traversal import TraversalStrategies
+from gremlin_python.process.traversal import Traverser
+from gremlin_python.structure.graph import Graph
+
+from oh_gee_em import ConnectionManager
+from oh_gee_em import ConnectionSettings
+from oh_gee_em.memory import MemoryConnection
+
+
+# "memory" runs the db tests in process, "server" against the tinkergraph_dev_server.
+BACKEND = os.environ.get("OH_GEE_EM_TEST_BACKEND", "memory")
 
 
 @pytest.fixture(scope="session")
 def g() -> GraphTraversalSource:
-    url = "ws://localhost:8182/gremlin"
-    remoteConn = DriverRemoteConnection(url, "g")
+    if BACKEND == "memory":
+        remoteConn = MemoryConnection()
+        g = traversal().with_remote(remoteConn)
+    else:
+        # OH_GEE_EM_URL etc., the tinkergraph_dev_server by default.
+        remoteConn = ConnectionManager(ConnectionSettings.from_env())
+        g = remoteConn.g
 
-    g = traversal().with_remote(remoteConn)
     yield g
     remoteConn.close()
 
@@ -22,3 +43,84 @@ def reset(g) -> None:
 @pytest.fixture(params=[10])
 def count(request) -> None:
     return request.param
+
+
+class EchoConnection(RemoteConnection):
+    """Stand-in server for mergeV() writes.
+
+    Answers a single mergeV() or an inject(rows).unfold().mergeV() bulk write with
+    the element_map's of what it was sent, so writes can be tested without a
+    gremlin server. Writes holding an id in `fail_ids` raise instead, as do bulk
+    writes of more than `max_rows` like an oversized request would. A write
+    holding an id in `conflicts` fails with a ConcurrentModificationException
+    that many times before going through. What was
+    written is kept, so a g.V(ids).elementMap() read gets it back.
+    """
+
+    def __init__(self):
+        super().__init__("echo://", "g")
+        self.fail_ids = set()
+        self.max_rows = None
+        self.conflicts = {}
+        self.requests = []
+        self.elements = {}
+        self._lock = threading.Lock()
+
+    def submit(self, bytecode):
+        step, *args = bytecode.step_instructions[0]
+        if step == "V":
+            ids = [
+                id for arg in args for id in (arg if isinstance(arg, list) else [arg])
+            ]
+            with self._lock:
+                self.requests.append(ids)
+            results = [dict(self.elements[id]) for id in ids if id in self.elements]
+            return RemoteTraversal(iter([Traverser(result) for result in results]))
+        if step == "inject":
+            rows = args[0]
+        else:
+            options = [
+                instruction[2] for instruction in bytecode.step_instructions[1:-1]
+            ]
+            rows = [{"match": args[0], "update": options[0]}]
+        with self._lock:
+            self.requests.append(rows)
+        if self.max_rows is not None and len(rows) > self.max_rows:
+            raise Exception(f"Max frame length of {self.max_rows} has been exceeded.")
+
+        with self._lock:
+            for row in rows:
+                if self.conflicts.get(row["match"][T.id]):
+                    self.conflicts[row["match"][T.id]] -= 1
+                    raise Exception(
+                        "ConcurrentModificationException: Operation failed due to "
+                        "conflicting concurrent operations."
+                    )
+
+        results = []
+        for row in rows:
+            if row["match"][T.id] in self.fail_ids:
+                raise Exception(f"echo failed for {row['match'][T.id]}")
+            props = row.get("create", row.get("update", {}))
+            result = {T.label: "vertex", **props, **row["match"]}
+            self.elements[row["match"][T.id]] = dict(result)
+            results.append(result)
+        return RemoteTraversal(iter([Traverser(result) for result in results]))
+
+    def submit_async(self, bytecode):
+        future = Future()
+        try:
+            future.set_result(self.submit(bytecode))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+
+@pytest.fixture
+def echo() -> EchoConnection:
+    return EchoConnection()
+
+
+@pytest.fixture
+def echo_g(echo) -> GraphTraversalSource:
+    return GraphTraversalSource(Graph(), TraversalStrategies(), None, echo)
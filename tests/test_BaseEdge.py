@@ -0,0 +1,127 @@
+from uuid import uuid4
+
+import pytest
+from gremlin_python.process.graph_traversal import GraphTraversalSource
+from gremlin_python.process.traversal import Direction
+from gremlin_python.process.traversal import T
+from gremlin_python.process.traversal import TraversalStrategies
+from gremlin_python.structure.graph import Graph
+
+from .test_utilities import Acquaintances
+from .test_utilities import Knows
+from .test_utilities import People
+from .test_utilities import Person
+
+
+@pytest.fixture
+def fred() -> Person:
+    return Person(id=uuid4(), name="fred", age=22, sex="m")
+
+
+@pytest.fixture
+def ron() -> Person:
+    return Person(id=uuid4(), name="ron", age=40, sex="m")
+
+
+@pytest.fixture
+def knows(fred, ron) -> Knows:
+    return Knows(out_v=fred, in_v=ron.id, since=2001)
+
+
+@pytest.fixture
+def crowd(count) -> tuple[People, Acquaintances]:
+    people = People({Person(id=uuid4(), name="x", age=i) for i in range(count)})
+    ordered = list(people)
+    return people, Acquaintances(
+        {Knows(out_v=a, in_v=b, since=1) for a, b in zip(ordered, ordered[1:])}
+    )
+
+
+# ---------------------------------------------------------------------------- #
+#                                 LOCAL TESTS                                  #
+# ---------------------------------------------------------------------------- #
+def test_base_edge_endpoints(knows, fred, ron) -> None:
+    assert knows.label == "knows"
+    assert knows.out_v == fred.id
+    assert knows.in_v == ron.id
+    # endpoints identify the edge, they aren't properties.
+    assert knows.dirty_fields == {"since"}
+    assert knows.dump_props() == {T.label: "knows", "since": 2001, "note": None}
+    assert knows._merge_map() == {
+        T.id: knows.id,
+        T.label: "knows",
+        Direction.OUT: fred.id,
+        Direction.IN: ron.id,
+    }
+
+
+def test_base_edge_load(knows, fred, ron) -> None:
+    knows._load(
+        {
+            T.id: knows.id,
+            T.label: "knows",
+            Direction.OUT: {T.id: fred.id, T.label: "person"},
+            Direction.IN: {T.id: ron.id, T.label: "person"},
+            "since": 1999,
+        }
+    )
+    assert knows.since == 1999
+    assert knows.out_v == fred.id
+    assert knows.in_v == ron.id
+    assert knows.dirty_fields == set()
+
+
+def test_base_edges_bulk_traversal(knows) -> None:
+    g = GraphTraversalSource(Graph(), TraversalStrategies())
+    edges = Acquaintances({knows})
+    steps = edges._create_traversal(g, (knows,)).bytecode.step_instructions
+    assert [step[0] for step in steps] == [
+        "inject",
+        "unfold",
+        "mergeE",
+        "option",
+        "elementMap",
+    ]
+    assert steps[0][1] == [{"match": knows._merge_map(), "create": {"since": 2001}}]
+
+
+# ---------------------------------------------------------------------------- #
+#                                   DB TESTS                                   #
+# ---------------------------------------------------------------------------- #
+def test_base_edge_crud(g, reset, knows, fred, ron) -> None:
+    fred.create(g)
+    ron.create(g)
+
+    knows.create(g)
+    assert g.V(fred.id).out("knows").id_().next() == ron.id
+
+    loaded = Knows.get_edge(g, knows.id)
+    assert loaded.out_v == fred.id
+    assert loaded.in_v == ron.id
+    assert loaded.since == 2001
+
+    loaded.note = "met at work"
+    loaded.save(g)
+    assert g.E(knows.id).values("note").next() == "met at work"
+    assert g.E(knows.id).values("since").next() == 2001
+
+    loaded.delete(g)
+    assert Knows.get_edge(g, knows.id) is None
+
+
+@pytest.mark.parametrize("count", [50])
+def test_base_edges_create_save_delete(g, reset, count, crowd) -> None:
+    people, edges = crowd
+    edges._batch_size = 10
+    people.create(g)
+    edges.create(g)
+    assert g.E().has_label("knows").count().next() == count - 1
+
+    for edge in edges:
+        edge.since = 2020
+    edges.save(g)
+    assert set(g.E().has_label("knows").values("since").to_list()) == {2020}
+
+    assert edges.delete(g) == count - 1
+    assert g.E().count().next() == 0
+    assert g.V().count().next() == count
@@ -1,8 +1,19 @@
+import asyncio
 import random
 import uuid
 
 import names
 import pytest
+from gremlin_python.process.graph_traversal import GraphTraversalSource
+from gremlin_python.process.traversal import P
+from gremlin_python.process.traversal import T
+from gremlin_python.process.traversal import TraversalStrategies
+from gremlin_python.structure.graph import Graph
+
+from oh_gee_em import AdaptiveBatcher
+from oh_gee_em import BaseVertex
+from oh_gee_em.BaseElements import chunker
+from oh_gee_em.exceptions import BulkOperationError
 
 from .test_utilities import People
 from .test_utilities import Person
@@ -47,6 +58,185 @@ def local_random_people(count) -> Person:
     return People(people_set)
 
 
+# ---------------------------------------------------------------------------- #
+#                                CONTAINER TESTS                               #
+# ---------------------------------------------------------------------------- #
+def test_base_vertices_getitem_by_id(local_people) -> None:
+    for person in local_people:
+        assert local_people[person.id] is person
+        assert local_people[uuid.UUID(person.id)] is person
+        assert person in local_people
+        assert person.id in local_people
+
+    with pytest.raises(KeyError):
+        local_people[str(uuid.uuid4())]
+    assert local_people.get(str(uuid.uuid4())) is None
+
+
+def test_base_vertices_add_keeps_insertion_order() -> None:
+    people = People(set())
+    added = [random_person() for _ in range(50)]
+    for person in added:
+        people.add(person)
+
+    assert [person.id for person in people] == [person.id for person in added]
+    assert len(people) == 50
+
+    # re-adding an id replaces the vertex instead of duplicating it
+    replacement = Person(id=added[0].id, name="replacement", age=1)
+    people.add(replacement)
+    assert len(people) == 50
+    assert people[added[0].id] is replacement
+
+
+def test_base_vertices_reconcile(local_people) -> None:
+    rows = [
+        {T.id: person.id, T.label: person.label, "name": "reconciled", "age": 1}
+        for person in local_people
+    ]
+    # results for vertices that aren't in this collection are ignored
+    rows.append({T.id: str(uuid.uuid4()), T.label: "person", "name": "stray"})
+    local_people._reconcile(rows)
+
+    assert len(local_people) == 3
+    for person in local_people:
+        assert person.name == "reconciled"
+        assert person.age == 1
+
+
+def test_base_vertices_save_skips_clean(local_people) -> None:
+    local_people._reconcile(
+        [{T.id: person.id, T.label: person.label} for person in local_people]
+    )
+    assert all(not person.dirty_fields for person in local_people)
+    # nothing is dirty so there is nothing to send to the db.
+    assert local_people.save(None) is local_people
+
+
+@pytest.mark.parametrize("bulk_mode", ["inject", "chain"])
+def test_base_vertices_bulk_traversal_size(bulk_mode) -> None:
+    """inject mode bytecode doesn't grow with the chunk, chain mode does."""
+    g = GraphTraversalSource(Graph(), TraversalStrategies())
+    sizes = set()
+    for count in (1, 10, 500):
+        people = People({random_person() for _ in range(count)})
+        people._bulk_mode = bulk_mode
+        chunk = tuple(people)
+        sizes.add(len(people._create_traversal(g, chunk).bytecode.step_instructions))
+        for person in people:
+            person.sex = None
+        sizes.add(len(people._save_traversal(g, chunk).bytecode.step_instructions))
+
+    if bulk_mode == "inject":
+        # create and save with dropped properties, no matter how many vertices.
+        assert len(sizes) == 2
+    else:
+        assert len(sizes) > 2
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 4])
+def test_base_vertices_dispatch(echo, echo_g, max_concurrency) -> None:
+    people = People({random_person() for _ in range(95)})
+    people._batch_size = 10
+    people.create(echo_g, max_concurrency=max_concurrency)
+
+    assert len(echo.requests) == 10
+    assert all(not person.dirty_fields for person in people)
+    assert all(person.label == "person" for person in people)
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 4])
+def test_base_vertices_dispatch_failures(echo, echo_g, max_concurrency) -> None:
+    people = People({random_person() for _ in range(95)})
+    people._batch_size = 10
+    chunks = list(chunker(people, 10))
+    echo.fail_ids = {chunks[7][0].id, chunks[2][3].id}
+
+    with pytest.raises(BulkOperationError) as error:
+        people.create(echo_g, max_concurrency=max_concurrency)
+
+    # every chunk is still attempted, failures are reported in chunk order.
+    assert len(echo.requests) == 10
+    assert [failure.chunk for failure in error.value.failures] == [2, 7]
+    assert error.value.failed_ids == [person.id for person in chunks[2] + chunks[7]]
+    for index, chunk in enumerate(chunks):
+        failed = index in (2, 7)
+        assert all(bool(person.dirty_fields) is failed for person in chunk)
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 4])
+def test_base_vertices_async(echo, echo_g, max_concurrency) -> None:
+    people = People({random_person() for _ in range(95)})
+    people._batch_size = 10
+    asyncio.run(people.acreate(echo_g, max_concurrency=max_concurrency))
+    assert len(echo.requests) == 10
+    assert all(not person.dirty_fields for person in people)
+
+    for person in list(people)[:15]:
+        person.name = "async_name"
+    asyncio.run(people.asave(echo_g, max_concurrency=max_concurrency))
+    # only the two chunks worth of dirty vertices were sent.
+    assert len(echo.requests) == 12
+    assert all(not person.dirty_fields for person in people)
+
+    echo.fail_ids = {person.id for person in list(people)[:15]}
+    for person in people:
+        person.age = 1
+    with pytest.raises(BulkOperationError) as error:
+        asyncio.run(people.asave(echo_g, max_concurrency=max_concurrency))
+    assert [failure.chunk for failure in error.value.failures] == [0, 1]
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 4])
+def test_base_vertices_adaptive_batcher(echo, echo_g, max_concurrency) -> None:
+    people = People({random_person() for _ in range(200)})
+    echo.max_rows = 30
+    batcher = AdaptiveBatcher(size=100, target_latency=60)
+    people.create(echo_g, max_concurrency=max_concurrency, batcher=batcher)
+
+    # oversized chunks were halved until the server took them, and stayed small.
+    assert all(not person.dirty_fields for person in people)
+    assert batcher.splits > 0
+    assert batcher.max_size <= 30
+    assert sum(batcher.sizes) == 200
+    assert max(batcher.sizes) <= 30
+
+    for person in people:
+        person.age = 1
+    asyncio.run(people.asave(echo_g, max_concurrency=max_concurrency, batcher=batcher))
+    assert all(not person.dirty_fields for person in people)
+    assert batcher.report()["chunks"] == len(batcher.sizes)
+
+    # errors that a smaller chunk doesn't help with aren't retried.
+    echo.fail_ids = {next(iter(people)).id}
+    for person in people:
+        person.age = 2
+    with pytest.raises(BulkOperationError) as error:
+        people.save(echo_g, batcher=batcher)
+    assert len(error.value.failures) == 1
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_base_vertices_batcher_split_failure(echo, echo_g, asynchronous) -> None:
+    people = People({random_person() for _ in range(100)})
+    echo.max_rows = 30
+    failing = next(iter(people))
+    echo.fail_ids = {failing.id}
+    batcher = AdaptiveBatcher(size=100, target_latency=60)
+    with pytest.raises(BulkOperationError) as error:
+        if asynchronous:
+            asyncio.run(people.acreate(echo_g, batcher=batcher))
+        else:
+            people.create(echo_g, batcher=batcher)
+
+    # 100 -> 50 -> 25, only the quarter holding the failing id is reported...
+    failed = set(error.value.failed_ids)
+    assert failing.id in failed
+    assert len(failed) == 25
+    # ...and the pieces that went through were reconciled.
+    assert {person.id for person in people if person.dirty_fields} == failed
+
+
 # ---------------------------------------------------------------------------- #
 #                              @CLASS METHOD TESTS                             #
 # ---------------------------------------------------------------------------- #
@@ -107,3 +297,54 @@ def test_base_vertices_save_drop_x(g, reset, count, local_random_people) -> None
         assert next(g.V(person.id).properties("name").value(), None) == "new_bulk_name"
         assert next(g.V(person.id).properties("age").value(), None) == 69
         assert next(g.V(person.id).properties("sex").value(), None) is None
+
+
+@pytest.mark.parametrize("count", [25])
+def test_base_vertices_delete(g, reset, count, local_random_people) -> None:
+    local_random_people.create(g)
+    local_random_people._batch_size = 10
+
+    assert local_random_people.delete(g) == count
+    assert g.V().count().next() == 0
+    # nothing left to remove the second time round.
+    assert local_random_people.delete(g) == 0
+
+
+@pytest.mark.parametrize("count", [25])
+def test_base_vertices_delete_all(g, reset, count, local_random_people) -> None:
+    local_random_people.create(g)
+    other = BaseVertex.create_vertex(g)
+    old_people = sum(1 for person in local_random_people if person.age > 100)
+
+    assert Person.delete_all(g, where={"age": P.gt(100)}, batch_size=10) == old_people
+    assert Person.delete_all(g, batch_size=10) == count - old_people
+    assert g.V().has_label("person").count().next() == 0
+    assert g.V(other.id).has_next()
+
+
+@pytest.mark.parametrize("count", [25])
+def test_base_vertex_stream(g, reset, count, local_random_people) -> None:
+    local_random_people.create(g)
+    BaseVertex.create_vertex(g)
+
+    streamed = list(Person.stream(g, page_size=10))
+    assert len(streamed) == count
+    assert {person.id for person in streamed} == {
+        person.id for person in local_random_people
+    }
+    assert all(not person.dirty_fields for person in streamed)
+
+    old_people = Person.stream(g, page_size=4, where={"age": P.gt(100)})
+    assert sorted(person.id for person in old_people) == sorted(
+        person.id for person in local_random_people if person.age > 100
+    )
+
+
+@pytest.mark.parametrize("count", [25])
+def test_base_vertex_astream(g, reset, count, local_random_people) -> None:
+    local_random_people.create(g)
+
+    async def collect():
+        return [person async for person in Person.astream(g, page_size=10)]
+
+    assert len(asyncio.run(collect())) == count
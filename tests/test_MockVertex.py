@@ -1,9 +1,12 @@
 """Test cases for the __main__ module."""
+import asyncio
 from uuid import uuid4
 
 import pytest
+from gremlin_python.process.traversal import T
 
 from oh_gee_em import BaseVertex
+from oh_gee_em import MetricsRecorder
 
 
 class Person(BaseVertex):
@@ -56,6 +59,88 @@ def test_mock_person_get_or_create_vertex_2(g, reset) -> None:
     assert fred2.sex == "m"
 
 
+def test_mock_person_get_vertices(echo, echo_g) -> None:
+    """test ids are fetched in batches and missing ids are reported"""
+    people = [Person(id=uuid4(), name="fred", age=age) for age in range(25)]
+    for person in people:
+        person.create(echo_g)
+    echo.requests.clear()
+
+    missing = str(uuid4())
+    ids = [person.id for person in reversed(people)] + [missing, people[0].id]
+    found = Person.get_vertices(echo_g, ids, batch_size=10)
+    # 26 unique ids in 10 id batches
+    assert len(echo.requests) == 3
+    assert [person.id for person in found] == ids[:25]
+    assert all(isinstance(person, Person) for person in found)
+    assert found[people[3].id].age == 3
+    assert found.missing_ids == [missing]
+
+    found = asyncio.run(Person.aget_vertices(echo_g, ids, batch_size=100))
+    assert len(echo.requests) == 4
+    assert len(found) == 25
+    assert found.missing_ids == [missing]
+
+
+def test_mock_person_get_vertices_live(g, reset) -> None:
+    fred = Person.create_vertex(g, name="fred", age=22, sex="m")
+    missing = str(uuid4())
+    found = Person.get_vertices(g, [fred.id, missing])
+    assert found[fred.id].name == "fred"
+    assert found.missing_ids == [missing]
+
+
+def test_mock_person_get_vertices_fields(g, reset) -> None:
+    ids = [Person(name=name, age=22).create(g).id for name in "abc"]
+    found = Person.get_vertices(g, ids, fields=["name"])
+    first, *others = found
+    assert first.unloaded_fields == {"age", "sex"}
+    assert "age" not in first.__dict__
+
+    # a local change isn't overwritten by the lazy load.
+    others[0].sex = "f"
+    with MetricsRecorder() as recorder:
+        assert first.age == 22
+    (event,) = recorder.events
+    assert (event.operation, event.requests, event.elements) == (
+        "BaseElement.load_unloaded",
+        1,
+        3,
+    )
+    assert all(not person.unloaded_fields for person in found)
+    assert (first.sex, others[0].sex) == (None, "f")
+    assert others[0].dirty_fields == {"sex"}
+
+    # a save of a projected element only sends what changed.
+    person = Person.get_vertex(g, ids[1], fields=["age"])
+    person.age = 23
+    person.save(g)
+    assert Person.get_vertex(g, ids[1]).name == "b"
+    assert [p.unloaded_fields for p in Person.stream(g, fields=["age"])] == [
+        {"name", "sex"}
+    ] * 3
+    with pytest.raises(ValueError):
+        Person.get_vertex(g, ids[0], fields=["nickname"])
+
+
+def test_mock_person_projected_dump(g, reset) -> None:
+    """a projected vertex doesn't dump as a partial row"""
+    fred = Person.create_vertex(g, name="fred", age=22, sex="m")
+    person = Person.get_vertex(g, fred.id, fields=["age"])
+    assert "age=22" in repr(person)
+    assert "name=<unloaded>, sex=<unloaded>" in repr(person)
+    with pytest.raises(ValueError, match="unloaded fields"):
+        person.model_dump()
+    with pytest.raises(ValueError, match="unloaded fields"):
+        person.model_dump_json()
+    # what's left out of the dump anyway is fine.
+    assert person.model_dump(include={"age"}) == {"age": 22}
+    assert "name" not in person.model_dump(exclude={"name", "sex"})
+    person.load_unloaded()
+    assert person.model_dump()["name"] == "fred"
+    assert "<unloaded>" not in repr(person)
+
+
 def test_mock_person_delete_vertex(g, reset) -> None:
     """Test Person.delete() convenince method works."""
     fred = Person.create_vertex(g, name="fred", age=22, sex="m")
@@ -91,6 +176,17 @@ def test_mock_person_save_1(g, reset, fred) -> None:
     assert fred.sex == "m"
 
 
+def test_mock_person_save_none(g, reset, fred) -> None:
+    """a field set to None drops its property on save"""
+    fred.create(g)
+    fred.sex = None
+    fred.save(g)
+    assert fred.sex is None
+    assert fred.dirty_fields == set()
+    assert Person.get_vertex(g, id=fred.id).sex is None
+    assert g.V(fred.id).properties("sex").count().next() == 0
+
+
 def test_mock_person_save_2(g, reset, fred) -> None:
     """test local updates only pushed on .save()"""
     fred.create(g)
@@ -107,15 +203,48 @@ def test_mock_person_save_2(g, reset, fred) -> None:
     assert evil_fred.sex == "evil"
     assert fred.name == "frederick"
 
+    # only the fields fred changed are sent, everything else comes back from the db.
     fred.save(g)
     assert fred.name == "frederick"
-    assert fred.age == 22
-    assert fred.sex == "m"
+    assert fred.age == 10000
+    assert fred.sex == "evil"
     assert evil_fred.name == "evil frederick"
     assert evil_fred.age == 10000
     assert evil_fred.sex == "evil"
 
 
+def test_mock_person_dirty_fields(fred) -> None:
+    """test local changes are tracked until the db gives the vertex back"""
+    # nothing has been saved yet so everything passed in is dirty, except the id
+    assert fred.dirty_fields == {"name", "age", "sex"}
+
+    fred._load({T.id: fred.id, T.label: fred.label, "name": "fred", "age": 22})
+    assert fred.dirty_fields == set()
+    # clean vertices don't need a round trip
+    assert fred.save(None) is fred
+
+    fred.name = "frederick"
+    fred.update(age=23)
+    fred.id = str(uuid4())
+    assert fred.dirty_fields == {"name", "age"}
+    assert fred.dump_props(add_label=False, include=set(fred.dirty_fields)) == {
+        "name": "frederick",
+        "age": 23,
+    }
+
+
+def test_mock_person_async(echo, echo_g, fred) -> None:
+    """test the awaitable writes go over submit_async"""
+    asyncio.run(fred.acreate(echo_g))
+    assert fred.dirty_fields == set()
+
+    fred.name = "frederick"
+    assert asyncio.run(fred.asave(echo_g)) is fred
+    assert fred.name == "frederick"
+    assert fred.dirty_fields == set()
+    assert echo.requests[-1][0]["update"] == {"name": "frederick"}
+
+
 def test_mock_person_update(g, reset, fred) -> None:
     """test update(**dict) convenince method works"""
     fred.create(g)
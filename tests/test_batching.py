@@ -0,0 +1,72 @@
+"""Test cases for the adaptive batcher."""
+import pytest
+from gremlin_python.driver.protocol import GremlinServerError
+
+from oh_gee_em import AdaptiveBatcher
+from oh_gee_em.batching import SplitChunkError
+from oh_gee_em.batching import is_splittable
+
+
+def test_is_splittable() -> None:
+    assert is_splittable(TimeoutError())
+    assert is_splittable(Exception("Max frame length of 65536 has been exceeded."))
+    assert is_splittable(
+        GremlinServerError({"code": 598, "message": "", "attributes": {}})
+    )
+    assert not is_splittable(Exception("ConcurrentModificationException"))
+
+
+def test_batcher_chunks_by_bytes() -> None:
+    batcher = AdaptiveBatcher(size=10, max_bytes=100)
+    chunks = list(batcher.chunks(range(30), lambda element: 30))
+    # 3 elements fit in 100 bytes, well before 10 elements
+    assert [len(chunk) for chunk in chunks] == [3] * 10
+    chunks = list(batcher.chunks(range(30), lambda element: 1))
+    assert [len(chunk) for chunk in chunks] == [10] * 3
+
+
+def test_batcher_latency() -> None:
+    batcher = AdaptiveBatcher(size=100, target_latency=1.0)
+    # twice as slow as wanted halves, much faster at most doubles
+    batcher.record(100, 2.0)
+    assert batcher.size == 50
+    batcher.record(50, 0.01)
+    assert batcher.size == 100
+    # a short chunk just as fast per element says the same thing as a full one
+    batcher.record(10, 0.01)
+    assert batcher.size == 200
+    assert batcher.report()["sizes"] == [100, 50, 10]
+
+
+def test_batcher_split() -> None:
+    batcher = AdaptiveBatcher(size=8)
+    sent = []
+
+    def run(g, chunk):
+        if len(chunk) > 2:
+            raise TimeoutError()
+        sent.append(chunk)
+        return len(chunk)
+
+    assert batcher.run(run, None, tuple(range(8))) == [2, 2, 2, 2]
+    assert sent == [(0, 1), (2, 3), (4, 5), (6, 7)]
+    assert batcher.splits == 3
+    assert batcher.max_size == 2
+
+
+def test_batcher_split_failure() -> None:
+    batcher = AdaptiveBatcher(size=8)
+
+    def run(g, chunk):
+        if len(chunk) > 2:
+            raise TimeoutError()
+        if 3 in chunk:
+            raise ValueError("bad element")
+        return len(chunk)
+
+    # every piece is sent, the failed one is raised with what the others returned.
+    with pytest.raises(SplitChunkError) as error:
+        batcher.run(run, None, tuple(range(8)))
+    assert error.value.results == [2, 2, 2]
+    assert error.value.chunk == (2, 3)
+    assert isinstance(error.value.error, ValueError)
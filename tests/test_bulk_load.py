@@ -0,0 +1,103 @@
+"""Test cases for writing bulk load CSV files."""
+import csv
+from datetime import datetime
+from enum import Enum
+
+import pytest
+
+from oh_gee_em import BaseEdge
+from oh_gee_em import BaseVertex
+from oh_gee_em import BulkLoadWriter
+
+from .test_utilities import Knows
+from .test_utilities import Person
+
+
+class Color(Enum):
+    RED = "red"
+    BLUE = "blue"
+
+
+class Thing(BaseVertex):
+    name: str
+    weight: float | None = None
+    count: int = 0
+    fragile: bool = False
+    made: datetime | None = None
+    color: Color = Color.RED
+    tags: list[str] = []
+
+
+class Tagged(BaseEdge):
+    tags: list[str] = []
+
+
+def read(path) -> list[list[str]]:
+    with open(path, newline="", encoding="utf-8") as file:
+        return list(csv.reader(file))
+
+
+def test_bulk_load_headers(tmp_path) -> None:
+    thing = Thing(
+        name="box, big",
+        weight=1.5,
+        fragile=True,
+        made=datetime(2024, 1, 2, 3, 4, 5),
+        tags=["a", "b;c"],
+    )
+    with BulkLoadWriter(tmp_path) as writer:
+        writer.write(thing)
+        writer.write(Thing(name="pin"))
+    [path] = writer.paths
+    assert path == str(tmp_path / "vertices-thing-00000.csv")
+    header, *rows = read(path)
+    assert header == [
+        "~id",
+        "~label",
+        "name:String(single)",
+        "weight:Double(single)",
+        "count:Long(single)",
+        "fragile:Bool(single)",
+        "made:Date(single)",
+        "color:String(single)",
+        "tags:String[]",
+    ]
+    assert rows[0] == [
+        thing.id,
+        "thing",
+        "box, big",
+        "1.5",
+        "0",
+        "true",
+        "2024-01-02T03:04:05",
+        "red",
+        r"a;b\;c",
+    ]
+    assert rows[1][3] == ""
+
+    with pytest.raises(ValueError):
+        BulkLoadWriter(tmp_path).write(Tagged(out_v=thing, in_v=thing))
+
+
+def test_bulk_load_shards(tmp_path) -> None:
+    people = [Person(name=f"p{i}", age=i) for i in range(100)]
+    knows = [Knows(out_v=a, in_v=b, since=2000) for a, b in zip(people, people[1:])]
+    with BulkLoadWriter(tmp_path, max_bytes=2000) as writer:
+        assert writer.write_all(people + knows) == 199
+    vertex_files = [path for path in writer.paths if "vertices-person" in path]
+    edge_files = [path for path in writer.paths if "edges-knows" in path]
+    assert len(vertex_files) > 1 and len(edge_files) > 1
+    assert all(len(open(path, "rb").read()) <= 2000 for path in writer.paths)
+
+    vertex_rows = [row for path in vertex_files for row in read(path)[1:]]
+    assert [row[0] for row in vertex_rows] == [person.id for person in people]
+    header, *edge_rows = read(edge_files[0])
+    assert header == ["~id", "~from", "~to", "~label", "since:Long", "note:String"]
+    assert edge_rows[0] == [
+        knows[0].id,
+        people[0].id,
+        people[1].id,
+        "knows",
+        "2000",
+        "",
+    ]
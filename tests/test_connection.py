@@ -0,0 +1,94 @@
+import pytest
+from gremlin_python.driver import serializer
+
+from oh_gee_em import ConnectionManager
+from oh_gee_em import ConnectionSettings
+from oh_gee_em import connection
+from oh_gee_em.memory import MemoryConnection
+from oh_gee_em.memory import MemoryGraph
+
+from .test_utilities import Person
+
+
+class FlakyConnection(MemoryConnection):
+    """A memory connection whose socket can be made to break."""
+
+    def __init__(self, graph, opened):
+        super().__init__(graph)
+        self.broken = False
+        self.submitted = 0
+        opened.append(self)
+
+    def submit(self, bytecode):
+        self.submitted += 1
+        if self.broken:
+            raise ConnectionResetError("connection reset by peer")
+        return super().submit(bytecode)
+
+
+@pytest.fixture
+def opened() -> list[FlakyConnection]:
+    return []
+
+
+@pytest.fixture
+def manager(opened):
+    graph = MemoryGraph()
+    settings = ConnectionSettings(health_check_interval=None)
+    with ConnectionManager(settings, lambda _: FlakyConnection(graph, opened)) as m:
+        yield m
+
+
+def test_connection_manager_warm_up(manager, opened) -> None:
+    # connecting warmed the connection up before anything asked for g.
+    (first,) = opened
+    pool_size = manager.settings.pool_size
+    assert first.submitted == pool_size
+    Person(id="a", name="fred", age=22).create(manager.g)
+    assert manager.ping()
+    assert first.submitted == pool_size + 2
+
+
+def test_connection_manager_reconnect(manager, opened) -> None:
+    g = manager.g
+    Person(id="a", name="fred", age=22).create(g)
+    opened[0].broken = True
+    with pytest.raises(ConnectionResetError):
+        Person.get_vertex(g, "a")
+    # the same g goes through a new connection from the next request on.
+    assert Person.get_vertex(g, "a").name == "fred"
+    assert (manager.reconnects, len(opened)) == (1, 2)
+
+    manager.close()
+    with pytest.raises(RuntimeError):
+        Person.get_vertex(g, "a")
+
+
+def test_connection_settings() -> None:
+    settings = ConnectionSettings.from_env(
+        {
+            "OH_GEE_EM_URL": "ws://db:8182/gremlin",
+            "OH_GEE_EM_POOL_SIZE": "16",
+            "OH_GEE_EM_SERIALIZER": "GraphSON",
+            "OH_GEE_EM_HEALTH_CHECK_INTERVAL": "none",
+        }
+    )
+    assert (settings.url, settings.pool_size, settings.health_check_interval) == (
+        "ws://db:8182/gremlin",
+        16,
+        None,
+    )
+    assert isinstance(
+        connection.SERIALIZERS[settings.serializer](),
+        serializer.GraphSONSerializersV3d0,
+    )
+    assert isinstance(
+        connection.SERIALIZERS[ConnectionSettings().serializer](),
+        serializer.GraphBinarySerializersV1,
+    )
+    with pytest.raises(ValueError):
+        ConnectionSettings(serializer="xml")
+
+    # one manager per process and settings.
+    assert connection.manager(settings) is connection.manager(settings)
+    connection.close_all()
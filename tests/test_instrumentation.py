@@ -0,0 +1,98 @@
+import asyncio
+
+from oh_gee_em import MetricsRecorder
+from oh_gee_em import ProfileSampler
+from oh_gee_em.instrumentation import add_listener
+from oh_gee_em.instrumentation import remove_listener
+from oh_gee_em.instrumentation import set_profiler
+
+from .test_BaseVertices import random_person
+from .test_utilities import People
+from .test_utilities import Person
+
+
+def test_instrumentation_bulk(g, reset) -> None:
+    people = People({random_person() for _ in range(25)})
+    people._batch_size = 10
+    with MetricsRecorder() as recorder:
+        people.create(g, max_concurrency=2)
+        for person in list(people)[:5]:
+            person.age = 1
+        people.save(g)
+    people.create(g)
+
+    create, save = recorder.events
+    assert (create.operation, create.label) == ("BaseElements.create", "person")
+    assert (create.elements, create.requests) == (25, 3)
+    assert create.payload_bytes > 0
+    assert set(create.phases) == {"serialize", "network", "hydrate"}
+    assert create.error is None
+    # only the dirty vertices were sent.
+    assert (save.elements, save.requests) == (5, 1)
+
+    summary = recorder.summary()[("BaseElements.save", "person")]
+    assert summary["calls"] == 1
+    assert summary["p99"] == save.seconds
+
+
+def test_instrumentation_single(g, reset) -> None:
+    events = []
+    add_listener(events.append)
+    try:
+        person = Person.create_vertex(g, name="fred", age=22)
+        assert Person.get_vertex(g, person.id) is not None
+        assert Person.get_vertex(g, "missing") is None
+        asyncio.run(Person.aget_vertices(g, [person.id, "missing"]))
+        # get_or_create_vertex() calls create_vertex(), they're one operation.
+        Person.get_or_create_vertex(g, id=person.id)
+        people = list(Person.stream(g, page_size=10))
+    finally:
+        remove_listener(events.append)
+
+    assert [event.operation for event in events] == [
+        "BaseVertex.create_vertex",
+        "BaseVertex.get_vertex",
+        "BaseVertex.get_vertex",
+        "BaseVertex.aget_vertices",
+        "BaseVertex.get_or_create_vertex",
+        "BaseElement.stream",
+    ]
+    assert [event.elements for event in events] == [1, 1, 0, 1, 1, len(people)]
+    assert all(event.requests == 1 for event in events)
+    assert "hydrate" not in events[2].phases
+
+
+def test_instrumentation_errors(echo, echo_g) -> None:
+    def broken(event):
+        raise ValueError("listeners can't break operations")
+
+    person = random_person()
+    echo.fail_ids = {person.id}
+    with MetricsRecorder() as recorder:
+        add_listener(broken)
+        try:
+            person.create(echo_g)
+        except Exception:
+            pass
+        finally:
+            remove_listener(broken)
+
+    (event,) = recorder.events
+    assert event.operation == "BaseElement.create"
+    assert event.error is not None
+    assert recorder.summary()[("BaseElement.create", "person")]["errors"] == 1
+
+
+def test_instrumentation_profile(g, reset) -> None:
+    sampler = ProfileSampler(rate=1.0)
+    set_profiler(sampler)
+    try:
+        people = People({random_person() for _ in range(5)}).create(g)
+        Person.get_vertices(g, [person.id for person in people])
+    finally:
+        set_profiler(None)
+
+    # the create wrote, only the read was profiled.
+    (profile,) = sampler.profiles
+    assert profile.operation == "BaseVertex.get_vertices"
+    assert profile.metrics["metrics"][0]["counts"]["traverserCount"] == 5
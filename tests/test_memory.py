@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+from gremlin_python.process.graph_traversal import __
+from gremlin_python.process.traversal import Direction
+from gremlin_python.process.traversal import Merge
+from gremlin_python.process.traversal import Order
+from gremlin_python.process.traversal import P
+from gremlin_python.process.traversal import T
+from gremlin_python.process.traversal import TextP
+from gremlin_python.structure.graph import Vertex
+
+from oh_gee_em.memory import MemoryGraph
+from oh_gee_em.memory import memory_traversal
+
+from .test_utilities import Person
+
+
+@pytest.fixture
+def mg():
+    g = memory_traversal()
+    for id, name, age in [("a", "fred", 25), ("b", "ron", 40), ("c", "becky", 27)]:
+        g.merge_v({T.id: id}).option(
+            Merge.on_create, {T.label: "person", "name": name, "age": age}
+        ).iterate()
+    g.merge_e({T.label: "knows", Direction.OUT: "a", Direction.IN: "b"}).iterate()
+    g.merge_e({T.label: "knows", Direction.OUT: "a", Direction.IN: "c"}).iterate()
+    return g
+
+
+def test_memory_merge_v(mg) -> None:
+    # a match takes on_match, no match takes on_create.
+    matched = mg.merge_v({T.id: "a"}).option(Merge.on_match, {"age": 26})
+    assert matched.element_map().next()["age"] == 26
+    created = (
+        mg.merge_v({T.id: "d"})
+        .option(Merge.on_create, {T.label: "person", "name": "dee"})
+        .option(Merge.on_match, {"age": 1})
+        .element_map()
+        .next()
+    )
+    assert created == {T.id: "d", T.label: "person", "name": "dee"}
+    assert mg.V().has_label("person").count().next() == 4
+
+    with pytest.raises(ValueError):
+        mg.merge_v({T.id: "a"}).option(Merge.on_match, {T.label: "other"}).iterate()
+    with pytest.raises(ValueError):
+        mg.merge_e({T.label: "knows", Direction.OUT: "a", Direction.IN: "x"}).iterate()
+
+
+def test_memory_filters(mg) -> None:
+    def names(query):
+        return sorted(query.values("name").to_list())
+
+    assert names(mg.V().has("age", P.gt(25))) == ["becky", "ron"]
+    assert names(mg.V().has("age", P.between(25, 40))) == ["becky", "fred"]
+    assert names(mg.V().has("age", P.gt(30).or_(P.lt(26)))) == ["fred", "ron"]
+    assert names(mg.V().has("name", TextP.containing("e"))) == ["becky", "fred"]
+    assert names(mg.V().has(T.id, P.within(["a", "c"]))) == ["becky", "fred"]
+    assert names(mg.V().has_label("nobody")) == []
+    # a missing property never passes a comparison.
+    mg.V("a").properties("age").drop().iterate()
+    assert names(mg.V().has("age", P.lt(100))) == ["becky", "ron"]
+
+
+def test_memory_order_limit(mg) -> None:
+    query = mg.V().has_label("person").order().by("age", Order.desc).limit(2)
+    assert query.values("name").to_list() == ["ron", "becky"]
+    assert mg.V().order().by(T.id).id_().to_list() == ["a", "b", "c"]
+    assert mg.V().has(T.id, P.gt("a")).count().next() == 2
+
+
+def test_memory_edges(mg) -> None:
+    assert sorted(mg.V("a").out("knows").values("name").to_list()) == ["becky", "ron"]
+    assert mg.V("b").in_().values("name").to_list() == ["fred"]
+    edge = mg.V("a").out_e().limit(1).element_map().next()
+    assert edge[Direction.OUT] == {T.id: "a", T.label: "person"}
+    assert isinstance(mg.V("a").next(), Vertex)
+
+    # dropping a vertex drops its edges with it.
+    mg.V("a").drop().iterate()
+    assert mg.E().count().next() == 0
+
+
+def test_memory_drop_in_side_effect(mg) -> None:
+    """The property drop a bulk save() sends when a field was set to None."""
+    rows = [{"match": {T.id: "a"}, "update": {"age": 1}, "drop": ["name"]}]
+    query = (
+        mg.inject(rows)
+        .unfold()
+        .as_("row")
+        .merge_v(__.select("match"))
+        .option(Merge.on_match, __.select("update"))
+        .side_effect(
+            __.properties()
+            .where(
+                __.key()
+                .as_("key")
+                .select("row")
+                .select("drop")
+                .unfold()
+                .where(P.eq("key"))
+            )
+            .drop()
+        )
+        .element_map()
+    )
+    assert query.to_list() == [{T.id: "a", T.label: "person", "age": 1}]
+
+
+def test_memory_shared_graph() -> None:
+    graph = MemoryGraph()
+    Person(id="a", name="fred", age=25).create(memory_traversal(graph))
+    other = memory_traversal(graph)
+    assert Person.get_vertex(other, "a").name == "fred"
+    assert asyncio.run(Person.aget_vertex(other, "a")).age == 25
+    assert len(graph) == 1
+
+
+@pytest.mark.parametrize(
+    "build",
+    [
+        lambda g: g.V().repeat(__.out("knows")).times(2),
+        lambda g: g.V().match(__.as_("a").out("knows").as_("b")),
+        lambda g: g.V().values("age").math("_ + 1"),
+        lambda g: g.V().has("name", P("fuzzy", "fred")),
+        lambda g: g.V().by("name"),
+    ],
+)
+def test_memory_rejects_what_it_doesnt_model(mg, build) -> None:
+    # a traversal the memory graph can't run the way a server would fails loudly,
+    # the "server" test backend is what checks the ones it can against the real thing.
+    with pytest.raises(NotImplementedError):
+        build(mg).to_list()
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from gremlin_python.process.traversal import Binding
+from gremlin_python.process.traversal import P
+
+from oh_gee_em import query
+
+from .test_utilities import People
+from .test_utilities import Person
+
+
+@pytest.fixture
+def people(g, reset) -> People:
+    return People(
+        {
+            Person(id=str(i), name=f"p{i}", age=20 + i, sex="f" if i % 2 else None)
+            for i in range(10)
+        }
+    ).create(g)
+
+
+def names(elements) -> list[str]:
+    return [element.name for element in elements]
+
+
+def test_query_where(g, people) -> None:
+    older = Person.query(g).where(age__gt=22, sex="f").order_by("-age")
+    assert names(older.limit(3).all()) == ["p9", "p7", "p5"]
+    assert names(older.offset(1).limit(2)) == ["p7", "p5"]
+    assert names(Person.query(g).where(sex=None).order_by("age").limit(2)) == [
+        "p0",
+        "p2",
+    ]
+    assert names(Person.query(g).where(name__in=["p1", "p2"], age=P.lt(22))) == ["p1"]
+    assert names(Person.query(g).where(age__between=(21, 23)).order_by("id")) == [
+        "p1",
+        "p2",
+    ]
+    assert Person.query(g).where(id="3").first().name == "p3"
+    assert Person.query(g).where(name__endswith="x").first() is None
+
+    with pytest.raises(ValueError):
+        Person.query(g).where(nickname="fred")
+    with pytest.raises(ValueError):
+        Person.query(g).where(age__near=1)
+
+
+def test_query_count_exists(g, people) -> None:
+    assert Person.query(g).count() == 10
+    assert Person.query(g).where(sex__isnull=False).count() == 5
+    assert Person.query(g).where(age__gte=29).exists()
+    assert not Person.query(g).where(age__gte=30).exists()
+    assert asyncio.run(Person.query(g).where(name__startswith="p").acount()) == 10
+    first = asyncio.run(Person.query(g).order_by("-age").only("name").afirst())
+    assert (first.name, first.unloaded_fields) == ("p9", {"age", "sex"})
+
+
+def test_query_templates(g, people) -> None:
+    query._templates.clear()
+    for age in (21, 25, 28):
+        traversal = Person.query(g).where(age__gt=age).limit(age).traversal()
+    # one shape, one template, the values are bindings.
+    assert len(query._templates) == 1
+    has, limit = traversal.bytecode.step_instructions[2:4]
+    assert isinstance(has[2], Binding) and has[2].value.value == 28
+    assert isinstance(limit[1], Binding) and limit[1].value == 28
+    assert traversal.to_list()[0]["age"] == 29
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from gremlin_python.process.traversal import Direction
+
+from oh_gee_em import BaseEdge
+from oh_gee_em import BaseVertex
+from oh_gee_em import BaseVertices
+from oh_gee_em import MetricsRecorder
+from oh_gee_em import Relationship
+from oh_gee_em import RelationshipNotLoadedError
+
+
+class Member(BaseVertex):
+    name: str
+    friends = Relationship("follows")
+    followers = Relationship("follows", Direction.IN)
+    clubs = Relationship("joined", target="Club")
+
+
+class Club(BaseVertex):
+    name: str
+    members = Relationship("joined", Direction.IN, target=Member)
+
+
+class Follows(BaseEdge):
+    pass
+
+
+class Joined(BaseEdge):
+    pass
+
+
+@pytest.fixture
+def members(g, reset) -> BaseVertices:
+    """a -> b, a -> c, b -> c, c -> d and everyone joined the chess club."""
+    members = BaseVertices({Member(id=name, name=name) for name in "abcd"}).create(g)
+    chess = Club(id="chess", name="chess").create(g)
+    for out_v, in_v in ["ab", "ac", "bc", "cd"]:
+        Follows(out_v=out_v, in_v=in_v).create(g)
+    for member in members:
+        Joined(out_v=member, in_v=chess).create(g)
+    return members
+
+
+def names(vertices) -> list[str]:
+    return sorted(vertex.name for vertex in vertices)
+
+
+def test_relationship_load_related(g, members) -> None:
+    with MetricsRecorder() as recorder:
+        friends = members.load_related(g, "friends")
+        friends_of_friends = friends.load_related(g, "friends")
+    # one traversal per hop, however many vertices the hop starts from.
+    assert [event.requests for event in recorder.events] == [1, 1]
+    assert names(friends) == ["b", "c", "d"]
+    assert names(friends_of_friends) == ["c", "d"]
+    assert names(members["a"].friends) == ["b", "c"]
+    assert names(members["d"].friends) == []
+    # a neighbor of several sources is one instance.
+    assert members["a"].friends["c"] is members["b"].friends["c"]
+
+    assert names(members["c"].related(g, "followers")) == ["a", "b"]
+    (chess,) = members["a"].related(g, "clubs", fields=["name"])
+    assert isinstance(chess, Club)
+    assert names(chess.related(g, "members")) == ["a", "b", "c", "d"]
+
+
+def test_relationship_not_loaded(g, members) -> None:
+    with pytest.raises(RelationshipNotLoadedError):
+        members["a"].friends
+    with pytest.raises(ValueError):
+        members.load_related(g, "name")
+    assert isinstance(Member.friends, Relationship)
+
+
+def test_relationship_arelated_coalesced(g, members) -> None:
+    async def main():
+        return await asyncio.gather(
+            *(member.arelated(g, "friends") for member in members)
+        )
+
+    with MetricsRecorder() as recorder:
+        friends = asyncio.run(main())
+    assert {member.name: names(each) for member, each in zip(members, friends)} == {
+        "a": ["b", "c"],
+        "b": ["c"],
+        "c": ["d"],
+        "d": [],
+    }
+    assert sum(event.requests for event in recorder.events) == 1
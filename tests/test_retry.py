@@ -0,0 +1,99 @@
+"""Test cases for retrying conflicted writes."""
+import asyncio
+import uuid
+
+import pytest
+
+from oh_gee_em import BulkOperationError
+from oh_gee_em import RetryPolicy
+from oh_gee_em.retry import is_conflict
+
+from .test_utilities import People
+from .test_utilities import Person
+
+
+def conflicted(times):
+    failures = iter(range(times))
+
+    def send():
+        if next(failures, None) is not None:
+            raise Exception("ConcurrentModificationException")
+        return "sent"
+
+    return send
+
+
+def test_is_conflict() -> None:
+    assert is_conflict(Exception("ConcurrentModificationException: blah"))
+    assert not is_conflict(Exception("Max frame length exceeded"))
+
+
+def test_retry_policy_backoff() -> None:
+    policy = RetryPolicy(base_delay=0.1, max_delay=0.3)
+    for retry in range(10):
+        # full jitter: anywhere from nothing up to the capped exponential delay
+        assert 0 <= policy.delay(retry) <= min(0.3, 0.1 * 2**retry)
+
+
+def test_retry_policy_call() -> None:
+    policy = RetryPolicy(attempts=3, base_delay=0.001)
+    assert policy.call(conflicted(2)) == "sent"
+    assert (policy.stats.calls, policy.stats.attempts) == (1, 3)
+    assert (policy.stats.retries, policy.stats.conflicts) == (2, 2)
+
+    with pytest.raises(Exception, match="ConcurrentModification"):
+        policy.call(conflicted(3))
+    assert policy.stats.exhausted == 1
+    assert policy.stats.attempts == 6
+
+    # anything but a conflict isn't retried
+    with pytest.raises(ZeroDivisionError):
+        policy.call(lambda: 1 / 0)
+    assert policy.stats.attempts == 7
+
+    send = conflicted(1)
+
+    async def asend():
+        return send()
+
+    assert asyncio.run(policy.acall(asend)) == "sent"
+    assert policy.stats.conflicts == 6
+
+
+def test_retry_single_write(echo, echo_g) -> None:
+    fred = Person(id=uuid.uuid4(), name="fred", age=22)
+    policy = RetryPolicy(base_delay=0.001)
+    echo.conflicts = {fred.id: 2}
+    fred.create(echo_g, retry=policy)
+    assert fred.dirty_fields == set()
+    assert policy.stats.retries == 2
+
+    echo.conflicts = {fred.id: 1}
+    fred.name = "frederick"
+    asyncio.run(fred.asave(echo_g, retry=policy))
+    assert fred.dirty_fields == set()
+    assert policy.stats.retries == 3
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 4])
+def test_retry_bulk_write(echo, echo_g, max_concurrency) -> None:
+    people = People({Person(id=uuid.uuid4(), name="fred", age=i) for i in range(95)})
+    people._batch_size = 10
+    conflicted_ids = [person.id for person in list(people)[5:95:30]]
+    echo.conflicts = {id: 2 for id in conflicted_ids}
+    policy = RetryPolicy(base_delay=0.001)
+    people.create(echo_g, max_concurrency=max_concurrency, retry=policy)
+
+    # only the 3 conflicted chunks were re-sent, twice each
+    assert len(echo.requests) == 10 + 3 * 2
+    assert all(not person.dirty_fields for person in people)
+    assert policy.stats.calls == 10
+    assert policy.stats.conflicts == 6
+
+    for person in people:
+        person.age = 1
+    echo.conflicts = {conflicted_ids[0]: 10}
+    with pytest.raises(BulkOperationError) as error:
+        asyncio.run(people.asave(echo_g, retry=RetryPolicy(base_delay=0.001)))
+    assert len(error.value.failures) == 1
+    assert conflicted_ids[0] in error.value.failed_ids
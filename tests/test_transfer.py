@@ -0,0 +1,222 @@
+"""Test cases for streaming transfers and the CLI commands running them."""
+import io
+import json
+import time
+from contextlib import nullcontext
+from itertools import islice
+
+import click
+import pytest
+from click.testing import CliRunner
+from gremlin_python.process.traversal import T
+
+from oh_gee_em import __main__
+from oh_gee_em.transfer import Checkpoint
+from oh_gee_em.transfer import export_elements
+from oh_gee_em.transfer import export_split
+from oh_gee_em.transfer import import_rows
+from oh_gee_em.transfer import read_rows
+from oh_gee_em.transfer import split_points
+
+from .test_utilities import People
+from .test_utilities import Person
+
+
+CSV = "name,age,sex\n" + "".join(f"p{i},{i},\n" for i in range(25)) + "bad,old,\n"
+
+
+def test_import_rows_resume(g, reset, tmp_path) -> None:
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json")
+    rejected = []
+    rows = read_rows(io.StringIO(CSV), "csv")
+    progress = import_rows(
+        g,
+        Person,
+        rows,
+        batch_size=5,
+        max_concurrency=2,
+        checkpoint=checkpoint,
+        on_error=lambda number, row, error: rejected.append(number),
+    )
+    assert (progress.rows, progress.written, progress.errors) == (26, 25, 1)
+    assert rejected == [26]
+    # a request per batch of 5, two at a time.
+    assert progress.requests == 5
+    assert checkpoint.load()["rows"] == 26
+    assert g.V().has_label("person").count().next() == 25
+
+    # appended rows are all a rerun does.
+    more = CSV + "fred,22,m\n"
+    progress = import_rows(
+        g, Person, read_rows(io.StringIO(more), "csv"), checkpoint=checkpoint
+    )
+    assert (progress.rows, progress.written) == (27, 1)
+    assert g.V().has_label("person").count().next() == 26
+
+
+def test_import_rows_resume_without_ids(g, reset, tmp_path) -> None:
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json")
+    rows = read_rows(io.StringIO(CSV), "csv")
+    import_rows(g, Person, islice(rows, 10), batch_size=5, checkpoint=checkpoint)
+    first = sorted(g.V().has_label("person").id_().to_list())
+    # as if it died after sending the second window but before saving it.
+    checkpoint.save(**{**checkpoint.load(), "rows": 5})
+    rows = read_rows(io.StringIO(CSV), "csv")
+    progress = import_rows(g, Person, rows, batch_size=5, checkpoint=checkpoint)
+    assert (progress.rows, progress.written) == (26, 20)
+    # the re-sent rows got the ids they had the first time, no copies.
+    ids = g.V().has_label("person").id_().to_list()
+    assert len(ids) == 25
+    assert set(first) <= set(ids)
+
+
+def test_import_rows_resume_skip(g, reset, tmp_path) -> None:
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json")
+
+    def run(text: str):
+        rows = read_rows(io.StringIO(text), "csv")
+        return import_rows(g, Person, rows, skip=5, checkpoint=checkpoint)
+
+    progress = run(CSV)
+    assert (progress.rows, progress.written) == (26, 20)
+    # rerunning the same command only picks up what was appended since.
+    progress = run(CSV + "fred,22,m\n")
+    assert (progress.rows, progress.written) == (27, 1)
+    assert g.V().has_label("person").count().next() == 21
+
+
+def test_cli_import(g, reset, tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(__main__, "_connect", lambda url: nullcontext(g))
+    source = tmp_path / "people.jsonl"
+    source.write_text(
+        "\n".join(json.dumps({"name": f"p{i}", "age": i}) for i in range(3))
+        + '\n{"name": "bad"}\n'
+    )
+    rejects = tmp_path / "rejects.jsonl"
+    result = CliRunner().invoke(
+        __main__.main,
+        ["import", "tests.test_utilities:Person", str(source), "--rejects", rejects],
+    )
+    assert result.exit_code == 0, result.output
+    assert "3 written" in result.output
+    assert json.loads(rejects.read_text())["row"] == 4
+    assert g.V().has_label("person").count().next() == 3
+
+    result = CliRunner().invoke(__main__.main, ["import", "tests.nope:Person"])
+    assert result.exit_code == 2
+
+
+def test_export_elements_resume(g, reset, tmp_path) -> None:
+    People({Person(name=f"p{i}", age=i) for i in range(25)}).create(g)
+    path = tmp_path / "people.csv"
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json")
+    with open(path, "w", newline="") as output:
+        progress = export_elements(
+            g, Person, output, "csv", page_size=10, checkpoint=checkpoint
+        )
+    assert (progress.written, progress.requests) == (25, 3)
+    assert checkpoint.load()["done"]
+    exported = list(read_rows(open(path), "csv"))
+    assert sorted(int(row["age"]) for row in exported) == list(range(25))
+
+    # stopped after the first page, with half of the second written.
+    state = {**checkpoint.load(), "done": False, "rows": 10}
+    state["after"] = exported[9]["id"]
+    state["bytes"] = len("".join(open(path, newline="").readlines()[:11]))
+    checkpoint.save(**state)
+    with open(path, "a", newline="") as output:
+        output.write("garbage,row\n")
+    with open(path, "r+", newline="") as output:
+        progress = export_elements(
+            g, Person, output, "csv", page_size=10, checkpoint=checkpoint
+        )
+    assert (progress.rows, progress.written) == (25, 15)
+    assert list(read_rows(open(path), "csv")) == exported
+
+
+def test_cli_export_split(g, reset, tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(__main__, "_connect", lambda url: nullcontext(g))
+    people = People({Person(name=f"p{i}", age=i) for i in range(30)}).create(g)
+    output = tmp_path / "people.jsonl"
+    result = CliRunner().invoke(
+        __main__.main,
+        ["export", "tests.test_utilities:Person", str(output), "--workers", "3"],
+    )
+    assert result.exit_code == 0, result.output
+    parts = [tmp_path / f"people.{part}.jsonl" for part in range(3)]
+    assert result.stdout.split() == [str(part) for part in parts]
+    ids = [row["id"] for part in parts for row in read_rows(open(part), "jsonl")]
+    # each part in id order, the parts one after another.
+    assert ids == sorted(str(person.id) for person in people)
+    assert all(len(list(open(part))) == 10 for part in parts)
+
+
+def test_split_points(g, reset) -> None:
+    People({Person(name=f"p{i}", age=i) for i in range(30)}).create(g)
+    ids = Person._label_query(g).id_().order().to_list()
+    assert split_points(g, Person, 3) == [ids[9], ids[19]]
+    assert split_points(g, Person, 1) == []
+
+
+def test_cli_export_after(g, reset, tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(__main__, "_connect", lambda url: nullcontext(g))
+    people = People({Person(name=f"p{i}", age=i) for i in range(30)}).create(g)
+    ids = sorted(str(person.id) for person in people)
+    output = tmp_path / "people.jsonl"
+    result = CliRunner().invoke(
+        __main__.main,
+        ["export", "tests.test_utilities:Person", str(output), "--after", ids[9]],
+    )
+    assert result.exit_code == 0, result.output
+    # the ids are strings here, so the id is passed on as it is.
+    assert [row["id"] for row in read_rows(open(output), "jsonl")] == ids[10:]
+
+
+def test_cli_export_split_after(g, reset, tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(__main__, "_connect", lambda url: nullcontext(g))
+    people = People({Person(name=f"p{i}", age=i) for i in range(30)}).create(g)
+    ids = sorted(str(person.id) for person in people)
+    output = tmp_path / "people.jsonl"
+    arguments = ["export", "tests.test_utilities:Person", str(output)]
+    result = CliRunner().invoke(
+        __main__.main, [*arguments, "--workers", "2", "--after", ids[9]]
+    )
+    assert result.exit_code == 0, result.output
+    parts = [tmp_path / f"people.{part}.jsonl" for part in range(2)]
+    exported = [row["id"] for part in parts for row in read_rows(open(part), "jsonl")]
+    # the parts split just the ids after --after between them.
+    assert exported == ids[10:]
+    assert [len(list(open(part))) for part in parts] == [10, 10]
+
+
+def test_cli_as_id(g, reset) -> None:
+    g.merge_v({T.id: 7, T.label: "person", "name": "fred"}).iterate()
+    assert __main__._as_id(g, Person, "5") == 5
+    with pytest.raises(click.BadParameter):
+        __main__._as_id(g, Person, "abc")
+
+
+def test_export_split_progress(g, reset, tmp_path, monkeypatch) -> None:
+    People({Person(name=f"p{i}", age=i) for i in range(30)}).create(g)
+    from_page = Person._from_page
+
+    def slow_page(page, projection=None):
+        # the workers wait side by side, so their times overlap.
+        time.sleep(0.05)
+        return from_page(page, projection)
+
+    monkeypatch.setattr(Person, "_from_page", slow_page)
+    reports = []
+    start = time.perf_counter()
+    export_split(
+        g,
+        Person,
+        str(tmp_path / "people.jsonl"),
+        3,
+        page_size=5,
+        on_progress=reports.append,
+    )
+    elapsed = time.perf_counter() - start
+    # counters add up across the workers, the time is wall time not their sum.
+    assert (reports[-1].rows, reports[-1].written) == (30, 30)
+    assert all(report.seconds <= elapsed for report in reports)
@@ -1,10 +1,20 @@
+from datetime import date
+from enum import Enum
+from typing import ClassVar
 from uuid import uuid4
 
+import pytest
+from gremlin_python.process.traversal import Direction
 from gremlin_python.process.traversal import T
+from pydantic import BaseModel
 from pydantic import Field
+from pydantic import ValidationError
 
+from oh_gee_em import BaseEdge
+from oh_gee_em import BaseEdges
 from oh_gee_em import BaseVertex
 from oh_gee_em import BaseVertices
+from oh_gee_em.BaseElement import BaseElement
 from oh_gee_em.utilities import enum_uuid_to_str
 
 
@@ -18,6 +28,15 @@ class People(BaseVertices):
     root: set[Person] = Field(default_factory=set())
 
 
+class Knows(BaseEdge):
+    since: int | None = None
+    note: str | None = None
+
+
+class Acquaintances(BaseEdges):
+    root: set[Knows] = Field(default_factory=set)
+
+
 def test_enum_str_util_uuid() -> None:
     test_uuid = uuid4()
     str_uuid = enum_uuid_to_str(test_uuid)
@@ -33,3 +52,116 @@ def test_enum_str_util_T():
     str_label = enum_uuid_to_str(T.label)
     assert str_label == T.label.name
     assert isinstance(str_label, str)
+
+
+def test_element_kind_is_abstract() -> None:
+    class Thing(BaseElement):
+        name: str
+
+    with pytest.raises(TypeError, match="_collection, _merge, _source"):
+        Thing(name="fred")
+    assert Person(name="fred", age=22).name == "fred"
+
+
+def test_hydrate_vertex() -> None:
+    id = uuid4()
+    row = {T.id: id, T.label: "person", "name": "fred", "age": 22, "extra": 1}
+    fred = Person._from_db(row)
+    # the element_map isn't modified and the id comes out a str
+    assert T.id in row
+    assert fred.id == str(id)
+    assert (fred.name, fred.age, fred.sex) == ("fred", 22, None)
+    assert fred.dirty_fields == set()
+    assert fred.model_dump() == Person(id=str(id), name="fred", age=22).model_dump()
+
+    fred.name = "frederick"
+    fred._load({**row, "age": 23})
+    assert (fred.name, fred.age) == ("fred", 23)
+    assert fred.dirty_fields == set()
+
+
+def test_hydrate_edge() -> None:
+    out_v, in_v = uuid4(), uuid4()
+    row = {
+        T.id: 7,
+        T.label: "knows",
+        Direction.OUT: {T.id: out_v, T.label: "person"},
+        Direction.IN: {T.id: in_v, T.label: "person"},
+        "since": 2001,
+    }
+    knows = Knows._from_db(row)
+    assert (knows.id, knows.out_v, knows.in_v) == ("7", str(out_v), str(in_v))
+    assert knows.since == 2001
+
+
+def test_hydrate_strict() -> None:
+    class StrictPerson(Person):
+        _strict_hydration: ClassVar[bool] = True
+
+    row = {T.id: uuid4(), T.label: "strictperson", "name": "fred", "age": "22"}
+    # trusted rows are taken as is, strict ones are validated like any input
+    assert Person._from_db(row).age == "22"
+    fred = StrictPerson._from_db(row)
+    assert fred.age == 22
+    fred._load({**row, "age": "23"})
+    assert fred.age == 23
+    with pytest.raises(ValidationError):
+        StrictPerson._from_db({**row, "age": "old"})
+
+
+def test_hydrate_coerces_non_primitives() -> None:
+    class Color(Enum):
+        RED = "red"
+
+    class Paint(BaseVertex):
+        color: Color
+        n: int
+        mixed: date | None = None
+
+    row = {
+        T.id: uuid4(),
+        T.label: "paint",
+        "color": "red",
+        "n": 5,
+        "mixed": "2024-01-02",
+    }
+    # an enum or a date doesn't come back from the db as one, validate those rows.
+    assert Paint._validates_rows() and not Person._validates_rows()
+    paint = Paint._from_db(row)
+    assert (paint.color, paint.mixed) == (Color.RED, date(2024, 1, 2))
+    assert paint.dirty_fields == set()
+    paint._load({**row, "color": "red", "n": 6})
+    assert (paint.color, paint.n) == (Color.RED, 6)
+
+
+def test_serialization_plan() -> None:
+    plan = Person._serialization_plan()
+    assert plan.label == "person"
+    assert plan.properties == ("name", "age", "sex")
+    assert plan.nullable == {"sex"}
+    assert plan.plain
+
+    fred = Person(id=uuid4(), name="fred", age=22)
+    for kwargs in ({}, {"exclude_none": True}, {"include": {"age", "sex"}}):
+        # the planned dump matches what model_dump() gives
+        assert fred.dump_props(**kwargs) == {
+            T.label: "person",
+            **fred.model_dump(exclude=fred._structural_fields, **kwargs),
+        }
+    assert list(fred.dump_props(add_label=False)) == ["name", "age", "sex"]
+
+
+def test_serialization_plan_not_plain() -> None:
+    class Address(BaseModel):
+        city: str
+
+    class Resident(Person):
+        address: Address | None = None
+
+    assert not Resident._serialization_plan().plain
+    assert Resident._serialization_plan().nullable == {"sex", "address"}
+    resident = Resident(name="fred", age=22, address=Address(city="bedrock"))
+    # nested models still go through model_dump()
+    assert resident.dump_props(add_label=False, include={"address"}) == {
+        "address": {"city": "bedrock"}
+    }